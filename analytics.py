@@ -0,0 +1,228 @@
+"""Columnar sales analytics for the Race Event Ticket System.
+
+SalesAnalytics projects the bookings and payments held by a DataManager into NumPy arrays, one row per booking
+line item and one row per payment, and answers group-by queries with vectorized operations instead of walking
+Booking, Ticket and Payment objects. Projections are extended incrementally, so only bookings and payments created
+since the last query are read; they are rebuilt when the stores are reloaded or a booking is cancelled. Requires NumPy.
+"""
+import threading
+
+import numpy as np
+
+
+class CodeTable:
+    """Assigns dense integer codes to values such as payment methods or (event, ticket) pairs."""
+    def __init__(self):
+        """Initializes an empty CodeTable."""
+        self.codes = {} # Dictionary mapping each value to its code
+        self.values = [] # List of values, indexed by code
+
+    def encode(self, value):
+        """Returns the code of a value, assigning the next free code to values not seen before."""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ColumnBuilder:
+    """Collects new rows in Python lists and appends them to NumPy columns in one step."""
+    def __init__(self, dtypes):
+        """Initializes the ColumnBuilder.
+        Args:
+            dtypes (dict): The NumPy dtype of each column, keyed by column name.
+        """
+        self.dtypes = dtypes
+        self.columns = {name: np.empty(0, dtype=dtype) for name, dtype in dtypes.items()}
+        self.pending = {name: [] for name in dtypes}
+
+    def append(self, **row):
+        """Queues a row to be added on the next flush."""
+        for name, value in row.items():
+            self.pending[name].append(value)
+
+    def flush(self):
+        """Converts the queued rows to arrays and appends them to the columns."""
+        if not self.pending[next(iter(self.pending))]:
+            return
+        for name, dtype in self.dtypes.items():
+            self.columns[name] = np.concatenate([self.columns[name], np.asarray(self.pending[name], dtype=dtype)])
+            self.pending[name] = []
+
+    def __len__(self):
+        return len(self.columns[next(iter(self.columns))])
+
+
+def group_sum(codes, weights, size):
+    """Sums weights per code. Codes must be dense integers below size."""
+    return np.bincount(codes, weights=weights, minlength=size)
+
+def group_count(codes, size):
+    """Counts rows per code. Codes must be dense integers below size."""
+    return np.bincount(codes, minlength=size)
+
+
+class SalesAnalytics:
+    """Columnar revenue and sales reporting over a DataManager's bookings and payments."""
+    LINE_COLUMNS = {"booking_id": np.int64, "event_id": np.int64, "ticket": np.int32, "units": np.int32,
+                    "unit_price": np.float64, "revenue": np.float64, "discounted_units": np.int32, "time": "datetime64[s]"}
+    PAYMENT_COLUMNS = {"payment_id": np.int64, "booking_id": np.int64, "method": np.int32, "amount": np.float64, "time": "datetime64[s]"}
+
+    def __init__(self, data_manager):
+        """Initializes the SalesAnalytics engine. Nothing is projected until the first query.
+        Args:
+            data_manager (DataManager): The DataManager whose bookings and payments are analysed.
+        """
+        self.data_manager = data_manager
+        self.lock = threading.RLock() # Held for a whole refresh or query, so concurrent reports don't project a booking twice
+        self.reset()
+
+    def reset(self):
+        """Discards the projections, so the next query reads every booking and payment again."""
+        self.tickets = CodeTable() # Codes for (event ID, ticket name) pairs
+        self.methods = CodeTable() # Codes for payment methods
+        self.lines = ColumnBuilder(self.LINE_COLUMNS) # One row per booking line item
+        self.payments = ColumnBuilder(self.PAYMENT_COLUMNS) # One row per payment
+        self.last_booking_id = None # Highest booking ID projected so far
+        self.last_payment_id = None # Highest payment ID projected so far
+        self.sources = None # The projected booking and payment stores and the booking revision they were read at
+
+    def _new_items(self, collection, last_key, next_key):
+        """Returns the (ID, object) pairs added to a store since it was last projected.
+        Args:
+            collection (mapping): The store, keyed by ID.
+            last_key (int): The highest ID projected so far, or None if nothing has been.
+            next_key (int): The next ID the store will allocate.
+        """
+        if hasattr(collection, "items_after"):
+            return list(collection.items_after(last_key)) # SQLite tables continue from the last ID read
+        if last_key is None:
+            return list(collection.items())
+        # IDs are allocated in increasing order, so only those above the last one projected are looked up
+        new_items = []
+        for key in range(last_key + 1, next_key):
+            record = collection.get(key)
+            if record is not None:
+                new_items.append((key, record))
+        return new_items
+
+    def refresh(self):
+        """Projects the bookings and payments created since the last refresh into the columns. Starts over if the
+        stores were replaced, as a shared DataManager does when it reloads them, or a booking was cancelled."""
+        with self.lock:
+            data_manager = self.data_manager
+            with data_manager.lock:
+                sources = (data_manager.bookings, data_manager.payments, data_manager.booking_revision)
+                if self.sources is None or any(source is not seen for source, seen in zip(sources[:2], self.sources[:2])) or sources[2] != self.sources[2]:
+                    self.reset()
+                    self.sources = sources
+                new_bookings = self._new_items(data_manager.bookings, self.last_booking_id, data_manager.next_booking_id)
+                new_payments = self._new_items(data_manager.payments, self.last_payment_id, data_manager.next_payment_id)
+            for booking_id, booking in new_bookings:
+                if booking.get_status() == "Cancelled":
+                    continue
+                for item in booking.get_items():
+                    quantity = item.get_quantity()
+                    self.lines.append(booking_id=booking_id, event_id=booking.get_event_id(),
+                                      ticket=self.tickets.encode((booking.get_event_id(), item.get_name())),
+                                      units=quantity, unit_price=item.get_unit_price(), revenue=item.get_subtotal(),
+                                      discounted_units=quantity if item.is_discount_available() else 0,
+                                      time=booking.get_booking_date())
+            for payment_id, payment in new_payments:
+                self.payments.append(payment_id=payment_id, booking_id=payment.get_booking_id(),
+                                     method=self.methods.encode(payment.get_method()), amount=payment.get_amount(),
+                                     time=payment.get_payment_date())
+            self.lines.flush()
+            self.payments.flush()
+            if new_bookings:
+                self.last_booking_id = max(booking_id for booking_id, _ in new_bookings)
+            if new_payments:
+                self.last_payment_id = max(payment_id for payment_id, _ in new_payments)
+
+    def _line_mask(self, start=None, end=None, event_id=None):
+        """Selects the line items booked within a date range and, optionally, for one event."""
+        columns = self.lines.columns
+        mask = np.ones(len(self.lines), dtype=bool)
+        if start is not None:
+            mask &= columns["time"] >= np.datetime64(start, "s")
+        if end is not None:
+            mask &= columns["time"] < np.datetime64(end, "s")
+        if event_id is not None:
+            mask &= columns["event_id"] == event_id
+        return mask
+
+    def sales_by_ticket(self, measure="units", start=None, end=None):
+        """Sums a measure per event and ticket type.
+        Args:
+            measure (str, optional): "units", "revenue" or "discounted_units". Defaults to "units".
+            start (str, optional): Only count bookings made on or after this date. Defaults to None.
+            end (str, optional): Only count bookings made before this date. Defaults to None.
+        Returns:
+            dict: A dictionary where keys are event IDs and values are dictionaries of ticket names and totals.
+        """
+        with self.lock:
+            self.refresh()
+            mask = self._line_mask(start, end)
+            totals = group_sum(self.lines.columns["ticket"][mask], self.lines.columns[measure][mask].astype(np.float64), len(self.tickets.values))
+            counts = group_count(self.lines.columns["ticket"][mask], len(self.tickets.values))
+            report = {}
+            for code in np.flatnonzero(counts):
+                event_id, ticket_name = self.tickets.values[code]
+                total = totals[code]
+                report.setdefault(event_id, {})[ticket_name] = int(total) if measure != "revenue" else float(total)
+            return report
+
+    def revenue_by_event(self, start=None, end=None):
+        """Returns the booked revenue per event ID."""
+        with self.lock:
+            self.refresh()
+            mask = self._line_mask(start, end)
+            event_ids, inverse = np.unique(self.lines.columns["event_id"][mask], return_inverse=True)
+            revenue = group_sum(inverse, self.lines.columns["revenue"][mask], len(event_ids))
+            return {int(event_id): float(total) for event_id, total in zip(event_ids, revenue)}
+
+    def revenue_by_day(self, start=None, end=None, event_id=None):
+        """Returns the booked revenue per booking day ("YYYY-MM-DD"), optionally for one event."""
+        with self.lock:
+            self.refresh()
+            mask = self._line_mask(start, end, event_id)
+            days = self.lines.columns["time"][mask].astype("datetime64[D]")
+            unique_days, inverse = np.unique(days, return_inverse=True)
+            revenue = group_sum(inverse, self.lines.columns["revenue"][mask], len(unique_days))
+            return {str(day): float(total) for day, total in zip(unique_days, revenue)}
+
+    def payments_by_method(self, start=None, end=None):
+        """Returns the amount paid and number of payments per payment method.
+        Returns:
+            dict: A dictionary mapping each payment method to {"amount": ..., "count": ...}.
+        """
+        with self.lock:
+            self.refresh()
+            columns = self.payments.columns
+            mask = np.ones(len(self.payments), dtype=bool)
+            if start is not None:
+                mask &= columns["time"] >= np.datetime64(start, "s")
+            if end is not None:
+                mask &= columns["time"] < np.datetime64(end, "s")
+            size = len(self.methods.values)
+            amounts = group_sum(columns["method"][mask], columns["amount"][mask], size)
+            counts = group_count(columns["method"][mask], size)
+            return {self.methods.values[code]: {"amount": float(amounts[code]), "count": int(counts[code])}
+                    for code in np.flatnonzero(counts)}
+
+    def summary(self, start=None, end=None):
+        """Builds the full sales report shown on the admin dashboard.
+        Returns:
+            dict: Units, revenue and discount-eligible units per event and ticket type, revenue per event and per day,
+                and payments per method.
+        """
+        with self.lock:
+            return {
+                "units": self.sales_by_ticket("units", start, end),
+                "revenue": self.sales_by_ticket("revenue", start, end),
+                "discounted_units": self.sales_by_ticket("discounted_units", start, end),
+                "revenue_by_event": self.revenue_by_event(start, end),
+                "revenue_by_day": self.revenue_by_day(start, end),
+                "payments_by_method": self.payments_by_method(start, end),
+            }
@@ -1,1121 +1,4936 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import pickle
-import os
-from datetime import datetime
-
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import pickle
-import os
-from datetime import datetime
-
-class User:
-    """Represents a user of the ticket system."""
-    def __init__(self, user_id, name, email, password, balance=0.0):
-        """Initializes a new User object.
-        Args:
-            user_id (int): Unique identifier for the user.
-            name (str): User's full name.
-            email (str): User's email address (used for login).
-            password (str): User's password for authentication.
-            balance (float, optional): User's account balance (currently not fully implemented). Defaults to 0.0.
-        """
-        self.user_id = user_id
-        self.name = name
-        self.email = email
-        self.password = password
-        self.balance = balance
-        self.bookings = [] # List to store the user's bookings
-
-    def get_user_id(self):
-        """Returns the user's ID."""
-        return self.user_id
-
-    def get_name(self):
-        """Returns the user's name."""
-        return self.name
-
-    def get_email(self):
-        """Returns the user's email address."""
-        return self.email
-
-    def get_password(self):
-        """Returns the user's password."""
-        return self.password
-
-    def get_balance(self):
-        """Returns the user's balance."""
-        return self.balance
-
-    def update_profile(self, name=None, email=None, password=None):
-        """Updates the user's profile information.
-        Args:
-            name (str, optional): New name. Defaults to None.
-            email (str, optional): New email. Defaults to None.
-            password (str, optional): New password. Defaults to None.
-        """
-        if name:
-            self.name = name
-        if email:
-            self.email = email
-        if password:
-            self.password = password
-
-    def add_booking(self, booking):
-        """Adds a booking to the user's booking history.
-        Args:
-            booking (Booking): The booking object to add.
-        """
-        self.bookings.append(booking)
-
-    def view_history(self):
-        """Returns the user's booking history."""
-        return self.bookings
-
-class AccountManager:
-    """Manages user accounts, including creation, retrieval, updating, and deletion."""
-    def __init__(self, filename="users.pkl"):
-        """Initializes the AccountManager.
-        Args:
-            filename (str, optional): The filename to store user data using pickle. Defaults to "users.pkl".
-        """
-        self.users = {} # Dictionary to store User objects, with user_id as keys
-        self.next_user_id = 1 # Counter for generating unique user IDs
-        self.filename = filename
-        self.load_data() # Load user data from the pickle file on initialization
-
-    def _generate_user_id(self):
-        """Generates a unique user ID."""
-        user_id = self.next_user_id
-        self.next_user_id += 1
-        return user_id
-
-    def create_account(self, name, email, password, details=None):
-        """Creates a new user account.
-        Args:
-            name (str): User's name.
-            email (str): User's email.
-            password (str): User's password.
-            details (dict, optional): Additional user details (currently not used). Defaults to None.
-        Raises:
-            ValueError: If the provided email address already exists.
-        Returns:
-            User: The newly created User object.
-        """
-        if email in [user.email for user in self.users.values()]:
-            raise ValueError(f"Email '{email}' already exists.")
-        user_id = self._generate_user_id()
-        new_user = User(user_id, name, email, password)
-        self.users[user_id] = new_user
-        self.save_data() # Save updated user data to the pickle file
-        return new_user
-
-    def get_user(self, user_id):
-        """Retrieves a User object based on their ID.
-        Args:
-            user_id (int): The ID of the user to retrieve.
-        Returns:
-            User: The User object if found, otherwise None.
-        """
-        return self.users.get(user_id)
-
-    def update_user(self, user_id, name=None, email=None, password=None):
-        """Updates an existing user's information.
-        Args:
-            user_id (int): The ID of the user to update.
-            name (str, optional): New name. Defaults to None.
-            email (str, optional): New email. Defaults to None.
-            password (str, optional): New password. Defaults to None.
-        Returns:
-            bool: True if the user was updated successfully, False otherwise.
-        """
-        user = self.get_user(user_id)
-        if user:
-            user.update_profile(name, email, password)
-            self.save_data() # Save updated user data
-            return True
-        return False
-
-    def delete_user(self, user_id):
-        """Deletes a user account.
-        Args:
-            user_id (int): The ID of the user to delete.
-        Returns:
-            bool: True if the user was deleted successfully, False otherwise.
-        """
-        if user_id in self.users:
-            del self.users[user_id]
-            self.save_data() # Save updated user data
-            return True
-        return False
-
-    def display_user_details(self, user_id):
-        """Retrieves and returns the details of a user.
-        Args:
-            user_id (int): The ID of the user.
-        Returns:
-            dict: A dictionary containing the user's details (user_id, name, email, balance), or None if the user is not found.
-        """
-        user = self.get_user(user_id)
-        if user:
-            return {"user_id": user.user_id, "name": user.name, "email": user.email, "balance": user.balance}
-        return None
-
-    def save_data(self):
-        """Saves the user account data to the pickle file."""
-        try:
-            with open(self.filename, 'wb') as f:
-                pickle.dump({'users': self.users, 'next_user_id': self.next_user_id}, f)
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not save user data: {e}")
-
-    def load_data(self):
-        """Loads the user account data from the pickle file."""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'rb') as f:
-                    data = pickle.load(f)
-                    self.users = data.get('users', {})
-                    self.next_user_id = data.get('next_user_id', 1)
-                    # Ensure next_user_id is greater than any existing user ID
-                    if self.users:
-                        max_id = max(self.users.keys())
-                        if self.next_user_id <= max_id:
-                            self.next_user_id = max_id + 1
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not load user data: {e}")
-
-class Ticket:
-    """Represents a ticket for a race event."""
-    def __init__(self, ticket_id, name, price, validity=None, features=None, discount_available=True):
-        """Initializes a new Ticket object.
-        Args:
-            ticket_id (int): Unique identifier for the ticket type.
-            name (str): Name of the ticket type (e.g., "General Admission", "VIP").
-            price (float): Price of the ticket.
-            validity (str, optional): Duration or validity period of the ticket. Defaults to None.
-            features (str, optional): Special features or access granted by the ticket. Defaults to None.
-            discount_available (bool, optional): Indicates if a discount can be applied to this ticket type. Defaults to True.
-        """
-        self.ticket_id = ticket_id
-        self.name = name
-        self.price = price
-        self.validity = validity
-        self.features = features
-        self.discount_available = discount_available
-
-    def get_ticket_id(self):
-        """Returns the ticket ID."""
-        return self.ticket_id
-
-    def get_name(self):
-        """Returns the name of the ticket."""
-        return self.name
-
-    def get_price(self):
-        """Returns the price of the ticket."""
-        return self.price
-
-    def get_validity(self):
-        """Returns the validity of the ticket."""
-        return self.validity
-
-    def get_features(self):
-        """Returns the features of the ticket."""
-        return self.features
-
-    def is_discount_available(self):
-        """Returns True if a discount is available for this ticket type, False otherwise."""
-        return self.discount_available
-
-    def set_discount_availability(self, available):
-        """Sets the discount availability for this ticket type.
-        Args:
-            available (bool): True if discount should be available, False otherwise.
-        """
-        self.discount_available = available
-
-class RaceEvent:
-    """Represents a race event with its details and available tickets."""
-    def __init__(self, event_id, name, date, location, capacity):
-        """Initializes a new RaceEvent object.
-        Args:
-            event_id (int): Unique identifier for the race event.
-            name (str): Name of the race event (e.g., "Grand National").
-            date (str): Date of the race event.
-            location (str): Location of the race event (e.g., "Aintree Racecourse").
-            capacity (int): Maximum capacity of attendees for the event.
-        """
-        self.event_id = event_id
-        self.name = name
-        self.date = date
-        self.location = location
-        self.capacity = capacity
-        self.tickets = {} # Dictionary to hold Ticket objects available for this event, with ticket name as keys
-
-    def get_event_id(self):
-        """Returns the event ID."""
-        return self.event_id
-
-    def get_name(self):
-        """Returns the name of the event."""
-        return self.name
-
-    def get_date(self):
-        """Returns the date of the event."""
-        return self.date
-
-    def get_location(self):
-        """Returns the location of the event."""
-        return self.location
-
-    def get_capacity(self):
-        """Returns the capacity of the event."""
-        return self.capacity
-
-    def add_ticket(self, ticket):
-        """Adds a ticket type to the event's available tickets.
-        Args:
-            ticket (Ticket): The Ticket object to add.
-        Raises:
-            ValueError: If a ticket type with the same name already exists for this event.
-        """
-        if ticket.get_name() not in self.tickets:
-            self.tickets[ticket.get_name()] = ticket
-        else:
-            raise ValueError(f"Ticket type '{ticket.get_name()}' already exists for this event.")
-
-    def get_ticket(self, ticket_name):
-        """Retrieves a Ticket object for this event based on its name.
-        Args:
-            ticket_name (str): The name of the ticket type.
-        Returns:
-            Ticket: The Ticket object if found, otherwise None.
-        """
-        return self.tickets.get(ticket_name)
-
-    def get_available_tickets(self):
-        """Returns a list of all available Ticket objects for this event."""
-        return list(self.tickets.values())
-
-    def get_availability(self):
-        """Returns the current availability (remaining capacity) for the event.
-        In a real system, this might track actual seats sold. For simplicity, returning capacity.
-        Returns:
-            int: The total capacity of the event.
-        """
-        return self.capacity
-
-class Booking:
-    """Represents a booking made by a user for a race event."""
-    def __init__(self, booking_id, user_id, event_id, booking_date=None, status="Pending"):
-        """Initializes a new Booking object.
-        Args:
-            booking_id (int): Unique identifier for the booking.
-            user_id (int): ID of the user who made the booking.
-            event_id (int): ID of the event booked.
-            booking_date (str, optional): Date and time of the booking. Defaults to current timestamp.
-            status (str, optional): Current status of the booking (e.g., "Pending", "Confirmed", "Cancelled"). Defaults to "Pending".
-        """
-        self.booking_id = booking_id
-        self.user_id = user_id
-        self.event_id = event_id
-        self.booking_date = booking_date if booking_date else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        self.status = status
-        self.tickets = [] # List to store the Ticket objects included in this booking
-        self.total_amount = 0.0 # Total amount for this booking
-
-    def get_booking_id(self):
-        """Returns the booking ID."""
-        return self.booking_id
-
-    def get_user_id(self):
-        """Returns the ID of the user who made the booking."""
-        return self.user_id
-
-    def get_event_id(self):
-        """Returns the ID of the event booked."""
-        return self.event_id
-
-    def get_booking_date(self):
-        """Returns the date and time of the booking."""
-        return self.booking_date
-
-    def get_status(self):
-        """Returns the current status of the booking."""
-        return self.status
-
-    def add_ticket(self, ticket):
-        """Adds a ticket to this booking and updates the total amount.
-        Args:
-            ticket (Ticket): The Ticket object to add.
-        """
-        self.tickets.append(ticket)
-        self.calculate_total()
-
-    def get_tickets(self):
-        """Returns a list of Ticket objects in this booking."""
-        return self.tickets
-
-    def calculate_total(self):
-        """Calculates and returns the total amount for this booking."""
-        self.total_amount = sum(ticket.get_price() for ticket in self.tickets)
-        return self.total_amount
-
-class Payment:
-    """Represents a payment made for a booking."""
-    def __init__(self, payment_id, booking_id, amount, payment_date=None, method="Credit Card"):
-        """Initializes a new Payment object.
-        Args:
-            payment_id (int): Unique identifier for the payment.
-            booking_id (int): ID of the booking this payment is for.
-            amount (float): Amount paid.
-            payment_date (str, optional): Date and time of the payment. Defaults to current timestamp.
-            method (str, optional): Payment method used (e.g., "Credit Card", "Debit Card"). Defaults to "Credit Card".
-        """
-        self.payment_id = payment_id
-        self.booking_id = booking_id
-        self.amount = amount
-        self.payment_date = payment_date if payment_date else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        self.method = method
-
-    def get_payment_id(self):
-        """Returns the payment ID."""
-        return self.payment_id
-
-    def get_booking_id(self):
-        """Returns the ID of the booking this payment is for."""
-        return self.booking_id
-
-    def get_amount(self):
-        """Returns the payment amount."""
-        return self.amount
-
-    def get_payment_date(self):
-        """Returns the date and time of the payment."""
-        return self.payment_date
-
-    def get_method(self):
-        """Returns the payment method used."""
-        return self.method
-
-    def process_payment(self):
-        """Simulates processing a payment.
-        In a real system, this would involve interaction with a payment gateway.
-        Returns:
-            bool: True to simulate successful payment.
-        """
-        return True # Simulate successful payment
-
-class Admin:
-    """Represents an administrator with privileges to view reports and modify system settings."""
-    def __init__(self, admin_id, name):
-        """Initializes a new Admin object.
-        Args:
-            admin_id (int): Unique identifier for the administrator.
-            name (str): Name of the administrator.
-        """
-        self.admin_id = admin_id
-        self.name = name
-
-    def get_admin_id(self):
-        """Returns the administrator ID."""
-        return self.admin_id
-
-    def get_name(self):
-        """Returns the administrator's name."""
-        return self.name
-
-    def view_report(self, bookings):
-        """Generates a sales report based on the provided bookings.
-        Args:
-            bookings (list): A list of Booking objects.
-        Returns:
-            dict: A dictionary where keys are event IDs and values are dictionaries of ticket names and their sales counts.
-        """
-        sales_report = {}
-        for booking in bookings:
-            event_id = booking.get_event_id()
-            for ticket in booking.get_tickets():
-                ticket_name = ticket.get_name()
-                if event_id not in sales_report:
-                    sales_report[event_id] = {}
-                sales_report[event_id][ticket_name] = sales_report[event_id].get(ticket_name, 0) + 1
-        return sales_report
-
-    def modify_discount_availability(self, event, ticket_name, available):
-        """Modifies the discount availability for a specific ticket type of an event.
-        Args:
-            event (RaceEvent): The RaceEvent object.
-            ticket_name (str): The name of the ticket type.
-            available (bool): True to make the discount available, False otherwise.
-        Returns:
-            bool: True if the discount availability was modified successfully, False otherwise.
-        """
-        ticket = event.get_ticket(ticket_name)
-        if ticket:
-            ticket.set_discount_availability(available)
-            return True
-        return False
-class DataManager:
-    """Manages the storage and retrieval of application data, including users, events, bookings, and payments."""
-    def __init__(self, user_file="users.pkl", event_file="events.pkl", booking_file="bookings.pkl", payment_file="payments.pkl"):
-        """Initializes the DataManager.
-        Args:
-            user_file (str, optional): Filename for storing user data. Defaults to "users.pkl".
-            event_file (str, optional): Filename for storing event data. Defaults to "events.pkl".
-            booking_file (str, optional): Filename for storing booking data. Defaults to "bookings.pkl".
-            payment_file (str, optional): Filename for storing payment data. Defaults to "payments.pkl".
-        """
-        self.user_manager = AccountManager(user_file) # Manages user accounts
-        self.events = self.load_events(event_file) # Loads race event data
-        self.bookings = self.load_bookings(booking_file) # Loads booking data
-        self.payments = self.load_payments(payment_file) # Loads payment data
-        self.next_booking_id = self.get_next_id(self.bookings) + 1 # Generates the next unique booking ID
-        self.next_payment_id = self.get_next_id(self.payments) + 1 # Generates the next unique payment ID
-        self.event_filename = event_file # Filename for event data
-        self.booking_filename = booking_file # Filename for booking data
-        self.payment_filename = payment_file # Filename for payment data
-
-    def get_next_id(self, data_dict):
-        """Finds the next available ID in a dictionary of data.
-        Args:
-            data_dict (dict): A dictionary where keys are IDs.
-        Returns:
-            int: The next highest ID, or 0 if the dictionary is empty.
-        """
-        return max(data_dict.keys()) if data_dict else 0
-
-    def get_account_manager(self):
-        """Returns the AccountManager instance."""
-        return self.user_manager
-
-    def get_events(self):
-        """Returns a list of all RaceEvent objects."""
-        return list(self.events.values())
-
-    def get_event(self, event_id):
-        """Retrieves a RaceEvent object by its ID.
-        Args:
-            event_id (int): The ID of the event to retrieve.
-        Returns:
-            RaceEvent: The RaceEvent object if found, otherwise None.
-        """
-        return self.events.get(event_id)
-
-    def add_event(self, event):
-        """Adds a new RaceEvent object to the stored events.
-        Args:
-            event (RaceEvent): The RaceEvent object to add.
-        """
-        self.events[event.get_event_id()] = event
-        self.save_events() # Persist the updated event data
-
-    def save_events(self):
-        """Saves the race event data to the pickle file."""
-        try:
-            with open(self.event_filename, 'wb') as f:
-                pickle.dump(self.events, f)
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not save event data: {e}")
-
-    def load_events(self, filename):
-        """Loads the race event data from the pickle file.
-        Args:
-            filename (str): The name of the file to load from.
-        Returns:
-            dict: A dictionary containing RaceEvent objects, or an empty dictionary if the file doesn't exist or loading fails.
-        """
-        if os.path.exists(filename):
-            try:
-                with open(filename, 'rb') as f:
-                    return pickle.load(f)
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not load event data: {e}")
-        return {}
-
-    def create_booking(self, user_id, event_id, selected_tickets):
-        """Creates a new booking for a user for a specific event.
-        Args:
-            user_id (int): The ID of the user making the booking.
-            event_id (int): The ID of the event being booked.
-            selected_tickets (dict): A dictionary of ticket names and their quantities.
-        Returns:
-            Booking: The newly created Booking object if successful, otherwise None.
-        """
-        booking_id = self.next_booking_id
-        self.next_booking_id += 1
-        booking = Booking(booking_id, user_id, event_id) # Create a new Booking object
-        event = self.get_event(event_id) # Retrieve the event details
-        if event:
-            for ticket_name, quantity in selected_tickets.items():
-                ticket = event.get_ticket(ticket_name) # Get the Ticket object for the selected ticket name
-                if ticket:
-                    for _ in range(quantity):
-                        # Create individual Ticket instances for the booking
-                        booking.add_ticket(Ticket(ticket.get_ticket_id(), ticket.get_name(), ticket.get_price(), ticket.get_validity(), ticket.get_features()))
-            user = self.user_manager.get_user(user_id) # Retrieve the user object
-            if user:
-                user.add_booking(booking) # Add the booking to the user's history
-                self.bookings[booking_id] = booking # Store the booking
-                self.user_manager.save_data() # Update user data (to save the new booking reference)
-                self.save_bookings() # Persist the new booking data
-                return booking
-        return None
-
-    def get_bookings_for_user(self, user_id):
-        """Retrieves all bookings made by a specific user.
-        Args:
-            user_id (int): The ID of the user.
-        Returns:
-            list: A list of Booking objects associated with the user.
-        """
-        return [booking for booking in self.bookings.values() if booking.get_user_id() == user_id]
-
-    def save_bookings(self):
-        """Saves the booking data to the pickle file."""
-        try:
-            with open(self.booking_filename, 'wb') as f:
-                pickle.dump(self.bookings, f)
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not save booking data: {e}")
-
-    def load_bookings(self, filename):
-        """Loads the booking data from the pickle file.
-        Args:
-            filename (str): The name of the file to load from.
-        Returns:
-            dict: A dictionary containing Booking objects, or an empty dictionary if the file doesn't exist or loading fails.
-        """
-        if os.path.exists(filename):
-            try:
-                with open(filename, 'rb') as f:
-                    return pickle.load(f)
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not load booking data: {e}")
-        return {}
-
-    def create_payment(self, booking_id, amount, method):
-        """Creates a new payment record for a booking.
-        Args:
-            booking_id (int): The ID of the booking the payment is for.
-            amount (float): The amount paid.
-            method (str): The payment method used.
-        Returns:
-            Payment: The newly created Payment object.
-        """
-        payment_id = self.next_payment_id
-        self.next_payment_id += 1
-        payment = Payment(payment_id, booking_id, amount, method=method) # Create a new Payment object
-        self.payments[payment_id] = payment # Store the payment
-        self.save_payments() # Persist the new payment data
-        return payment
-
-    def save_payments(self):
-        """Saves the payment data to the pickle file."""
-        try:
-            with open(self.payment_filename, 'wb') as f:
-                pickle.dump(self.payments, f)
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not save payment data: {e}")
-
-    def load_payments(self, filename):
-        """Loads the payment data from the pickle file.
-        Args:
-            filename (str): The name of the file to load from.
-        Returns:
-            dict: A dictionary containing Payment objects, or an empty dictionary if the file doesn't exist or loading fails.
-        """
-        if os.path.exists(filename):
-            try:
-                with open(filename, 'rb') as f:
-                    return pickle.load(f)
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not load payment data: {e}")
-        return {}
-
-class GUI:
-    """Graphical User Interface for the Race Event Ticket System."""
-    def __init__(self, data_manager):
-        """Initializes the GUI.
-        Args:
-            data_manager (DataManager): An instance of the DataManager class for data access.
-        """
-        self.data_manager = data_manager
-        self.account_manager = data_manager.get_account_manager() # Get the account manager from data manager
-        self.admin = Admin(1, "AdminUser") # Simple admin user instance
-        self.current_user_id = None # Stores the ID of the currently logged-in user
-        self.window = tk.Tk() # Create the main Tkinter window
-        self.window.title("Race Event Ticket System") # Set the title of the window
-        self.setup_login_register() # Initialize the login and registration interface
-
-    def run(self):
-        """Starts the Tkinter event loop, making the GUI interactive."""
-        self.window.mainloop()
-
-    def setup_login_register(self):
-        """Sets up the login and registration screen."""
-        # Destroy any existing widgets in the window
-        for widget in self.window.winfo_children():
-            widget.destroy()
-
-        # Create a frame for the login section
-        login_frame = ttk.LabelFrame(self.window, text="Login")
-        login_frame.pack(padx=20, pady=20)
-
-        # Email label and entry
-        ttk.Label(login_frame, text="Email:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
-        self.login_email_entry = ttk.Entry(login_frame)
-        self.login_email_entry.grid(row=0, column=1, padx=5, pady=5)
-
-        # Password label and entry (masked for security)
-        ttk.Label(login_frame, text="Password:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
-        self.login_password_entry = ttk.Entry(login_frame, show="*")
-        self.login_password_entry.grid(row=1, column=1, padx=5, pady=5)
-
-        # Login and Register buttons
-        ttk.Button(login_frame, text="Login", command=self.login).grid(row=2, column=0, columnspan=2, padx=5, pady=10)
-        ttk.Button(login_frame, text="Register", command=self.setup_registration).grid(row=3, column=0, columnspan=2, padx=5, pady=5)
-
-    def login(self):
-        """Handles the login process."""
-        email = self.login_email_entry.get()
-        password = self.login_password_entry.get()
-        # Iterate through the stored users to find a match
-        for user in self.account_manager.users.values():
-            if user.get_email() == email and user.get_password() == password:
-                self.current_user_id = user.get_user_id() # Store the logged-in user's ID
-                messagebox.showinfo("Login Successful", f"Welcome, {user.get_name()}!")
-                self.show_main_menu() # Navigate to the main menu
-                return
-        # If no matching user is found
-        messagebox.showerror("Login Failed", "Invalid email or password.")
-
-    def setup_registration(self):
-        """Sets up the user registration screen."""
-        # Destroy any existing widgets
-        for widget in self.window.winfo_children():
-            widget.destroy()
-
-        # Create a frame for registration
-        reg_frame = ttk.LabelFrame(self.window, text="Register New Account")
-        reg_frame.pack(padx=20, pady=20)
-
-        # Name label and entry
-        ttk.Label(reg_frame, text="Name:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
-        self.reg_name_entry = ttk.Entry(reg_frame)
-        self.reg_name_entry.grid(row=0, column=1, padx=5, pady=5)
-
-        # Email label and entry
-        ttk.Label(reg_frame, text="Email:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
-        self.reg_email_entry = ttk.Entry(reg_frame)
-        self.reg_email_entry.grid(row=1, column=1, padx=5, pady=5)
-
-        # Password label and entry (masked)
-        ttk.Label(reg_frame, text="Password:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
-        self.reg_password_entry = ttk.Entry(reg_frame, show="*")
-        self.reg_password_entry.grid(row=2, column=1, padx=5, pady=5)
-
-        # Register and Back to Login buttons
-        ttk.Button(reg_frame, text="Register", command=self.register_user).grid(row=3, column=0, columnspan=2, padx=5, pady=10)
-        ttk.Button(reg_frame, text="Back to Login", command=self.setup_login_register).grid(row=4, column=0, columnspan=2, padx=5, pady=5)
-
-    def register_user(self):
-        """Handles the user registration process."""
-        name = self.reg_name_entry.get()
-        email = self.reg_email_entry.get()
-        password = self.reg_password_entry.get()
-        # Check if all required fields are filled
-        if not name or not email or not password:
-            messagebox.showerror("Registration Failed", "All fields are required.")
-            return
-        try:
-            # Attempt to create a new user account
-            self.account_manager.create_account(name, email, password)
-            messagebox.showinfo("Registration Successful", "Account created successfully. Please log in.")
-            self.setup_login_register() # Go back to the login screen
-        except ValueError as e:
-            # Handle errors during account creation (e.g., email already exists)
-            messagebox.showerror("Registration Failed", str(e))
-
-    def show_main_menu(self):
-        """Displays the main menu after successful login."""
-        # Destroy all current widgets
-        for widget in self.window.winfo_children():
-            widget.destroy()
-
-        # Create the main menu frame
-        main_frame = ttk.LabelFrame(self.window, text="Main Menu")
-        main_frame.pack(padx=20, pady=20)
-
-        # Buttons for different functionalities
-        ttk.Button(main_frame, text="View/Update Account", command=self.show_account_management).pack(fill=tk.X, pady=5)
-        ttk.Button(main_frame, text="Purchase Tickets", command=self.show_ticket_purchasing).pack(fill=tk.X, pady=5)
-        ttk.Button(main_frame, text="View Booking History", command=self.show_booking_history).pack(fill=tk.X, pady=5)
-        ttk.Button(main_frame, text="Admin Dashboard", command=self.show_admin_dashboard).pack(fill=tk.X, pady=5)
-        ttk.Button(main_frame, text="Logout", command=self.setup_login_register).pack(fill=tk.X, pady=10)
-
-    def show_account_management(self):
-        """Displays the account management screen for the logged-in user."""
-        # Check if a user is logged in
-        if self.current_user_id is None:
-            messagebox.showerror("Error", "No user logged in.")
-            return
-
-        # Destroy current widgets
-        for widget in self.window.winfo_children():
-            widget.destroy()
-
-        # Get the logged-in user's details
-        user = self.account_manager.get_user(self.current_user_id)
-        if not user:
-            messagebox.showerror("Error", "User not found.")
-            self.show_main_menu()
-            return
-
-        # Create the account management frame
-        account_frame = ttk.LabelFrame(self.window, text="Account Management")
-        account_frame.pack(padx=20, pady=20)
-
-        # Display user information with entry fields for updates
-        ttk.Label(account_frame, text=f"User ID: {user.get_user_id()}").pack(pady=2)
-        ttk.Label(account_frame, text=f"Name:").pack(pady=2)
-        self.name_entry = ttk.Entry(account_frame)
-        self.name_entry.insert(0, user.get_name()) # Fill with current name
-        self.name_entry.pack(pady=2)
-
-        ttk.Label(account_frame, text=f"Email:").pack(pady=2)
-        self.email_entry = ttk.Entry(account_frame)
-        self.email_entry.insert(0, user.get_email()) # Fill with current email
-        self.email_entry.pack(pady=2)
-
-        ttk.Label(account_frame, text=f"Password:").pack(pady=2)
-        self.password_entry = ttk.Entry(account_frame, show="*")
-        self.password_entry.insert(0, user.get_password()) # Fill with current password (masked)
-        self.password_entry.pack(pady=2)
-
-        # Buttons for updating profile, viewing purchase orders, and going back to the main menu
-        ttk.Button(account_frame, text="Update Profile", command=self.update_profile).pack(pady=10)
-        ttk.Button(account_frame, text="View Purchase Orders", command=self.view_purchase_orders).pack(pady=5)
-        ttk.Button(account_frame, text="Back to Main Menu", command=self.show_main_menu).pack(pady=10)
-
-    def update_profile(self):
-        """Handles the process of updating the logged-in user's profile."""
-        # Check if a user is logged in
-        if self.current_user_id is None:
-            messagebox.showerror("Error", "No user logged in.")
-            return
-        # Get the updated information from the entry fields
-        name = self.name_entry.get()
-        email = self.email_entry.get()
-        password = self.password_entry.get()
-        # Attempt to update the user's information
-        if self.account_manager.update_user(self.current_user_id, name, email, password):
-            messagebox.showinfo("Profile Updated", "Your profile has been updated.")
-        else:
-            messagebox.showerror("Update Failed", "Could not update profile.")
-        self.show_account_management() # Refresh the account management screen
-
-    def view_purchase_orders(self):
-        """Displays the purchase orders (booking history) for the logged-in user."""
-        # Check if a user is logged in
-        if self.current_user_id is None:
-            messagebox.showerror("Error", "No user logged in.")
-            return
-
-        # Destroy current widgets
-        for widget in self.window.winfo_children():
-            widget.destroy()
-
-        # Create a frame for displaying purchase orders
-        orders_frame = ttk.LabelFrame(self.window, text="Purchase Orders")
-        orders_frame.pack(padx=20, pady=20)
-
-        # Get the logged-in user's details
-        user = self.account_manager.get_user(self.current_user_id)
-        if user:
-            # Retrieve the user's booking history
-            bookings = self.data_manager.get_bookings_for_user(user.get_user_id())
-            if bookings:
-                # Iterate through each booking and display its details
-                for booking in bookings:
-                    order_details = f"Booking ID: {booking.get_booking_id()}, Event ID: {booking.get_event_id()}, Date: {booking.get_booking_date()}, Total: ${booking.calculate_total():.2f}"
-                    ttk.Label(orders_frame, text=order_details).pack(pady=2, anchor="w")
-                    # Display the tickets within each booking
-                    for ticket in booking.get_tickets():
-                        ticket_info = f"  - {ticket.get_name()} (${ticket.get_price():.2f})"
-                        ttk.Label(orders_frame, text=ticket_info).pack(pady=1, anchor="w")
-                    ttk.Separator(orders_frame).pack(fill=tk.X, pady=5)
-                else:
-                    ttk.Label(orders_frame, text="No purchase orders found.").pack(pady=5)
-            else:
-                ttk.Label(orders_frame, text="User not found.").pack(pady=5)
-
-            # Button to go back to the account management screen
-            ttk.Button(orders_frame, text="Back to Account", command=self.show_account_management).pack(pady=10)
-
-    def show_ticket_purchasing(self):
-        """Displays the interface for purchasing tickets."""
-        # Check if a user is logged in
-        if self.current_user_id is None:
-            messagebox.showerror("Error", "No user logged in.")
-            return
-
-        # Destroy current widgets
-        for widget in self.window.winfo_children():
-            widget.destroy()
-
-        # Create a frame for purchasing tickets
-        purchase_frame = ttk.LabelFrame(self.window, text="Purchase Tickets")
-        purchase_frame.pack(padx=20, pady=20)
-
-        # Label and Combobox to select an event
-        event_label = ttk.Label(purchase_frame, text="Select Event:")
-        event_label.pack(pady=5)
-        self.event_combobox = ttk.Combobox(purchase_frame, values=[event.get_name() for event in self.data_manager.get_events()])
-        self.event_combobox.pack(pady=5)
-        self.event_combobox.bind("<<ComboboxSelected>>", self.populate_ticket_options) # Populate tickets when an event is selected
-
-        # Dictionary to store ticket quantity selection frames
-        self.ticket_frames = {}
-        # Dictionary to store the selected tickets and their quantities for the cart
-        self.cart = {}
-        # Frame to hold the ticket options (populated after event selection)
-        self.ticket_options_frame = ttk.Frame(purchase_frame)
-        self.ticket_options_frame.pack(pady=10)
-
-        # Label and Listbox to display the shopping cart
-        self.cart_label = ttk.Label(purchase_frame, text="Shopping Cart:")
-        self.cart_label.pack(pady=5)
-        self.cart_listbox = tk.Listbox(purchase_frame, height=5)
-        self.cart_listbox.pack(pady=5)
-
-        # Buttons for adding to cart, removing from cart, checkout, and going back to the main menu
-        ttk.Button(purchase_frame, text="Add to Cart", command=self.add_to_cart).pack(pady=5)
-        ttk.Button(purchase_frame, text="Remove from Cart", command=self.remove_from_cart).pack(pady=5)
-        ttk.Button(purchase_frame, text="Checkout", command=self.checkout).pack(pady=10)
-        ttk.Button(purchase_frame, text="Back to Main Menu", command=self.show_main_menu).pack(pady=10)
-
-    def populate_ticket_options(self, event=None):
-        """Populates the ticket options frame based on the selected event."""
-        selected_event_name = self.event_combobox.get()  # Get the name of the selected event from the combobox
-        self.selected_event = None
-        # Find the corresponding RaceEvent object
-        for event_obj in self.data_manager.get_events():
-            if event_obj.get_name() == selected_event_name:
-                self.selected_event = event_obj
-                break
-
-        if self.selected_event:
-            # Clear any existing widgets in the ticket options frame
-            for widget in self.ticket_options_frame.winfo_children():
-                widget.destroy()
-            self.ticket_frames = {}  # Reset the dictionary to store ticket quantity spinboxes
-            ttk.Label(self.ticket_options_frame, text="Select Ticket Quantities:").pack(pady=5)
-            # Iterate through the available tickets for the selected event
-            for ticket in self.selected_event.get_available_tickets():
-                ticket_frame = ttk.Frame(self.ticket_options_frame)
-                ticket_frame.pack(pady=2, anchor="w")
-                # Display ticket name, price, validity, and features
-                ttk.Label(ticket_frame,
-                          text=f"{ticket.get_name()} (${ticket.get_price():.2f}) - {ticket.get_validity()} - {ticket.get_features()}: ").pack(
-                    side=tk.LEFT)
-                # Spinbox to select the quantity of each ticket
-                qty_spinbox = tk.Spinbox(ticket_frame, from_=0, to=10)
-                qty_spinbox.pack(side=tk.LEFT, padx=5)
-                # Store the spinbox widget associated with the ticket name
-                self.ticket_frames[ticket.get_name()] = qty_spinbox
-
-    def add_to_cart(self):
-        """Adds the selected tickets and their quantities to the shopping cart."""
-        if not self.selected_event:
-            messagebox.showerror("Error", "Please select an event first.")
-            return
-
-        # Iterate through the ticket quantity spinboxes
-        for ticket_name, qty_widget in self.ticket_frames.items():
-            quantity = int(qty_widget.get())  # Get the selected quantity
-            if quantity > 0:
-                # Add the selected quantity to the cart (or update if already present)
-                self.cart[ticket_name] = self.cart.get(ticket_name, 0) + quantity
-        self.update_cart_display()  # Refresh the display of the shopping cart
-
-    def remove_from_cart(self):
-        """Removes a selected item from the shopping cart."""
-        selected_item_index = self.cart_listbox.curselection()  # Get the index of the selected item in the listbox
-        if selected_item_index:
-            # Extract the ticket name from the selected item string
-            selected_ticket = self.cart_listbox.get(selected_item_index[0]).split(" x ")[1]
-            if selected_ticket in self.cart:
-                del self.cart[selected_ticket]  # Remove the ticket from the cart
-                self.update_cart_display()  # Update the cart display
-
-    def update_cart_display(self):
-        """Updates the display of the shopping cart in the listbox."""
-        self.cart_listbox.delete(0, tk.END)  # Clear the current contents of the listbox
-        # Add each item in the cart to the listbox in the format "quantity x ticket_name"
-        for ticket, qty in self.cart.items():
-            self.cart_listbox.insert(tk.END, f"{qty} x {ticket}")
-
-    def checkout(self):
-        """Handles the checkout process, creating a booking and processing payment."""
-        if not self.cart:
-            messagebox.showinfo("Info", "Your cart is empty.")
-            return
-
-        if not self.selected_event:
-            messagebox.showerror("Error", "No event selected.")
-            return
-
-        total_price = 0
-        # Calculate the total price of the items in the cart
-        for ticket_name, quantity in self.cart.items():
-            ticket = self.selected_event.get_ticket(ticket_name)
-            if ticket:
-                total_price += ticket.get_price() * quantity
-
-        # Prompt the user for a payment method
-        payment_method = simpledialog.askstring("Payment", f"Total amount: ${total_price:.2f}\nEnter payment method:")
-        if payment_method:
-            # Create a new booking in the data manager
-            booking = self.data_manager.create_booking(self.current_user_id, self.selected_event.get_event_id(),
-                                                       self.cart)
-            if booking:
-                # Create a new payment record
-                payment = self.data_manager.create_payment(booking.get_booking_id(), booking.calculate_total(),
-                                                           payment_method)
-                # Simulate payment processing
-                if payment and payment.process_payment():
-                    messagebox.showinfo("Checkout Successful",
-                                        f"Booking successful! Booking ID: {booking.get_booking_id()}, Payment ID: {payment.get_payment_id()}, Total: ${payment.get_amount():.2f}, Method: {payment.get_method()}")
-                    self.cart = {}  # Clear the shopping cart after successful checkout
-                    self.update_cart_display()  # Update the cart display to show it's empty
-                else:
-                    messagebox.showerror("Payment Failed", "There was an issue processing your payment.")
-            else:
-                messagebox.showerror("Booking Failed", "Could not create booking.")
-
-    def show_booking_history(self):
-        """Displays the booking history for the logged-in user."""
-        if self.current_user_id is None:
-            messagebox.showerror("Error", "No user logged in.")
-            return
-
-        # Clear the current window content
-        for widget in self.window.winfo_children():
-            widget.destroy()
-
-        # Create a frame for the booking history
-        history_frame = ttk.LabelFrame(self.window, text="Booking History")
-        history_frame.pack(padx=20, pady=20)
-
-        # Get the booking history for the current user
-        bookings = self.data_manager.get_bookings_for_user(self.current_user_id)
-        if bookings:
-            # Iterate through each booking and display its details
-            for booking in bookings:
-                event = self.data_manager.get_event(booking.get_event_id())
-                event_name = event.get_name() if event else "Unknown Event"
-                booking_details = f"Booking ID: {booking.get_booking_id()}, Event: {event_name}, Date: {booking.get_booking_date()}, Total: ${booking.calculate_total():.2f}, Status: {booking.get_status()}"
-                ttk.Label(history_frame, text=booking_details).pack(pady=2, anchor="w")
-                # Display the tickets within each booking
-                for ticket in booking.get_tickets():
-                    ticket_info = f"  - {ticket.get_name()} (${ticket.get_price():.2f})"
-                    ttk.Label(history_frame, text=ticket_info).pack(pady=1, anchor="w")
-                ttk.Separator(history_frame).pack(fill=tk.X, pady=5)
-        else:
-            ttk.Label(history_frame, text="No booking history found.").pack(pady=5)
-
-        # Button to go back to the main menu
-        ttk.Button(history_frame, text="Back to Main Menu", command=self.show_main_menu).pack(pady=10)
-
-    def show_admin_dashboard(self):
-        """Displays the admin dashboard with sales report and discount modification options."""
-        # Clear the current window content
-        for widget in self.window.winfo_children():
-            widget.destroy()
-
-        # Create a frame for the admin dashboard
-        admin_frame = ttk.LabelFrame(self.window, text="Admin Dashboard")
-        admin_frame.pack(padx=20, pady=20)
-
-        # Display the ticket sales report
-        ttk.Label(admin_frame, text="Ticket Sales Report:").pack(pady=5)
-        bookings = self.data_manager.bookings.values()  # Get all bookings
-        sales_report = self.admin.view_report(list(bookings))  # Generate the sales report
-        report_text = tk.Text(admin_frame, height=10, width=50)
-        report_text.pack(pady=5)
-        # Format and display the sales report
-        for event_id, sales in sales_report.items():
-            event = self.data_manager.get_event(event_id)
-            event_name = event.get_name() if event else f"Event ID {event_id}"
-            report_text.insert(tk.END, f"Event: {event_name}\n")
-            for ticket_name, count in sales.items():
-                report_text.insert(tk.END, f"  - {ticket_name}: {count}\n")
-            report_text.insert(tk.END, "\n")
-        report_text.config(state=tk.DISABLED)  # Make the report text read-only
-
-        # Section for modifying discount availability
-        ttk.Label(admin_frame, text="Modify Discount Availability:").pack(pady=5)
-        event_label_discount = ttk.Label(admin_frame, text="Select Event:")
-        event_label_discount.pack()
-        # Combobox to select an event for discount modification
-        self.event_combobox_discount = ttk.Combobox(admin_frame, values=[event.get_name() for event in
-                                                                         self.data_manager.get_events()])
-        self.event_combobox_discount.pack()
-        self.event_combobox_discount.bind("<<ComboboxSelected>>",
-                                          self.populate_ticket_discount_options)  # Populate ticket options for discount modification
-
-        # Frame to hold the ticket discount availability options
-        self.ticket_discount_frame = ttk.Frame(admin_frame)
-        self.ticket_discount_frame.pack(pady=5)
-
-        # Button to go back to the main menu
-        ttk.Button(admin_frame, text="Back to Main Menu", command=self.show_main_menu).pack(pady=10)
-
-    def populate_ticket_discount_options(self, event=None):
-        selected_event_name = self.event_combobox_discount.get()
-        self.selected_discount_event = None
-        for event_obj in self.data_manager.get_events():
-            if event_obj.get_name() == selected_event_name:
-                self.selected_discount_event = event_obj
-                break
-
-        if self.selected_discount_event:
-            for widget in self.ticket_discount_frame.winfo_children():
-                widget.destroy()
-            ttk.Label(self.ticket_discount_frame, text="Set Discount Availability:").pack(pady=5)
-            for ticket in self.selected_discount_event.get_available_tickets():
-                discount_control = ttk.Frame(self.ticket_discount_frame)
-                discount_control.pack(pady=2, anchor="w")
-                ttk.Label(discount_control, text=f"{ticket.get_name()}: ").pack(side=tk.LEFT)
-                available_var = tk.BooleanVar(value=ticket.is_discount_available())
-                checkbutton = ttk.Checkbutton(discount_control, text="Available", variable=available_var, command=lambda t=ticket, var=available_var: self.update_discount(self.selected_discount_event, t.get_name(), var.get()))
-                checkbutton.pack(side=tk.LEFT)
-
-    def update_discount(self, event, ticket_name, available):
-        if event:
-            if self.admin.modify_discount_availability(event, ticket_name, available):
-                messagebox.showinfo("Discount Updated", f"Discount for {ticket_name} set to {'available' if available else 'unavailable'}.")
-            else:
-                messagebox.showerror("Update Failed", f"Could not update discount for {ticket_name}.")
-
-if __name__ == "__main__":
-    data_manager = DataManager()
-
-    # Initialize some events and tickets if they don't exist
-    if not data_manager.get_events():
-        event1 = RaceEvent(1, "Grand National", "2025-06-10", "Aintree Racecourse", 500)
-        event1.add_ticket(Ticket(101, "Single Race", 50.00, "Valid for one race", "Access to general areas"))
-        event1.add_ticket(Ticket(102, "Weekend Package", 120.00, "Valid for all weekend races", "Access to VIP lounge"))
-        event1.add_ticket(Ticket(103, "Group Discount", 45.00, "Per person for groups of 5+", "General access, group booking only"))
-        data_manager.add_event(event1)
-
-        event2 = RaceEvent(2, "Royal Ascot", "2025-07-15", "Ascot Racecourse", 1000)
-        event2.add_ticket(Ticket(201, "Queen Anne Enclosure", 80.00, "Access to Queen Anne Enclosure", "Dress code applies"))
-        event2.add_ticket(Ticket(202, "Village Enclosure", 60.00, "Access to Village Enclosure", "Lively atmosphere"))
-        data_manager.add_event(event2)
-
-    gui = GUI(data_manager)
-    gui.run()
\ No newline at end of file
+import abc
+import pickle
+import os
+import sys
+import time
+import sqlite3
+import io
+import mmap
+import struct
+import json
+import threading
+import tracemalloc
+import types
+import weakref
+import functools
+import itertools
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+import metrics
+
+try:
+    import fcntl
+except ImportError: # Windows locks files through msvcrt instead
+    fcntl = None
+    import msvcrt
+
+try:
+    import tkinter as tk
+    from tkinter import ttk, messagebox, simpledialog, filedialog
+except ImportError: # Headless installs can still use the data layer through service.py
+    tk = ttk = messagebox = simpledialog = filedialog = None
+
+def slot_state(obj, skip=()):
+    """Returns the state of a slotted model object as a dictionary, the same layout older versions pickled from __dict__.
+    Args:
+        obj (object): An object whose class defines __slots__.
+        skip (tuple, optional): Names of slots to leave out. Defaults to ().
+    Returns:
+        dict: The values of the slots that are set, keyed by slot name.
+    """
+    return {name: getattr(obj, name) for name in type(obj).__slots__
+            if name != '__weakref__' and name not in skip and hasattr(obj, name)}
+
+def restore_slots(obj, state):
+    """Restores a slotted model object from the state returned by slot_state or from the __dict__ of an object
+    pickled before the models had slots. Attributes that are no longer part of the class are ignored.
+    Args:
+        obj (object): An object whose class defines __slots__.
+        state (dict): The pickled state.
+    """
+    slots = type(obj).__slots__
+    for name, value in state.items():
+        if name in slots:
+            setattr(obj, name, value)
+
+class User:
+    """Represents a user of the ticket system."""
+    __slots__ = ('user_id', 'name', 'email', 'password', 'balance', '__weakref__') # No per-instance __dict__
+    def __init__(self, user_id, name, email, password, balance=0.0):
+        """Initializes a new User object.
+        Args:
+            user_id (int): Unique identifier for the user.
+            name (str): User's full name.
+            email (str): User's email address (used for login).
+            password (str): User's password for authentication.
+            balance (float, optional): User's account balance (currently not fully implemented). Defaults to 0.0.
+        """
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+        self.password = password
+        self.balance = balance
+
+    def get_user_id(self):
+        """Returns the user's ID."""
+        return self.user_id
+
+    def get_name(self):
+        """Returns the user's name."""
+        return self.name
+
+    def get_email(self):
+        """Returns the user's email address."""
+        return self.email
+
+    def get_password(self):
+        """Returns the user's password."""
+        return self.password
+
+    def get_balance(self):
+        """Returns the user's balance."""
+        return self.balance
+
+    def update_profile(self, name=None, email=None, password=None):
+        """Updates the user's profile information.
+        Args:
+            name (str, optional): New name. Defaults to None.
+            email (str, optional): New email. Defaults to None.
+            password (str, optional): New password. Defaults to None.
+        """
+        if name:
+            self.name = name
+        if email:
+            self.email = email
+        if password:
+            self.password = password
+
+    def __setstate__(self, state):
+        """Restores a pickled user, dropping the booking objects that older versions stored on the user.
+        A user's bookings are looked up through DataManager.get_bookings_for_user instead.
+        """
+        state.pop('bookings', None)
+        restore_slots(self, state)
+
+    def __getstate__(self):
+        """Returns the state to pickle."""
+        return slot_state(self)
+
+class AccountManager:
+    """Manages user accounts, including creation, retrieval, updating, and deletion."""
+    def __init__(self, filename="users.pkl", storage=None):
+        """Initializes the AccountManager.
+        Args:
+            filename (str, optional): The filename to store user data using pickle. Defaults to "users.pkl".
+            storage (PickleStorage or SqliteStorage, optional): The storage backend to use instead of a pickle file. Defaults to None.
+        """
+        self.users = {} # Dictionary to store User objects, with user_id as keys
+        self.email_index = {} # Dictionary mapping normalized email addresses to user IDs
+        self.next_user_id = 1 # Counter for generating unique user IDs
+        self.filename = filename
+        self.storage = storage if storage is not None else PickleStorage(user_file=filename) # Storage backend persisting the accounts
+        self.load_data() # Load user data from the pickle file on initialization
+
+    @staticmethod
+    def normalize_email(email):
+        """Normalizes an email address so lookups ignore case and surrounding whitespace.
+        Args:
+            email (str): The email address to normalize.
+        Returns:
+            str: The normalized email address.
+        """
+        return email.strip().lower()
+
+    def _generate_user_id(self):
+        """Generates a unique user ID."""
+        user_id = self.next_user_id
+        self.next_user_id += 1
+        return user_id
+
+    @metrics.timed()
+    def create_account(self, name, email, password, details=None):
+        """Creates a new user account.
+        Args:
+            name (str): User's name.
+            email (str): User's email.
+            password (str): User's password.
+            details (dict, optional): Additional user details (currently not used). Defaults to None.
+        Raises:
+            ValueError: If the provided email address already exists.
+        Returns:
+            User: The newly created User object.
+        """
+        with self.transaction():
+            if self.find_by_email(email):
+                raise ValueError(f"Email '{email}' already exists.")
+            user_id = self._generate_user_id()
+            new_user = User(user_id, name, email, password)
+            self.users[user_id] = new_user
+            self._index_user(new_user)
+            self.save_data() # Save updated user data to the pickle file
+            return new_user
+
+    def get_user(self, user_id):
+        """Retrieves a User object based on their ID.
+        Args:
+            user_id (int): The ID of the user to retrieve.
+        Returns:
+            User: The User object if found, otherwise None.
+        """
+        return self.users.get(user_id)
+
+    @metrics.timed()
+    def find_by_email(self, email):
+        """Retrieves a User object based on their email address, ignoring case.
+        Args:
+            email (str): The email address of the user to retrieve.
+        Returns:
+            User: The User object if found, otherwise None.
+        """
+        normalized = self.normalize_email(email)
+        if self.storage.native_indexes:
+            matches = self.users.select("email", normalized)
+            return matches[0] if matches else None
+        user_id = self.email_index.get(normalized)
+        return self.users.get(user_id) if user_id is not None else None
+
+    @metrics.timed()
+    def authenticate(self, email, password):
+        """Checks a user's login credentials.
+        Args:
+            email (str): The email address entered at login.
+            password (str): The password entered at login.
+        Returns:
+            User: The matching User object if the credentials are valid, otherwise None.
+        """
+        user = self.find_by_email(email)
+        if user and user.get_password() == password:
+            return user
+        return None
+
+    @metrics.timed()
+    def update_user(self, user_id, name=None, email=None, password=None):
+        """Updates an existing user's information.
+        Args:
+            user_id (int): The ID of the user to update.
+            name (str, optional): New name. Defaults to None.
+            email (str, optional): New email. Defaults to None.
+            password (str, optional): New password. Defaults to None.
+        Returns:
+            bool: True if the user was updated successfully, False otherwise (including when the new email belongs to another user).
+        """
+        with self.transaction():
+            user = self.get_user(user_id)
+            if user:
+                if email:
+                    owner = self.find_by_email(email)
+                    if owner and owner.get_user_id() != user_id:
+                        return False
+                self._unindex_user(user)
+                user.update_profile(name, email, password)
+                self._index_user(user)
+                self.save_data() # Save updated user data
+                return True
+            return False
+
+    @metrics.timed()
+    def delete_user(self, user_id):
+        """Deletes a user account.
+        Args:
+            user_id (int): The ID of the user to delete.
+        Returns:
+            bool: True if the user was deleted successfully, False otherwise.
+        """
+        with self.transaction():
+            if user_id in self.users:
+                self._unindex_user(self.users[user_id])
+                del self.users[user_id]
+                self.save_data() # Save updated user data
+                return True
+            return False
+
+    def display_user_details(self, user_id):
+        """Retrieves and returns the details of a user.
+        Args:
+            user_id (int): The ID of the user.
+        Returns:
+            dict: A dictionary containing the user's details (user_id, name, email, balance), or None if the user is not found.
+        """
+        user = self.get_user(user_id)
+        if user:
+            return {"user_id": user.user_id, "name": user.name, "email": user.email, "balance": user.balance}
+        return None
+
+    def save_data(self):
+        """Saves the user account data to the storage backend.
+        Returns:
+            bool: True once the data has been saved.
+        Raises:
+            StorageError: If the data could not be saved.
+        """
+        return self.storage.save_users(self.users, self.next_user_id)
+
+    @metrics.timed()
+    def load_data(self):
+        """Loads the user account data from the storage backend."""
+        self.users, self.next_user_id = self.storage.load_users() # The storage keeps the counter, so the IDs aren't scanned
+        self.email_index = {}
+        if not self.storage.native_indexes:
+            for user in self.users.values():
+                # If legacy data holds the same address in different cases, the oldest account keeps it
+                self.email_index.setdefault(self.normalize_email(user.get_email()), user.get_user_id())
+
+    @contextmanager
+    def transaction(self):
+        """Runs a change to the accounts as one step among processes sharing the data files, reloading the accounts
+        first if another process changed them. Unless the storage is shared, only its data lock is taken, and only when
+        it writes behind.
+        A DataManager replaces this with its own transaction, which also merges bookings and payments.
+        """
+        if not self.storage.shared:
+            with self.storage.data_lock if self.storage.write_behind is not None else nullcontext():
+                yield # The write-behind flusher must not pickle the accounts halfway through a change
+            return
+        with self.storage.locked():
+            if "users" in self.storage.poll_changes():
+                self.load_data()
+            yield
+
+    def _index_user(self, user):
+        """Adds a user's email address to the email index."""
+        if not self.storage.native_indexes:
+            self.email_index[self.normalize_email(user.get_email())] = user.get_user_id()
+
+    def _unindex_user(self, user):
+        """Removes a user's email address from the email index."""
+        normalized = self.normalize_email(user.get_email())
+        if self.email_index.get(normalized) == user.get_user_id():
+            del self.email_index[normalized]
+
+class Ticket:
+    """Represents a ticket for a race event."""
+    __slots__ = ('ticket_id', 'name', 'price', 'validity', 'features', 'discount_available', 'capacity', 'min_quantity')
+    def __init__(self, ticket_id, name, price, validity=None, features=None, discount_available=True, capacity=None, min_quantity=1):
+        """Initializes a new Ticket object.
+        Args:
+            ticket_id (int): Unique identifier for the ticket type.
+            name (str): Name of the ticket type (e.g., "General Admission", "VIP").
+            price (float): Price of the ticket.
+            validity (str, optional): Duration or validity period of the ticket. Defaults to None.
+            features (str, optional): Special features or access granted by the ticket. Defaults to None.
+            discount_available (bool, optional): Indicates if a discount can be applied to this ticket type. Defaults to True.
+            capacity (int, optional): Maximum number of tickets of this type that can be sold, or None to be limited only
+                by the event capacity. Defaults to None.
+            min_quantity (int, optional): Fewest tickets of this type a booking may include, such as 5 for a group
+                ticket. Defaults to 1.
+        """
+        self.ticket_id = ticket_id
+        self.name = name
+        self.price = price
+        self.validity = validity
+        self.features = features
+        self.discount_available = discount_available
+        self.capacity = capacity
+        self.min_quantity = min_quantity
+
+    def get_ticket_id(self):
+        """Returns the ticket ID."""
+        return self.ticket_id
+
+    def get_name(self):
+        """Returns the name of the ticket."""
+        return self.name
+
+    def get_price(self):
+        """Returns the price of the ticket."""
+        return self.price
+
+    def get_validity(self):
+        """Returns the validity of the ticket."""
+        return self.validity
+
+    def get_features(self):
+        """Returns the features of the ticket."""
+        return self.features
+
+    def get_capacity(self):
+        """Returns the maximum number of tickets of this type that can be sold, or None if unlimited."""
+        return self.capacity
+
+    def get_min_quantity(self):
+        """Returns the fewest tickets of this type a booking may include."""
+        return self.min_quantity
+
+    def check_quantity(self, quantity):
+        """Checks that a booking may include a quantity of this ticket type.
+        Args:
+            quantity (int): The number of tickets of this type in the cart.
+        Raises:
+            ValueError: If the quantity is below the minimum for this ticket type.
+        """
+        if quantity < self.min_quantity:
+            raise ValueError(f"'{self.name}' tickets are sold in groups of at least {self.min_quantity}.")
+
+    def is_discount_available(self):
+        """Returns True if a discount is available for this ticket type, False otherwise."""
+        return self.discount_available
+
+    def set_discount_availability(self, available):
+        """Sets the discount availability for this ticket type.
+        Args:
+            available (bool): True if discount should be available, False otherwise.
+        """
+        self.discount_available = available
+
+    def __setstate__(self, state):
+        """Restores a pickled ticket, defaulting fields that older versions didn't store."""
+        state = dict(state)
+        state.setdefault('capacity', None)
+        state.setdefault('min_quantity', 1)
+        restore_slots(self, state)
+
+    def __getstate__(self):
+        """Returns the state to pickle."""
+        return slot_state(self)
+
+class RaceEvent:
+    """Represents a race event with its details and available tickets."""
+    __slots__ = ('event_id', 'name', 'date', 'location', 'capacity', 'tickets', '_lock', 'seats_sold', 'tickets_sold', '__weakref__')
+    def __init__(self, event_id, name, date, location, capacity):
+        """Initializes a new RaceEvent object.
+        Args:
+            event_id (int): Unique identifier for the race event.
+            name (str): Name of the race event (e.g., "Grand National").
+            date (str): Date of the race event.
+            location (str): Location of the race event (e.g., "Aintree Racecourse").
+            capacity (int): Maximum capacity of attendees for the event.
+        """
+        self.event_id = event_id
+        self.name = name
+        self.date = date
+        self.location = location
+        self.capacity = capacity
+        self.tickets = {} # Dictionary to hold Ticket objects available for this event, with ticket name as keys
+        self.reset_sales()
+
+    def get_event_id(self):
+        """Returns the event ID."""
+        return self.event_id
+
+    def get_name(self):
+        """Returns the name of the event."""
+        return self.name
+
+    def get_date(self):
+        """Returns the date of the event."""
+        return self.date
+
+    def get_location(self):
+        """Returns the location of the event."""
+        return self.location
+
+    def get_capacity(self):
+        """Returns the capacity of the event."""
+        return self.capacity
+
+    def add_ticket(self, ticket):
+        """Adds a ticket type to the event's available tickets.
+        Args:
+            ticket (Ticket): The Ticket object to add.
+        Raises:
+            ValueError: If a ticket type with the same name already exists for this event.
+        """
+        if ticket.get_name() not in self.tickets:
+            self.tickets[ticket.get_name()] = ticket
+        else:
+            raise ValueError(f"Ticket type '{ticket.get_name()}' already exists for this event.")
+
+    def get_ticket(self, ticket_name):
+        """Retrieves a Ticket object for this event based on its name.
+        Args:
+            ticket_name (str): The name of the ticket type.
+        Returns:
+            Ticket: The Ticket object if found, otherwise None.
+        """
+        return self.tickets.get(ticket_name)
+
+    def get_available_tickets(self):
+        """Returns a list of all available Ticket objects for this event."""
+        return list(self.tickets.values())
+
+    def get_availability(self):
+        """Returns the current availability (remaining capacity) for the event.
+        Returns:
+            int: The number of seats not yet sold or reserved.
+        """
+        return self.capacity - self.seats_sold
+
+    def get_ticket_availability(self, ticket_name):
+        """Returns the number of tickets of a type that can still be sold.
+        Args:
+            ticket_name (str): The name of the ticket type.
+        Returns:
+            int: The number of tickets left, limited by both the ticket quota and the event capacity.
+        """
+        ticket = self.get_ticket(ticket_name)
+        if not ticket:
+            return 0
+        available = self.get_availability()
+        if ticket.get_capacity() is not None:
+            available = min(available, ticket.get_capacity() - self.tickets_sold.get(ticket_name, 0))
+        return max(available, 0)
+
+    def get_seats_sold(self, ticket_name=None):
+        """Returns the number of seats sold or reserved.
+        Args:
+            ticket_name (str, optional): Count only this ticket type. Defaults to None, counting every type.
+        """
+        if ticket_name is None:
+            return self.seats_sold
+        return self.tickets_sold.get(ticket_name, 0)
+
+    def reserve(self, selected_tickets):
+        """Atomically reserves seats for a booking. Either every ticket is reserved or none are.
+        Args:
+            selected_tickets (dict): A dictionary of ticket names and their quantities.
+        Raises:
+            ValueError: If a ticket type doesn't exist, is below its minimum quantity, or there isn't enough capacity left.
+        """
+        with self._lock:
+            for ticket_name, quantity in selected_tickets.items():
+                ticket = self.get_ticket(ticket_name)
+                if not ticket:
+                    raise ValueError(f"Ticket type '{ticket_name}' does not exist for {self.name}.")
+                ticket.check_quantity(quantity)
+                if quantity > self.get_ticket_availability(ticket_name):
+                    raise ValueError(f"Only {self.get_ticket_availability(ticket_name)} '{ticket_name}' tickets left for {self.name}.")
+            requested = sum(selected_tickets.values())
+            if requested > self.get_availability():
+                raise ValueError(f"Only {self.get_availability()} seats left for {self.name}.")
+            for ticket_name, quantity in selected_tickets.items():
+                self.record_sale(ticket_name, quantity)
+
+    def release(self, selected_tickets):
+        """Returns previously reserved seats to the event's inventory.
+        Args:
+            selected_tickets (dict): A dictionary of ticket names and their quantities.
+        """
+        with self._lock:
+            for ticket_name, quantity in selected_tickets.items():
+                self.record_sale(ticket_name, -quantity)
+
+    def record_sale(self, ticket_name, quantity):
+        """Adds sold seats to the counters without checking capacity. Used when rebuilding them from existing bookings.
+        Args:
+            ticket_name (str): The name of the ticket type.
+            quantity (int): The number of seats sold (negative to return seats).
+        """
+        self.seats_sold += quantity
+        self.tickets_sold[ticket_name] = self.tickets_sold.get(ticket_name, 0) + quantity
+
+    def reset_sales(self):
+        """Clears the sold seat counters before they are rebuilt from the stored bookings."""
+        self._lock = threading.Lock() # Guards the counters of this event only, so other events don't contend
+        self.seats_sold = 0 # Seats sold or reserved across every ticket type
+        self.tickets_sold = {} # Dictionary of seats sold or reserved, with ticket name as keys
+
+    def __getstate__(self):
+        """Returns the state to pickle. The lock and counters are left out since counters are rebuilt from bookings on load."""
+        return slot_state(self, skip=('_lock', 'seats_sold', 'tickets_sold'))
+
+    def __setstate__(self, state):
+        """Restores a pickled event with empty sold seat counters."""
+        restore_slots(self, state)
+        self.reset_sales()
+
+class BookingItem:
+    """Represents one line of a booking: a ticket type, the unit price it was sold at, and the quantity bought."""
+    __slots__ = ('ticket_id', 'name', 'unit_price', 'quantity', 'discount_available')
+    def __init__(self, ticket_id, name, unit_price, quantity=1, discount_available=False):
+        """Initializes a new BookingItem object.
+        Args:
+            ticket_id (int): ID of the ticket type booked.
+            name (str): Name of the ticket type at the time of booking.
+            unit_price (float): Price of a single ticket at the time of booking.
+            quantity (int, optional): Number of tickets booked. Defaults to 1.
+            discount_available (bool, optional): Whether the ticket type was flagged for discounts at the time of booking. Defaults to False.
+        """
+        self.ticket_id = ticket_id
+        self.name = name
+        self.unit_price = unit_price
+        self.quantity = quantity
+        self.discount_available = discount_available
+
+    def get_ticket_id(self):
+        """Returns the ID of the ticket type booked."""
+        return self.ticket_id
+
+    def get_name(self):
+        """Returns the name of the ticket type booked."""
+        return self.name
+
+    def get_unit_price(self):
+        """Returns the price of a single ticket."""
+        return self.unit_price
+
+    def get_quantity(self):
+        """Returns the number of tickets booked."""
+        return self.quantity
+
+    def get_subtotal(self):
+        """Returns the total price of this line."""
+        return self.unit_price * self.quantity
+
+    def is_discount_available(self):
+        """Returns True if the ticket type was flagged for discounts when it was booked."""
+        return self.discount_available
+
+    def __setstate__(self, state):
+        """Restores a pickled line item, defaulting fields that older versions didn't store."""
+        state = dict(state)
+        state.setdefault('discount_available', False)
+        restore_slots(self, state)
+
+    def __getstate__(self):
+        """Returns the state to pickle."""
+        return slot_state(self)
+
+class Booking:
+    """Represents a booking made by a user for a race event."""
+    __slots__ = ('booking_id', 'user_id', 'event_id', 'booking_date', 'status', 'items', 'total_amount', '__weakref__')
+    def __init__(self, booking_id, user_id, event_id, booking_date=None, status="Pending"):
+        """Initializes a new Booking object.
+        Args:
+            booking_id (int): Unique identifier for the booking.
+            user_id (int): ID of the user who made the booking.
+            event_id (int): ID of the event booked.
+            booking_date (str, optional): Date and time of the booking. Defaults to current timestamp.
+            status (str, optional): Current status of the booking (e.g., "Pending", "Confirmed", "Cancelled"). Defaults to "Pending".
+        """
+        self.booking_id = booking_id
+        self.user_id = user_id
+        self.event_id = event_id
+        self.booking_date = booking_date if booking_date else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.status = status
+        self.items = [] # List of BookingItem line items, one per ticket type and price
+        self.total_amount = 0.0 # Total amount for this booking
+
+    def get_booking_id(self):
+        """Returns the booking ID."""
+        return self.booking_id
+
+    def get_user_id(self):
+        """Returns the ID of the user who made the booking."""
+        return self.user_id
+
+    def get_event_id(self):
+        """Returns the ID of the event booked."""
+        return self.event_id
+
+    def get_booking_date(self):
+        """Returns the date and time of the booking."""
+        return self.booking_date
+
+    def get_status(self):
+        """Returns the current status of the booking."""
+        return self.status
+
+    def add_ticket(self, ticket, quantity=1, unit_price=None):
+        """Adds tickets to this booking and updates the total amount.
+        Tickets of the same type and price are merged into a single line item.
+        Args:
+            ticket (Ticket): The Ticket object to add.
+            quantity (int, optional): The number of tickets to add. Defaults to 1.
+            unit_price (float, optional): The price charged per ticket, after discounts. Defaults to None, charging the
+                ticket's price.
+        """
+        if unit_price is None:
+            unit_price = ticket.get_price()
+        for item in self.items:
+            if item.get_ticket_id() == ticket.get_ticket_id() and item.get_unit_price() == unit_price:
+                item.quantity += quantity
+                break
+        else:
+            self.items.append(BookingItem(ticket.get_ticket_id(), ticket.get_name(), unit_price, quantity, ticket.is_discount_available()))
+        self.total_amount += unit_price * quantity
+
+    def get_items(self):
+        """Returns a list of BookingItem line items in this booking."""
+        return self.items
+
+    def get_ticket_count(self):
+        """Returns the total number of tickets in this booking."""
+        return sum(item.get_quantity() for item in self.items)
+
+    def get_tickets(self):
+        """Returns a list of Ticket objects in this booking, one per seat, rebuilt from the line items."""
+        tickets = []
+        for item in self.items:
+            tickets.extend([Ticket(item.get_ticket_id(), item.get_name(), item.get_unit_price())] * item.get_quantity())
+        return tickets
+
+    def calculate_total(self):
+        """Calculates and returns the total amount for this booking."""
+        self.total_amount = sum(item.get_subtotal() for item in self.items)
+        return self.total_amount
+
+    def __setstate__(self, state):
+        """Restores a pickled booking, converting the legacy layout of one Ticket object per seat into line items."""
+        state = dict(state)
+        tickets = state.pop('tickets', None)
+        restore_slots(self, state)
+        if tickets is not None:
+            self.items = []
+            self.total_amount = 0.0
+            for ticket in tickets:
+                self.add_ticket(ticket)
+
+    def __getstate__(self):
+        """Returns the state to pickle."""
+        return slot_state(self)
+
+class Payment:
+    """Represents a payment made for a booking."""
+    __slots__ = ('payment_id', 'booking_id', 'amount', 'payment_date', 'method', '__weakref__')
+    def __init__(self, payment_id, booking_id, amount, payment_date=None, method="Credit Card"):
+        """Initializes a new Payment object.
+        Args:
+            payment_id (int): Unique identifier for the payment.
+            booking_id (int): ID of the booking this payment is for.
+            amount (float): Amount paid.
+            payment_date (str, optional): Date and time of the payment. Defaults to current timestamp.
+            method (str, optional): Payment method used (e.g., "Credit Card", "Debit Card"). Defaults to "Credit Card".
+        """
+        self.payment_id = payment_id
+        self.booking_id = booking_id
+        self.amount = amount
+        self.payment_date = payment_date if payment_date else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.method = method
+
+    def get_payment_id(self):
+        """Returns the payment ID."""
+        return self.payment_id
+
+    def get_booking_id(self):
+        """Returns the ID of the booking this payment is for."""
+        return self.booking_id
+
+    def get_amount(self):
+        """Returns the payment amount."""
+        return self.amount
+
+    def get_payment_date(self):
+        """Returns the date and time of the payment."""
+        return self.payment_date
+
+    def get_method(self):
+        """Returns the payment method used."""
+        return self.method
+
+    def process_payment(self):
+        """Simulates processing a payment.
+        In a real system, this would involve interaction with a payment gateway.
+        Returns:
+            bool: True to simulate successful payment.
+        """
+        return True # Simulate successful payment
+
+    def __getstate__(self):
+        """Returns the state to pickle."""
+        return slot_state(self)
+
+    def __setstate__(self, state):
+        """Restores a pickled payment."""
+        restore_slots(self, state)
+
+class StringTable:
+    """Interns repeated strings such as ticket names, statuses and payment methods as small integer codes."""
+    def __init__(self, values=()):
+        """Initializes the StringTable.
+        Args:
+            values (iterable, optional): Strings to assign the first codes to, in order. Defaults to ().
+        """
+        self.values = [] # List of strings, indexed by code
+        self.codes = {} # Dictionary mapping each string to its code
+        for value in values:
+            self.encode(value)
+
+    def encode(self, value):
+        """Returns the code of a string, assigning the next free code to strings not seen before."""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def decode(self, code):
+        """Returns the string stored under a code."""
+        return self.values[code]
+
+class ColumnStore(MutableMapping, abc.ABC):
+    """Dictionary-like store keeping records as parallel arrays (one per field) instead of one object per record.
+    IDs are found by binary search while they are inserted in increasing order, as DataManager allocates them,
+    and through a dictionary index otherwise. Lookups return lightweight view objects with the model's getters.
+    Subclasses define the columns and how records are written to and read from them.
+    """
+    DATE_WIDTH = 19 # Length of a "YYYY-MM-DD HH:MM:SS" timestamp, stored as fixed-width ASCII
+
+    def __init__(self, records=None):
+        """Initializes the ColumnStore.
+        Args:
+            records (dict, optional): Records to copy into the store, keyed by ID. Defaults to None.
+        """
+        self.ids = array('q') # ID of each row
+        self.live = bytearray() # 1 for rows holding a record, 0 for deleted rows
+        self.dates = bytearray() # Fixed-width timestamp of each row
+        self.odd_dates = {} # Timestamps that don't fit the fixed width, keyed by row
+        self.deleted = 0 # Number of deleted rows
+        self.index = None # Dictionary mapping IDs to rows, only built once IDs stop arriving in increasing order
+        self.snapshot = None # SnapshotFile the columns are mapped from, until the store is first changed
+        self._init_columns()
+        if records:
+            self.update(records)
+
+    @abc.abstractmethod
+    def _init_columns(self):
+        """Creates the empty record columns."""
+
+    @abc.abstractmethod
+    def _append_row(self, record):
+        """Appends a record's fields to the record columns."""
+
+    @abc.abstractmethod
+    def _write_row(self, row, record):
+        """Overwrites the record columns of an existing row."""
+
+    @abc.abstractmethod
+    def _view(self, row):
+        """Returns the view object for a row."""
+
+    @abc.abstractmethod
+    def _date_of(self, record):
+        """Returns the timestamp of a record."""
+
+    def group_ids(self, column):
+        """Groups the IDs of the stored records by the values of a column, reading the columns directly.
+        Args:
+            column (str): Name of the column, such as "user_ids".
+        Returns:
+            dict: A dictionary mapping each value to the IDs of the records with it, in row order.
+        """
+        groups = {}
+        live = self.live
+        for row, (key, value) in enumerate(zip(self.ids, getattr(self, column))):
+            if live[row]:
+                group = groups.get(value)
+                if group is None:
+                    group = groups[value] = []
+                group.append(key)
+        return groups
+
+    def _row(self, key):
+        """Returns the row holding a record, or None if the ID isn't stored."""
+        if self.index is not None:
+            return self.index.get(key)
+        row = bisect_left(self.ids, key)
+        if row < len(self.ids) and self.ids[row] == key and self.live[row]:
+            return row
+        return None
+
+    def _encode_date(self, row, date):
+        """Returns the fixed-width bytes stored for a timestamp, keeping timestamps of any other shape aside."""
+        if isinstance(date, str) and len(date) == self.DATE_WIDTH and date.isascii():
+            self.odd_dates.pop(row, None)
+            return date.encode('ascii')
+        self.odd_dates[row] = date
+        return bytes(self.DATE_WIDTH)
+
+    def get_date(self, row):
+        """Returns the timestamp stored for a row."""
+        if row in self.odd_dates:
+            return self.odd_dates[row]
+        offset = row * self.DATE_WIDTH
+        return str(self.dates[offset:offset + self.DATE_WIDTH], 'ascii')
+
+    def __getitem__(self, key):
+        row = self._row(key)
+        if row is None:
+            raise KeyError(key)
+        return self._view(row)
+
+    def __setitem__(self, key, record):
+        if self.snapshot is not None:
+            self._detach()
+        row = self._row(key)
+        if row is not None:
+            self._write_row(row, record)
+            offset = row * self.DATE_WIDTH
+            self.dates[offset:offset + self.DATE_WIDTH] = self._encode_date(row, self._date_of(record))
+            return
+        row = len(self.ids)
+        if self.index is None and self.ids and key <= self.ids[-1]:
+            self.index = {row_id: live_row for live_row, row_id in enumerate(self.ids) if self.live[live_row]}
+        self.ids.append(key)
+        self.live.append(1)
+        self.dates += self._encode_date(row, self._date_of(record))
+        self._append_row(record)
+        if self.index is not None:
+            self.index[key] = row
+
+    def __delitem__(self, key):
+        if self.snapshot is not None:
+            self._detach()
+        row = self._row(key)
+        if row is None:
+            raise KeyError(key)
+        self.live[row] = 0
+        self.deleted += 1
+        if self.index is not None:
+            del self.index[key]
+
+    def __contains__(self, key):
+        return self._row(key) is not None
+
+    def __iter__(self):
+        live = self.live
+        for row, key in enumerate(self.ids):
+            if live[row]:
+                yield key
+
+    def __len__(self):
+        return len(self.ids) - self.deleted
+
+    def values(self):
+        """Yields the view of every record, in row order."""
+        live = self.live
+        for row in range(len(self.ids)):
+            if live[row]:
+                yield self._view(row)
+
+    def items(self):
+        """Yields (ID, view) pairs for every record, in row order."""
+        live = self.live
+        for row, key in enumerate(self.ids):
+            if live[row]:
+                yield key, self._view(row)
+
+    def max_key(self):
+        """Returns the highest ID stored, or 0 if the store is empty."""
+        if self.index is not None:
+            return max(self.index, default=0)
+        for row in range(len(self.ids) - 1, -1, -1):
+            if self.live[row]:
+                return self.ids[row]
+        return 0
+
+    def __getstate__(self):
+        """Returns the state to pickle. The ID index is rebuilt on load."""
+        if self.snapshot is not None:
+            self._detach()
+        state = self.__dict__.copy()
+        state['index'] = None
+        state['unordered'] = self.index is not None
+        return state
+
+    def __setstate__(self, state):
+        """Restores a pickled store, rebuilding the ID index if IDs were not stored in increasing order."""
+        unordered = state.pop('unordered', False)
+        self.__dict__.update(state)
+        self.__dict__.setdefault('snapshot', None) # Stores pickled before snapshot files existed
+        if unordered:
+            self.index = {key: row for row, key in enumerate(self.ids) if self.live[row]}
+
+    def to_snapshot(self, f, kind, next_id):
+        """Writes the store to a binary snapshot file, each column as one section. Deleted rows are left out.
+        Args:
+            f (file): Binary file open for writing.
+            kind (str): The kind of records, "bookings" or "payments".
+            next_id (int): The next ID to allocate, stored in the header.
+        """
+        store = self
+        if self.deleted or self.index is not None: # Write the live records only, in increasing ID order
+            store = type(self)()
+            store.update(sorted(self.items(), key=lambda pair: pair[0]))
+        columns = [(name, value.typecode if isinstance(value, array) else 'B', value) for name, value in vars(store).items()
+                   if isinstance(value, (array, bytearray))]
+        columns += [(name, value.format, value) for name, value in vars(store).items() if isinstance(value, memoryview)]
+        strings = [(name, value.values) for name, value in vars(store).items() if isinstance(value, StringTable)]
+        # Timestamps that don't fit the fixed width, kept as strings
+        odd_dates = StringTable()
+        columns.append(("odd_rows", 'q', array('q', store.odd_dates)))
+        columns.append(("odd_date_codes", 'I', array('I', (NULL_STRING if date is None else odd_dates.encode(str(date))
+                                                           for date in store.odd_dates.values()))))
+        strings.append(("odd_dates", odd_dates.values))
+        write_snapshot(f, kind, next_id, len(store.ids), columns, strings)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Returns a store whose columns are read straight from a snapshot file's memory mapping. Nothing is copied
+        until the store is first changed, when the columns are copied into memory (see _detach).
+        Args:
+            snapshot (SnapshotFile): The open snapshot file. The store takes it over and closes it.
+        Raises:
+            ValueError: If the file lacks a column of the store, or holds it with another type.
+        """
+        store = cls()
+        for name, value in list(vars(store).items()):
+            if isinstance(value, (array, bytearray)):
+                setattr(store, name, snapshot.column(name, value.typecode if isinstance(value, array) else 'B'))
+            elif isinstance(value, StringTable):
+                setattr(store, name, StringTable(snapshot.strings(name)))
+        odd_dates = snapshot.strings("odd_dates")
+        store.odd_dates = {row: None if code == NULL_STRING else odd_dates[code]
+                           for row, code in zip(snapshot.column("odd_rows", 'q'), snapshot.column("odd_date_codes", 'I'))}
+        store.deleted = store.live.tobytes().count(0)
+        if not snapshot.flags & SnapshotFile.SORTED:
+            store.index = {key: row for row, key in enumerate(store.ids) if store.live[row]}
+        store.snapshot = snapshot
+        return store
+
+    def _detach(self):
+        """Copies the columns mapped from a snapshot file into memory, so they can be changed, and releases the file."""
+        template = type(self)() # Empty columns of the right types
+        for name, value in list(vars(self).items()):
+            if isinstance(value, memoryview):
+                column = getattr(template, name)
+                if isinstance(column, array):
+                    column.frombytes(value.cast('B'))
+                else:
+                    column += value
+                setattr(self, name, column)
+        self.snapshot = None # The file is unmapped once no reader holds a view of it any more
+
+class BookingView:
+    """Read-only view of a booking held in a BookingStore, with the same getters as Booking."""
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row):
+        """Initializes the BookingView.
+        Args:
+            store (BookingStore): The store holding the booking.
+            row (int): The row of the booking in the store.
+        """
+        self.store = store
+        self.row = row
+
+    def get_booking_id(self):
+        """Returns the booking ID."""
+        return self.store.ids[self.row]
+
+    def get_user_id(self):
+        """Returns the ID of the user who made the booking."""
+        return self.store.user_ids[self.row]
+
+    def get_event_id(self):
+        """Returns the ID of the event booked."""
+        return self.store.event_ids[self.row]
+
+    def get_booking_date(self):
+        """Returns the date and time of the booking."""
+        return self.store.get_date(self.row)
+
+    def get_status(self):
+        """Returns the current status of the booking."""
+        return self.store.statuses.decode(self.store.status_codes[self.row])
+
+    def get_items(self):
+        """Returns a list of BookingItem line items in this booking, rebuilt from the store."""
+        return self.store.get_items(self.row)
+
+    def get_ticket_count(self):
+        """Returns the total number of tickets in this booking."""
+        start = self.store.item_starts[self.row]
+        return sum(self.store.item_quantities[start:start + self.store.item_counts[self.row]])
+
+    def get_tickets(self):
+        """Returns a list of Ticket objects in this booking, one per seat, rebuilt from the line items."""
+        return self.to_booking().get_tickets()
+
+    def calculate_total(self):
+        """Returns the total amount for this booking."""
+        return self.store.totals[self.row]
+
+    def to_booking(self):
+        """Returns a standalone Booking object with the same data."""
+        booking = Booking(self.get_booking_id(), self.get_user_id(), self.get_event_id(), self.get_booking_date(), self.get_status())
+        booking.items = self.get_items()
+        booking.total_amount = self.calculate_total()
+        return booking
+
+    def __reduce__(self):
+        """Pickles the view as the standalone Booking it represents."""
+        booking = self.to_booking()
+        return Booking, (booking.booking_id, booking.user_id, booking.event_id, booking.booking_date, booking.status), booking.__getstate__()
+
+class BookingStore(ColumnStore):
+    """Struct-of-arrays store for bookings. Booking line items are kept in their own columns, contiguous per booking."""
+    def _init_columns(self):
+        """Creates the empty booking and line item columns."""
+        self.user_ids = array('q') # User ID of each booking
+        self.event_ids = array('q') # Event ID of each booking
+        self.statuses = StringTable(("Pending", "Confirmed", "Cancelled")) # Interned booking statuses
+        self.status_codes = array('B') # Status code of each booking
+        self.totals = array('d') # Total amount of each booking
+        self.item_starts = array('q') # Row of each booking's first line item in the item columns
+        self.item_counts = array('H') # Number of line items in each booking
+        self.item_names = StringTable() # Interned ticket type names
+        self.item_ticket_ids = array('q') # Ticket type ID of each line item
+        self.item_name_codes = array('I') # Ticket type name code of each line item
+        self.item_prices = array('d') # Unit price of each line item
+        self.item_quantities = array('i') # Quantity of each line item
+        self.item_discounts = bytearray() # 1 if the line item's ticket type was flagged for discounts, else 0
+
+    def _append_items(self, items):
+        """Appends line items to the item columns and returns the row of the first one."""
+        start = len(self.item_ticket_ids)
+        for item in items:
+            self.item_ticket_ids.append(item.get_ticket_id())
+            self.item_name_codes.append(self.item_names.encode(item.get_name()))
+            self.item_prices.append(item.get_unit_price())
+            self.item_quantities.append(item.get_quantity())
+            self.item_discounts.append(1 if item.is_discount_available() else 0)
+        return start
+
+    def _append_row(self, booking):
+        """Appends a booking's fields and line items to the columns."""
+        items = booking.get_items()
+        self.user_ids.append(booking.get_user_id())
+        self.event_ids.append(booking.get_event_id())
+        self.status_codes.append(self.statuses.encode(booking.get_status()))
+        self.totals.append(booking.calculate_total())
+        self.item_starts.append(self._append_items(items))
+        self.item_counts.append(len(items))
+
+    def _write_row(self, row, booking):
+        """Overwrites a stored booking. Its line items are rewritten in place if their number didn't change."""
+        items = booking.get_items()
+        self.user_ids[row] = booking.get_user_id()
+        self.event_ids[row] = booking.get_event_id()
+        self.status_codes[row] = self.statuses.encode(booking.get_status())
+        self.totals[row] = booking.calculate_total()
+        if len(items) == self.item_counts[row]:
+            start = self.item_starts[row]
+            for offset, item in enumerate(items, start=start):
+                self.item_ticket_ids[offset] = item.get_ticket_id()
+                self.item_name_codes[offset] = self.item_names.encode(item.get_name())
+                self.item_prices[offset] = item.get_unit_price()
+                self.item_quantities[offset] = item.get_quantity()
+                self.item_discounts[offset] = 1 if item.is_discount_available() else 0
+        else:
+            self.item_starts[row] = self._append_items(items)
+            self.item_counts[row] = len(items)
+
+    def get_items(self, row):
+        """Rebuilds the BookingItem line items of a row."""
+        start = self.item_starts[row]
+        return [BookingItem(self.item_ticket_ids[offset], self.item_names.decode(self.item_name_codes[offset]),
+                            self.item_prices[offset], self.item_quantities[offset], bool(self.item_discounts[offset]))
+                for offset in range(start, start + self.item_counts[row])]
+
+    def _view(self, row):
+        """Returns the BookingView for a row."""
+        return BookingView(self, row)
+
+    def sales_totals(self):
+        """Adds up the line items of the stored bookings that aren't cancelled, reading the columns directly instead of
+        building a view and line items per booking.
+        Returns:
+            dict: The totals in the layout of DataManager.get_sales_totals, in the order the ticket types first appear.
+        """
+        cancelled = self.statuses.codes.get("Cancelled")
+        live, status_codes, event_ids = self.live, self.status_codes, self.event_ids
+        starts, counts = self.item_starts, self.item_counts
+        name_codes, prices, quantities, discounts = self.item_name_codes, self.item_prices, self.item_quantities, self.item_discounts
+        totals = {} # Dictionary mapping (event ID, ticket name code) to [units, revenue, discounted units]
+        for row in range(len(self.ids)):
+            if not live[row] or status_codes[row] == cancelled:
+                continue
+            event_id = event_ids[row]
+            start = starts[row]
+            for offset in range(start, start + counts[row]):
+                entry = totals.get((event_id, name_codes[offset]))
+                if entry is None:
+                    entry = totals[(event_id, name_codes[offset])] = [0, 0.0, 0]
+                quantity = quantities[offset]
+                entry[0] += quantity
+                entry[1] += prices[offset] * quantity
+                if discounts[offset]:
+                    entry[2] += quantity
+        sales = {}
+        for (event_id, code), (units, revenue, discounted_units) in totals.items():
+            sales.setdefault(event_id, {})[self.item_names.decode(code)] = {"units": units, "revenue": revenue,
+                                                                            "discounted_units": discounted_units}
+        return sales
+
+    def _date_of(self, booking):
+        """Returns the booking date."""
+        return booking.get_booking_date()
+
+class PaymentView:
+    """Read-only view of a payment held in a PaymentStore, with the same getters as Payment."""
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row):
+        """Initializes the PaymentView.
+        Args:
+            store (PaymentStore): The store holding the payment.
+            row (int): The row of the payment in the store.
+        """
+        self.store = store
+        self.row = row
+
+    def get_payment_id(self):
+        """Returns the payment ID."""
+        return self.store.ids[self.row]
+
+    def get_booking_id(self):
+        """Returns the ID of the booking this payment is for."""
+        return self.store.booking_ids[self.row]
+
+    def get_amount(self):
+        """Returns the payment amount."""
+        return self.store.amounts[self.row]
+
+    def get_payment_date(self):
+        """Returns the date and time of the payment."""
+        return self.store.get_date(self.row)
+
+    def get_method(self):
+        """Returns the payment method used."""
+        return self.store.methods.decode(self.store.method_codes[self.row])
+
+    def process_payment(self):
+        """Simulates processing a payment. See Payment.process_payment."""
+        return True
+
+    def to_payment(self):
+        """Returns a standalone Payment object with the same data."""
+        return Payment(self.get_payment_id(), self.get_booking_id(), self.get_amount(), self.get_payment_date(), self.get_method())
+
+    def __reduce__(self):
+        """Pickles the view as the standalone Payment it represents."""
+        return Payment, (self.get_payment_id(), self.get_booking_id(), self.get_amount(), self.get_payment_date(), self.get_method())
+
+class PaymentStore(ColumnStore):
+    """Struct-of-arrays store for payments."""
+    def _init_columns(self):
+        """Creates the empty payment columns."""
+        self.booking_ids = array('q') # Booking ID of each payment
+        self.amounts = array('d') # Amount of each payment
+        self.methods = StringTable() # Interned payment methods
+        self.method_codes = array('H') # Payment method code of each payment
+
+    def _append_row(self, payment):
+        """Appends a payment's fields to the columns."""
+        self.booking_ids.append(payment.get_booking_id())
+        self.amounts.append(payment.get_amount())
+        self.method_codes.append(self.methods.encode(payment.get_method()))
+
+    def _write_row(self, row, payment):
+        """Overwrites a stored payment."""
+        self.booking_ids[row] = payment.get_booking_id()
+        self.amounts[row] = payment.get_amount()
+        self.method_codes[row] = self.methods.encode(payment.get_method())
+
+    def _view(self, row):
+        """Returns the PaymentView for a row."""
+        return PaymentView(self, row)
+
+    def _date_of(self, payment):
+        """Returns the payment date."""
+        return payment.get_payment_date()
+
+SNAPSHOT_MAGIC = b"TKTSNAP\x00" # First bytes of every binary snapshot file
+SNAPSHOT_VERSION = 1 # Layout version written to new snapshot files; files of a newer version are refused
+SNAPSHOT_KINDS = {"users": 1, "events": 2, "bookings": 3, "payments": 4} # Kind of records, stored in the header
+NULL_STRING = 0xFFFFFFFF # String code stored for None
+
+class SnapshotFile:
+    """Read-only binary snapshot file, accessed through a memory mapping.
+    A snapshot holds one collection as named sections: columns of fixed-width values, one value per record, and
+    string tables the columns refer to by code. The header holds the layout version, the kind of records, their
+    number, the next ID to allocate and the offset of every section, so a section is found without reading the
+    others. Columns are handed out as memoryviews over the mapping: reading a value copies only that value.
+    """
+    HEADER = struct.Struct('<8sHHIqqI4x') # Magic, version, kind, flags, record count, next ID, number of sections
+    SECTION = struct.Struct('<24s1s7xqq') # Name, type code ('s' for a string table), offset and length in bytes
+    SORTED = 1 # Header flag set when the records are stored in increasing ID order
+    LITTLE_ENDIAN = 2 # Header flag set when the columns were written in little-endian byte order
+
+    def __init__(self, f, kind):
+        """Maps a snapshot file and reads its header.
+        Args:
+            f (file): The snapshot file, open for binary reading. It can be closed once this returns.
+            kind (str): The kind of records expected, a key of SNAPSHOT_KINDS.
+        Raises:
+            ValueError: If the file isn't a snapshot of that kind, or was written by a newer version or on a machine
+                with another byte order.
+        """
+        self.filename = f.name
+        if os.fstat(f.fileno()).st_size < self.HEADER.size:
+            raise ValueError("not a binary snapshot file")
+        self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.views = [memoryview(self.mapping)] # Every memoryview handed out, released on close
+        try:
+            magic, version, kind_code, self.flags, self.count, self.next_id, section_count = self.HEADER.unpack_from(self.views[0])
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError("not a binary snapshot file")
+            if version > SNAPSHOT_VERSION:
+                raise ValueError(f"snapshot version {version} is newer than this version of the application supports")
+            if kind_code != SNAPSHOT_KINDS[kind]:
+                raise ValueError(f"the file doesn't hold {kind}")
+            if bool(self.flags & self.LITTLE_ENDIAN) != (sys.byteorder == "little"):
+                raise ValueError("the file was written on a machine with another byte order")
+            self.sections = {} # Dictionary mapping section names to their (type code, offset, length)
+            if self.HEADER.size + section_count * self.SECTION.size > len(self.mapping):
+                raise ValueError("the file is truncated")
+            for index in range(section_count):
+                name, typecode, offset, length = self.SECTION.unpack_from(self.views[0], self.HEADER.size + index * self.SECTION.size)
+                if offset + length > len(self.mapping):
+                    raise ValueError("the file is truncated")
+                self.sections[name.rstrip(b"\0").decode('ascii')] = (typecode.decode('ascii'), offset, length)
+        except BaseException:
+            self.close()
+            raise
+
+    def _section(self, name, typecode):
+        """Returns the memoryview of a section's bytes, checking its type."""
+        if name not in self.sections:
+            raise ValueError(f"the file has no '{name}' section")
+        stored, offset, length = self.sections[name]
+        if stored != typecode:
+            raise ValueError(f"section '{name}' holds '{stored}' values, expected '{typecode}'")
+        view = self.views[0][offset:offset + length]
+        self.views.append(view)
+        return view
+
+    def column(self, name, typecode):
+        """Returns a column as a memoryview of values of an array type code, such as 'q' or 'd'."""
+        view = self._section(name, typecode).cast(typecode)
+        self.views.append(view)
+        return view
+
+    def strings(self, name):
+        """Decodes a string table into a list of strings, indexed by code.
+        Raises:
+            ValueError: If the table's count or offsets point outside the section, or a string isn't valid UTF-8.
+        """
+        view = self._section(name, 's')
+        count = struct.unpack_from('<q', view)[0] if len(view) >= 8 else -1
+        if not 0 <= count <= len(view) // 8 - 2: # The count, then count + 1 offsets
+            raise ValueError("the file is truncated")
+        offsets = view[8:8 * (count + 2)].cast('q')
+        text = view[8 * (count + 2):]
+        try:
+            if offsets[0] != 0 or offsets[count] > len(text):
+                raise ValueError("the file is truncated")
+            strings = []
+            for index in range(count):
+                start, end = offsets[index], offsets[index + 1]
+                if start > end:
+                    raise ValueError("the file is corrupt")
+                strings.append(str(text[start:end], 'utf-8'))
+            return strings
+        except UnicodeDecodeError:
+            raise ValueError("the file is corrupt") from None
+        finally:
+            offsets.release()
+            text.release()
+
+    def close(self):
+        """Releases the mapping. If a memoryview handed out is still referenced elsewhere, the mapping stays open
+        until that view is gone."""
+        for view in reversed(self.views):
+            view.release()
+        try:
+            self.mapping.close()
+        except BufferError:
+            pass
+
+def write_snapshot(f, kind, next_id, count, columns, strings=(), sorted_ids=True):
+    """Writes a binary snapshot file. See SnapshotFile for the layout.
+    Args:
+        f (file): Binary file open for writing.
+        kind (str): The kind of records, a key of SNAPSHOT_KINDS.
+        next_id (int): The next ID to allocate.
+        count (int): The number of records.
+        columns (list): A (name, type code, values) tuple per column, values being an array, bytearray or memoryview.
+        strings (list, optional): A (name, list of strings) tuple per string table. Defaults to ().
+        sorted_ids (bool, optional): Whether the records are in increasing ID order. Defaults to True.
+    """
+    sections = [] # (name, type code, list of byte chunks, length) per section
+    for name, typecode, values in columns:
+        values = memoryview(values)
+        sections.append((name, typecode, [values], values.nbytes))
+    for name, values in strings:
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = array('q', itertools.accumulate((len(value) for value in encoded), initial=0))
+        chunks = [struct.pack('<q', len(encoded)), offsets, b"".join(encoded)]
+        sections.append((name, 's', chunks, sum(memoryview(chunk).nbytes for chunk in chunks)))
+    flags = (SnapshotFile.SORTED if sorted_ids else 0) | (SnapshotFile.LITTLE_ENDIAN if sys.byteorder == "little" else 0)
+    header = [SnapshotFile.HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, SNAPSHOT_KINDS[kind], flags, count, next_id, len(sections))]
+    offset = SnapshotFile.HEADER.size + SnapshotFile.SECTION.size * len(sections)
+    for name, typecode, _, length in sections:
+        offset += -offset % 8 # Sections start on 8-byte boundaries, so every column can be cast in place
+        header.append(SnapshotFile.SECTION.pack(name.encode('ascii'), typecode.encode('ascii'), offset, length))
+        offset += length
+    position = f.write(b"".join(header))
+    for _, _, chunks, length in sections:
+        position += f.write(bytes(-position % 8))
+        for chunk in chunks:
+            position += f.write(chunk)
+
+class Admin:
+    """Represents an administrator with privileges to view reports and modify system settings."""
+    def __init__(self, admin_id, name):
+        """Initializes a new Admin object.
+        Args:
+            admin_id (int): Unique identifier for the administrator.
+            name (str): Name of the administrator.
+        """
+        self.admin_id = admin_id
+        self.name = name
+        self.analytics = None # SalesAnalytics engine, created on the first analytics report
+
+    def get_admin_id(self):
+        """Returns the administrator ID."""
+        return self.admin_id
+
+    def get_name(self):
+        """Returns the administrator's name."""
+        return self.name
+
+    @metrics.timed()
+    def view_report(self, bookings):
+        """Generates a sales report based on the provided bookings. Cancelled bookings are left out, as in
+        DataManager.get_sales_report.
+        Args:
+            bookings (list): A list of Booking objects.
+        Returns:
+            dict: A dictionary where keys are event IDs and values are dictionaries of ticket names and their sales counts.
+        """
+        sales_report = {}
+        for booking in bookings:
+            if booking.get_status() == "Cancelled":
+                continue
+            event_id = booking.get_event_id()
+            for item in booking.get_items():
+                ticket_name = item.get_name()
+                if event_id not in sales_report:
+                    sales_report[event_id] = {}
+                sales_report[event_id][ticket_name] = sales_report[event_id].get(ticket_name, 0) + item.get_quantity()
+        return sales_report
+
+    @metrics.timed()
+    def view_sharded_report(self, storage, event_ids=None):
+        """Generates the sales report from a ShardedStorage one event shard at a time, so only one shard is in memory.
+        Cancelled bookings are left out, see view_report.
+        Args:
+            storage (ShardedStorage): The storage holding the booking shards.
+            event_ids (list, optional): The events to report on. Defaults to None, reporting on every event.
+        Returns:
+            dict: A dictionary where keys are event IDs and values are dictionaries of ticket names and their sales counts.
+        """
+        sales_report = {}
+        for event_id in storage.shard_ids("bookings") if event_ids is None else event_ids:
+            bookings, _ = storage.load_shard("bookings", event_id)
+            sales_report.update(self.view_report(bookings.values()))
+        return sales_report
+
+    @metrics.timed()
+    def view_sales_analytics(self, data_manager, start=None, end=None):
+        """Generates the full sales report with the columnar analytics engine (requires NumPy).
+        The engine is kept between calls so later reports only project bookings and payments made since the last one.
+        Args:
+            data_manager (DataManager): The DataManager holding the bookings and payments.
+            start (str, optional): Only include sales made on or after this date ("YYYY-MM-DD"). Defaults to None.
+            end (str, optional): Only include sales made before this date ("YYYY-MM-DD"). Defaults to None.
+        Returns:
+            dict: Units, revenue and discount-eligible units per event and ticket type, revenue per event and per day,
+                and payments per method. See SalesAnalytics.summary.
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        if self.analytics is None or self.analytics.data_manager is not data_manager:
+            from analytics import SalesAnalytics # Imported lazily so NumPy stays optional for the rest of the app
+            self.analytics = SalesAnalytics(data_manager)
+        return self.analytics.summary(start, end)
+
+    def modify_discount_availability(self, event, ticket_name, available):
+        """Modifies the discount availability for a specific ticket type of an event.
+        Args:
+            event (RaceEvent): The RaceEvent object.
+            ticket_name (str): The name of the ticket type.
+            available (bool): True to make the discount available, False otherwise.
+        Returns:
+            bool: True if the discount availability was modified successfully, False otherwise.
+        """
+        ticket = event.get_ticket(ticket_name)
+        if ticket:
+            ticket.set_discount_availability(available)
+            return True
+        return False
+
+class StorageError(Exception):
+    """Raised when stored data can't be read or written."""
+
+class ConflictError(StorageError):
+    """Raised when a file was changed by another process since this one last read it, so writing it would lose that change."""
+
+class FileLock:
+    """Advisory lock on a file, held by one process at a time among those sharing the data files.
+    Re-entrant: a thread already holding it can acquire it again. Other threads of the process wait for it too.
+    """
+    def __init__(self, filename):
+        """Initializes the FileLock. The lock file is created on first use.
+        Args:
+            filename (str): The filename of the lock file.
+        """
+        self.filename = filename
+        self.thread_lock = threading.RLock() # Orders the threads of this process
+        self.depth = 0 # Number of nested acquisitions by the owning thread
+        self.file = None # Open lock file while the lock is held
+
+    def acquire(self):
+        """Blocks until the lock is held by the calling thread."""
+        self.thread_lock.acquire()
+        if self.depth == 0:
+            try:
+                self.file = open(self.filename, 'a+b')
+                if fcntl:
+                    fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+                else:
+                    self.file.seek(0)
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+            except OSError as e:
+                if self.file:
+                    self.file.close()
+                    self.file = None
+                self.thread_lock.release()
+                raise StorageError(f"Could not lock {self.filename}: {e}") from e
+        self.depth += 1
+
+    def release(self):
+        """Releases one acquisition of the lock, unlocking the file once the outermost one is released."""
+        self.depth -= 1
+        if self.depth == 0:
+            if fcntl:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            else:
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+            self.file.close()
+            self.file = None
+        self.thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+class ModelUnpickler(pickle.Unpickler):
+    """Unpickler that resolves model classes to this module however the pickle was written.
+    Files saved while app.py ran as a script refer to "__main__", files saved by service.py refer to "app".
+    """
+    MODULE_ALIASES = ("__main__", "app")
+
+    def find_class(self, module, name):
+        if module in self.MODULE_ALIASES and isinstance(globals().get(name), type):
+            return globals()[name]
+        return super().find_class(module, name)
+
+def load_pickle(f):
+    """Reads one pickled object from a binary file with ModelUnpickler."""
+    return ModelUnpickler(f).load()
+
+class Journal:
+    """Append-only log of records written alongside a pickle snapshot file."""
+    def __init__(self, filename):
+        """Initializes the Journal.
+        Args:
+            filename (str): The filename of the log.
+        """
+        self.filename = filename
+        self.record_count = 0 # Number of records currently held in the log
+        self.offset = 0 # Position up to which this process has read or written the log
+
+    def append(self, key, record):
+        """Appends a single record to the end of the log.
+        Args:
+            key (int): The ID the record is stored under.
+            record (object): The object to store.
+        Returns:
+            int: The number of bytes written.
+        """
+        with open(self.filename, 'ab') as f:
+            start = f.tell()
+            pickle.dump((key, record), f)
+            self.offset = f.tell()
+        self.record_count += 1
+        return self.offset - start
+
+    def append_many(self, records, sync=False):
+        """Appends several records to the end of the log in a single write.
+        Args:
+            records (list): A list of (key, record) tuples.
+            sync (bool, optional): If True, waits until the records have reached the disk. Defaults to False.
+        Returns:
+            int: The number of bytes written.
+        """
+        buffer = io.BytesIO()
+        for key, record in records:
+            pickle.dump((key, record), buffer)
+        with open(self.filename, 'ab') as f:
+            f.write(buffer.getvalue())
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+            self.offset = f.tell()
+        self.record_count += len(records)
+        return buffer.getbuffer().nbytes
+
+    def replay(self):
+        """Reads back every record in the log, oldest first.
+        A record left incomplete by a crash mid-write is cut off so later appends start on a clean boundary.
+        Returns:
+            list: A list of (key, record) tuples.
+        """
+        self.offset = 0
+        records = self.read_new()
+        self.record_count = len(records)
+        return records
+
+    def read_new(self):
+        """Reads the records appended since this process last read or wrote the log, such as those written by
+        another process sharing the files.
+        Returns:
+            list: A list of (key, record) tuples.
+        """
+        records = []
+        if os.path.exists(self.filename):
+            with open(self.filename, 'r+b') as f:
+                size = os.fstat(f.fileno()).st_size
+                good_offset = min(self.offset, size)
+                f.seek(good_offset)
+                while good_offset < size:
+                    try:
+                        records.append(load_pickle(f))
+                    except Exception:
+                        f.truncate(good_offset) # Drop the partial record at the tail
+                        break
+                    good_offset = f.tell()
+                self.offset = good_offset
+        self.record_count += len(records)
+        return records
+
+    def clear(self):
+        """Empties the log once its records have been folded into a snapshot."""
+        with open(self.filename, 'wb'):
+            pass
+        self.record_count = 0
+        self.offset = 0
+
+def highest_key(collection):
+    """Finds the highest ID stored in a collection.
+    Args:
+        collection (dict, ColumnStore, ShardedMapping or SqliteTable): A collection whose keys are IDs.
+    Returns:
+        int: The highest ID, or 0 if the collection is empty.
+    """
+    if isinstance(collection, (SqliteTable, ColumnStore, ShardedMapping)):
+        return collection.max_key() # Answered without scanning every key
+    return max(collection.keys()) if collection else 0
+
+class PickleStorage:
+    """Default storage backend: keeps every collection in memory and persists each one to its own pickle file."""
+    native_indexes = False # Lookups are answered by the managers from in-memory dictionaries
+
+    def __init__(self, user_file="users.pkl", event_file="events.pkl", booking_file="bookings.pkl", payment_file="payments.pkl", journal=False, compact_threshold=10000, shared=False, write_behind=None):
+        """Initializes the PickleStorage.
+        Args:
+            user_file (str, optional): Filename for storing user data. Defaults to "users.pkl".
+            event_file (str, optional): Filename for storing event data. Defaults to "events.pkl".
+            booking_file (str, optional): Filename for storing booking data. Defaults to "bookings.pkl".
+            payment_file (str, optional): Filename for storing payment data. Defaults to "payments.pkl".
+            journal (bool, optional): If True, new bookings and payments are appended to a log next to their snapshot file
+                instead of rewriting the whole file. Defaults to False.
+            compact_threshold (int, optional): Number of journal records after which the logs should be folded back into the snapshots. Defaults to 10000.
+            shared (bool, optional): If True, several processes can use the same files. Writes take an advisory lock
+                (tickets.lock) and bump a version stamp per file (tickets.versions), so each process can tell what the
+                others changed (see poll_changes) and a stale snapshot is never written over a newer one. Defaults to False.
+            write_behind (float, optional): If set, changes are queued instead of written on the calling thread, and a
+                background flusher writes them this many seconds after the first one, so a burst of changes costs one
+                write per file. Call flush() to wait until they are on disk. Defaults to None, writing every change at once.
+        Raises:
+            ValueError: If write_behind is combined with shared, which needs every change on disk when it is committed.
+        """
+        if write_behind is not None and shared:
+            raise ValueError("Write-behind can't be used with shared files.")
+        self.user_file = user_file
+        self.event_file = event_file
+        self.booking_file = booking_file
+        self.payment_file = payment_file
+        self.compact_threshold = compact_threshold
+        self.booking_journal = Journal(booking_file + ".log") if journal else None # Log of bookings not yet in the snapshot
+        self.payment_journal = Journal(payment_file + ".log") if journal else None # Log of payments not yet in the snapshot
+        self.shared = shared
+        self.data_dir = os.path.dirname(os.path.abspath(booking_file)) # Directory holding the lock and version files
+        self.file_lock = FileLock(os.path.join(self.data_dir, "tickets.lock")) if shared else None
+        self.version_file = os.path.join(self.data_dir, "tickets.versions")
+        self.versions = {} # Version stamp of each file as this process last read or wrote it
+        self.stores = {self._version_key(user_file): ("users", None), self._version_key(event_file): ("events", None),
+                       self._version_key(booking_file): ("bookings", None), self._version_key(payment_file): ("payments", None)}
+        for kind, journal_obj in (("bookings", self.booking_journal), ("payments", self.payment_journal)):
+            if journal_obj:
+                self.stores[self._version_key(journal_obj.filename)] = (kind, journal_obj)
+        self.write_behind = write_behind
+        self.data_lock = threading.RLock() # Held by the managers while they change the collections handed out here
+        self.flush_lock = threading.Lock() # Lets one flush write at a time, so files are written in order
+        self.pending_dumps = {} # Dictionary mapping each filename waiting to be rewritten to its (data, label)
+        self.next_ids = {} # Dictionary mapping store labels to the highest next ID given when writing behind
+        self.pending_appends = {} # Dictionary mapping each journal to the (records, label) waiting to be appended
+        self.pending_clears = set() # Journals waiting to be emptied
+        self.changes_waiting = threading.Event() # Wakes the flusher when a change is queued
+        self.closing = threading.Event() # Stops the flusher
+        self.flusher = None
+        if write_behind is not None:
+            self.flusher = threading.Thread(target=self._run_flusher, name="write-behind", daemon=True)
+            self.flusher.start()
+
+    @property
+    def journaled(self):
+        """Returns True if new bookings and payments are written to journals."""
+        return self.booking_journal is not None
+
+    def locked(self):
+        """Returns a context manager holding the lock shared with other processes, or doing nothing when not shared."""
+        return self.file_lock if self.shared else nullcontext()
+
+    def _version_key(self, filename):
+        """Returns the name a file's version stamp is kept under, the same for every process."""
+        return os.path.relpath(os.path.abspath(filename), self.data_dir)
+
+    def _read_versions(self):
+        """Reads the version stamps of every file. Call with the lock held."""
+        if not os.path.exists(self.version_file):
+            return {}
+        try:
+            with open(self.version_file, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            raise StorageError(f"Could not read {self.version_file}: {e}") from e
+
+    def _seen(self, filename):
+        """Records the version of a file this process has just read."""
+        if self.shared:
+            with self.locked():
+                key = self._version_key(filename)
+                self.versions[key] = self._read_versions().get(key, 0)
+
+    def _bump(self, filename, versions=None):
+        """Bumps the version stamp of a file this process has just written. Call with the lock held."""
+        versions = self._read_versions() if versions is None else versions
+        key = self._version_key(filename)
+        versions[key] = versions.get(key, 0) + 1
+        temp_file = self.version_file + ".tmp"
+        with open(temp_file, 'wb') as f:
+            pickle.dump(versions, f)
+        os.replace(temp_file, self.version_file)
+        self.versions[key] = versions[key]
+
+    def _write_atomically(self, filename, write):
+        """Writes a file through a temporary file that is renamed over it, so a crash mid-write leaves the old file intact.
+        Args:
+            filename (str): The file to replace.
+            write (callable): Called with the open temporary file to write its content.
+        Returns:
+            int: The size of the file written, in bytes.
+        """
+        temp_file = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_file, 'wb') as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            os.replace(temp_file, filename)
+            return size
+        except BaseException:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+
+    def _counter(self, label, next_id):
+        """Returns a function giving the next ID to store with a snapshot of a store. A write-behind snapshot is taken
+        when it is written, so it may hold records created after it was queued. Those were saved or appended since, which
+        moved the store's next ID past them, so the ID it has by then is stored."""
+        if self.write_behind is None:
+            return lambda: next_id
+        with self.data_lock:
+            self.next_ids[label] = max(self.next_ids.get(label, 1), next_id)
+        return lambda: self.next_ids[label]
+
+    def _dump(self, data, filename, label):
+        """Pickles data to a file, or queues the file to be rewritten when writing behind.
+        When shared, the file is only written if no other process changed it since this one last read it.
+        Args:
+            data (object or callable): The data, or a function returning it, called when the file is written.
+            filename (str): The file to write.
+            label (str): What the data is, for error messages.
+        Returns:
+            bool: True once the data has been saved or queued.
+        Raises:
+            ConflictError: If another process changed the file first.
+            StorageError: If the data could not be saved.
+        """
+        if self.write_behind is not None:
+            with self.data_lock:
+                self.pending_dumps[filename] = (data, label)
+            self.changes_waiting.set()
+            return True
+        start = time.perf_counter() if metrics.registry.enabled else None
+        data = data() if callable(data) else data
+        with self.locked():
+            versions = None
+            if self.shared:
+                versions = self._read_versions()
+                key = self._version_key(filename)
+                if versions.get(key, 0) != self.versions.get(key, 0):
+                    raise ConflictError(f"Could not save {label} data: it was changed by another process. Reload and try again.")
+            try:
+                size = self._write_atomically(filename, lambda f: self._encode(filename, data, f))
+                if self.shared:
+                    self._bump(filename, versions)
+            except Exception as e:
+                if start is not None:
+                    metrics.registry.observe_storage("save", label, time.perf_counter() - start, failed=True)
+                raise StorageError(f"Could not save {label} data: {e}") from e
+        if start is not None:
+            metrics.registry.observe_storage("save", label, time.perf_counter() - start, size)
+        return True
+
+    def _encode(self, filename, data, f):
+        """Writes the data of a file to an open binary file, as a pickle."""
+        pickle.dump(data, f)
+
+    def _encode_bytes(self, filename, data):
+        """Returns the bytes _encode writes for the data of a file."""
+        buffer = io.BytesIO()
+        self._encode(filename, data, buffer)
+        return buffer.getvalue()
+
+    def _decode(self, filename, f):
+        """Reads the data of a file from an open binary file, unpickling it."""
+        return load_pickle(f)
+
+    def _load(self, filename, label, default):
+        """Unpickles data from a file, returning the default if the file doesn't exist.
+        Raises:
+            StorageError: If the file exists but could not be read.
+        """
+        start = time.perf_counter() if metrics.registry.enabled else None
+        with self.locked():
+            self._seen(filename)
+            if not os.path.exists(filename):
+                return default
+            try:
+                with open(filename, 'rb') as f:
+                    data = self._decode(filename, f)
+            except Exception as e:
+                if start is not None:
+                    metrics.registry.observe_storage("load", label, time.perf_counter() - start, failed=True)
+                raise StorageError(f"Could not load {label} data: {e}") from e
+        if start is not None:
+            metrics.registry.observe_storage("load", label, time.perf_counter() - start)
+        return data
+
+    def _replay(self, journal, label):
+        """Replays a journal from the start."""
+        start = time.perf_counter() if metrics.registry.enabled else None
+        with self.locked():
+            self._seen(journal.filename)
+            records = journal.replay()
+        if start is not None:
+            metrics.registry.observe_storage("replay", label, time.perf_counter() - start)
+        return records
+
+    def _append(self, journal, records, label):
+        """Appends (key, record) tuples to a journal with a single write.
+        Returns:
+            bool: True once the records have been persisted or queued.
+        Raises:
+            StorageError: If the records could not be saved.
+        """
+        if self.write_behind is not None:
+            with self.data_lock:
+                queued, _ = self.pending_appends.get(journal, ([], label))
+                self.pending_appends[journal] = (queued + list(records), label)
+                # A snapshot queued earlier may take these records in, so its next ID has to pass them
+                self.next_ids[label] = max(self.next_ids.get(label, 1), max((key for key, _ in records), default=0) + 1)
+            self.changes_waiting.set()
+            return True
+        start = time.perf_counter() if metrics.registry.enabled else None
+        with self.locked():
+            try:
+                size = journal.append_many(records)
+                if self.shared:
+                    self._bump(journal.filename)
+            except Exception as e:
+                if start is not None:
+                    metrics.registry.observe_storage("append", label, time.perf_counter() - start, failed=True)
+                raise StorageError(f"Could not save {label} data: {e}") from e
+        if start is not None:
+            metrics.registry.observe_storage("append", label, time.perf_counter() - start, size)
+        return True
+
+    def _clear(self, journal):
+        """Empties a journal, or queues it to be emptied after the snapshots queued before it when writing behind."""
+        if self.write_behind is not None:
+            with self.data_lock:
+                self.pending_clears.add(journal)
+            self.changes_waiting.set()
+            return
+        with self.locked():
+            journal.clear()
+            if self.shared:
+                self._bump(journal.filename)
+
+    def _run_flusher(self):
+        """Writes queued changes in the background until the storage is closed. Each batch is written write_behind
+        seconds after its first change, so the changes made in the meantime share the write."""
+        while not self.closing.is_set():
+            self.changes_waiting.wait()
+            self.closing.wait(self.write_behind)
+            self.changes_waiting.clear()
+            try:
+                self.flush()
+            except StorageError:
+                self.changes_waiting.set() # The changes are still queued; retry after another window
+                self.closing.wait(max(self.write_behind, 1))
+
+    def flush(self):
+        """Writes every queued change and returns once it is on disk. Use it as a durability barrier, such as before
+        confirming a checkout. Returns at once if nothing is queued, as when changes are written straight away.
+        Snapshots are pickled with the data lock held, so they match the collections as they are at that moment, then
+        written without it. Journals are emptied only after every snapshot has been written.
+        Returns:
+            bool: True once every change made so far has been saved.
+        Raises:
+            StorageError: If a change could not be saved. It stays queued, so a later flush retries it.
+        """
+        with self.flush_lock:
+            with self.data_lock:
+                dumps, self.pending_dumps = self.pending_dumps, {}
+                appends, self.pending_appends = self.pending_appends, {}
+                clears, self.pending_clears = self.pending_clears, set()
+                try:
+                    blobs = {filename: self._encode_bytes(filename, data() if callable(data) else data) for filename, (data, _) in dumps.items()}
+                except Exception as e:
+                    self._requeue(dumps, appends, clears)
+                    raise StorageError(f"Could not save data: {e}") from e
+            # A journal being emptied only holds records the new snapshots already include
+            appends = {journal: queued for journal, queued in appends.items() if journal not in clears}
+            label = None
+            try:
+                for filename in list(dumps):
+                    label = dumps[filename][1]
+                    start = time.perf_counter()
+                    size = self._write_atomically(filename, lambda f: f.write(blobs[filename]))
+                    if metrics.registry.enabled:
+                        metrics.registry.observe_storage("save", label, time.perf_counter() - start, size)
+                    del dumps[filename]
+                for journal in list(appends):
+                    records, label = appends[journal]
+                    start = time.perf_counter()
+                    size = journal.append_many(records, sync=True)
+                    if metrics.registry.enabled:
+                        metrics.registry.observe_storage("append", label, time.perf_counter() - start, size)
+                    del appends[journal]
+                for journal in list(clears):
+                    label = "journal"
+                    journal.clear()
+                    clears.discard(journal)
+            except Exception as e:
+                self._requeue(dumps, appends, clears)
+                raise StorageError(f"Could not save {label} data: {e}") from e
+        return True
+
+    def _requeue(self, dumps, appends, clears):
+        """Puts changes a flush failed to write back in the queue, ahead of anything queued since."""
+        with self.data_lock:
+            for filename, pending in dumps.items():
+                self.pending_dumps.setdefault(filename, pending) # A newer queued snapshot supersedes this one
+            for journal, (records, label) in appends.items():
+                queued, _ = self.pending_appends.get(journal, ([], label))
+                self.pending_appends[journal] = (records + queued, label)
+            self.pending_clears |= clears
+
+    def close(self):
+        """Writes every queued change and stops the write-behind flusher. Later changes are written straight away.
+        Returns:
+            bool: True once every change has been saved.
+        Raises:
+            StorageError: If a change could not be saved.
+        """
+        if self.flusher is not None:
+            self.closing.set()
+            self.changes_waiting.set()
+            self.flusher.join()
+            self.flusher = None
+        with self.data_lock:
+            self.write_behind = None
+        return self.flush()
+
+    def _store_of(self, key):
+        """Returns the kind of records ("users", "events", "bookings" or "payments") a versioned file holds, and the
+        Journal object if the file is a journal. Returns (None, None) for files this storage doesn't use."""
+        return self.stores.get(key, (None, None))
+
+    def poll_changes(self):
+        """Finds what other processes sharing the files have committed since this one last read or wrote them.
+        Records appended to journals are read right away; rewritten snapshots have to be reloaded.
+        Returns:
+            dict: Maps each changed kind of records ("users", "events", "bookings" or "payments") to a list of new
+                (key, record) tuples, or to None if the whole collection has to be reloaded. Empty when not shared.
+        """
+        if not self.shared:
+            return {}
+        with self.locked():
+            versions = self._read_versions()
+            changed = [key for key, version in versions.items() if version != self.versions.get(key, 0)]
+            changes = {}
+            for key in changed:
+                kind, journal = self._store_of(key)
+                if kind and journal is None:
+                    changes[kind] = None
+            for key in changed:
+                kind, journal = self._store_of(key)
+                if journal is not None and changes.get(kind, []) is not None:
+                    changes.setdefault(kind, []).extend(journal.read_new())
+            self.versions.update(versions)
+        for records in changes.values():
+            if records:
+                records.sort(key=lambda pair: pair[0])
+        return changes
+
+    def load_users(self):
+        """Loads the user accounts.
+        Returns:
+            tuple: A dictionary of User objects keyed by user ID, and the next user ID to allocate.
+        """
+        data = self._load(self.user_file, "user", {})
+        users = data.get('users', {})
+        if 'next_user_id' not in data: # Files written before the counter was stored
+            return users, highest_key(users) + 1
+        return users, data['next_user_id']
+
+    def save_users(self, users, next_user_id):
+        """Saves the user accounts.
+        Returns:
+            bool: True once the data has been saved.
+        Raises:
+            StorageError: If the data could not be saved.
+        """
+        next_id = self._counter("user", next_user_id)
+        return self._dump(lambda: {'users': users, 'next_user_id': next_id()}, self.user_file, "user")
+
+    def load_events(self):
+        """Loads the race events as a dictionary keyed by event ID."""
+        return self._load(self.event_file, "event", {})
+
+    def save_events(self, events):
+        """Saves the race events.
+        Returns:
+            bool: True once the data has been saved.
+        Raises:
+            StorageError: If the data could not be saved.
+        """
+        return self._dump(events, self.event_file, "event")
+
+    def load_bookings(self):
+        """Loads the booking snapshot and replays the booking journal on top of it.
+        The next ID is read from the snapshot and advanced past the replayed records, so the IDs aren't scanned.
+        Returns:
+            tuple: A dictionary of Booking objects keyed by booking ID, and the next booking ID to allocate.
+        """
+        data = self._load(self.booking_file, "booking", {})
+        if isinstance(data, dict) and 'next_booking_id' in data:
+            bookings, next_id = data['bookings'], data['next_booking_id']
+        else: # Snapshots written before the counter was stored hold the bookings alone
+            bookings, next_id = data, highest_key(data) + 1
+        if self.booking_journal:
+            for booking_id, booking in self._replay(self.booking_journal, "booking"):
+                bookings[booking_id] = booking
+                next_id = max(next_id, booking_id + 1)
+        return bookings, next_id
+
+    def save_bookings(self, bookings, next_booking_id):
+        """Saves the full booking snapshot together with the next booking ID.
+        Returns:
+            bool: True once the data has been saved.
+        Raises:
+            StorageError: If the data could not be saved.
+        """
+        next_id = self._counter("booking", next_booking_id)
+        return self._dump(lambda: {'bookings': bookings, 'next_booking_id': next_id()}, self.booking_file, "booking")
+
+    def add_booking(self, bookings, booking, next_booking_id):
+        """Persists a newly created booking, appending it to the journal when journaling is enabled.
+        Args:
+            bookings (dict): All bookings, including the new one.
+            booking (Booking): The new booking.
+            next_booking_id (int): The next booking ID to allocate.
+        Returns:
+            bool: True once the booking has been persisted.
+        Raises:
+            StorageError: If the booking could not be saved.
+        """
+        if self.booking_journal:
+            return self._append(self.booking_journal, [(booking.get_booking_id(), booking)], "booking")
+        return self.save_bookings(bookings, next_booking_id)
+
+    def add_bookings(self, bookings, new_bookings, next_booking_id):
+        """Persists a batch of newly created bookings with a single write.
+        Args:
+            bookings (dict): All bookings, including the new ones.
+            new_bookings (list): The new Booking objects.
+            next_booking_id (int): The next booking ID to allocate.
+        Returns:
+            bool: True once the bookings have been persisted.
+        Raises:
+            StorageError: If the bookings could not be saved.
+        """
+        if self.booking_journal:
+            return self._append(self.booking_journal, [(booking.get_booking_id(), booking) for booking in new_bookings], "booking")
+        return self.save_bookings(bookings, next_booking_id)
+
+    def load_payments(self):
+        """Loads the payment snapshot and replays the payment journal on top of it.
+        The next ID is read from the snapshot and advanced past the replayed records, so the IDs aren't scanned.
+        Returns:
+            tuple: A dictionary of Payment objects keyed by payment ID, and the next payment ID to allocate.
+        """
+        data = self._load(self.payment_file, "payment", {})
+        if isinstance(data, dict) and 'next_payment_id' in data:
+            payments, next_id = data['payments'], data['next_payment_id']
+        else: # Snapshots written before the counter was stored hold the payments alone
+            payments, next_id = data, highest_key(data) + 1
+        if self.payment_journal:
+            for payment_id, payment in self._replay(self.payment_journal, "payment"):
+                payments[payment_id] = payment
+                next_id = max(next_id, payment_id + 1)
+        return payments, next_id
+
+    def save_payments(self, payments, next_payment_id):
+        """Saves the full payment snapshot together with the next payment ID.
+        Returns:
+            bool: True once the data has been saved.
+        Raises:
+            StorageError: If the data could not be saved.
+        """
+        next_id = self._counter("payment", next_payment_id)
+        return self._dump(lambda: {'payments': payments, 'next_payment_id': next_id()}, self.payment_file, "payment")
+
+    def add_payment(self, payments, payment, next_payment_id):
+        """Persists a newly created payment, appending it to the journal when journaling is enabled.
+        Args:
+            payments (dict): All payments, including the new one.
+            payment (Payment): The new payment.
+            next_payment_id (int): The next payment ID to allocate.
+        Returns:
+            bool: True once the payment has been persisted.
+        Raises:
+            StorageError: If the payment could not be saved.
+        """
+        if self.payment_journal:
+            return self._append(self.payment_journal, [(payment.get_payment_id(), payment)], "payment")
+        return self.save_payments(payments, next_payment_id)
+
+    def add_payments(self, payments, new_payments, next_payment_id):
+        """Persists a batch of newly created payments with a single write.
+        Args:
+            payments (dict): All payments, including the new ones.
+            new_payments (list): The new Payment objects.
+            next_payment_id (int): The next payment ID to allocate.
+        Returns:
+            bool: True once the payments have been persisted.
+        Raises:
+            StorageError: If the payments could not be saved.
+        """
+        if self.payment_journal:
+            return self._append(self.payment_journal, [(payment.get_payment_id(), payment) for payment in new_payments], "payment")
+        return self.save_payments(payments, next_payment_id)
+
+    def needs_compaction(self):
+        """Returns True if a journal has grown past the compaction threshold."""
+        return self.journaled and max(self.booking_journal.record_count, self.payment_journal.record_count) >= self.compact_threshold
+
+    def clear_journals(self):
+        """Empties the journals once their records have been folded into the snapshots."""
+        if self.journaled:
+            self._clear(self.booking_journal)
+            self._clear(self.payment_journal)
+
+class ShardedMapping(MutableMapping):
+    """Dictionary-like collection split into one mapping (shard) per event.
+    Records are routed to a shard by a key function. Shards changed since the last save are tracked, so only those
+    are written back. Iteration follows the order records were added in, across every shard.
+    """
+    def __init__(self, shard_key, shard_type=dict):
+        """Initializes the ShardedMapping.
+        Args:
+            shard_key (callable): Returns the shard ID (an event ID, or None) a record belongs to.
+            shard_type (type, optional): Mapping type created for new shards. Defaults to dict.
+        """
+        self.shard_key = shard_key
+        self.shard_type = shard_type
+        self.shards = {} # Dictionary mapping shard IDs to the records of each shard
+        self.shard_of = {} # Dictionary mapping each record ID to its shard ID, in the order records were added
+        self.dirty = set() # IDs of the shards changed since they were last saved
+
+    def add_shard(self, shard_id, records):
+        """Adds a shard loaded from storage without marking it as changed."""
+        self.shards[shard_id] = records
+        for key in records:
+            self.shard_of[key] = shard_id
+
+    def convert_shards(self, shard_type):
+        """Converts every shard, and the shards created from now on, to another mapping type (such as BookingStore)."""
+        self.shard_type = shard_type
+        self.shards = {shard_id: records if isinstance(records, shard_type) else shard_type(records)
+                       for shard_id, records in self.shards.items()}
+
+    def __getitem__(self, key):
+        return self.shards[self.shard_of[key]][key]
+
+    def __setitem__(self, key, record):
+        shard_id = self.shard_key(record)
+        if key in self.shard_of and self.shard_of[key] != shard_id: # The record moved to another event
+            del self[key]
+        shard = self.shards.get(shard_id)
+        if shard is None:
+            shard = self.shards[shard_id] = self.shard_type()
+        shard[key] = record
+        self.shard_of[key] = shard_id
+        self.dirty.add(shard_id)
+
+    def __delitem__(self, key):
+        shard_id = self.shard_of.pop(key)
+        del self.shards[shard_id][key]
+        self.dirty.add(shard_id)
+
+    def __contains__(self, key):
+        return key in self.shard_of
+
+    def __iter__(self):
+        return iter(self.shard_of)
+
+    def __len__(self):
+        return len(self.shard_of)
+
+    def values(self):
+        """Yields every record, in the order they were added."""
+        for key, shard_id in self.shard_of.items():
+            yield self.shards[shard_id][key]
+
+    def items(self):
+        """Yields (ID, record) pairs for every record, in the order they were added."""
+        for key, shard_id in self.shard_of.items():
+            yield key, self.shards[shard_id][key]
+
+    def max_key(self):
+        """Returns the highest ID stored, or 0 if the collection is empty."""
+        return max(self.shard_of, default=0)
+
+class ShardedStorage(PickleStorage):
+    """Pickle storage that partitions bookings and payments by event, with one snapshot file (and journal) per event.
+    Payments are filed under the event of the booking they pay for. Saving rewrites only the shards that changed,
+    so a booking for one event never rewrites another event's data. The layout under shard_dir is:
+
+        bookings/event_<event ID>.pkl, payments/event_<event ID>.pkl, plus counter.pkl holding the next ID of each
+
+    Users and events are kept in single files, as with PickleStorage.
+    """
+    KINDS = ("bookings", "payments")
+
+    def __init__(self, user_file="users.pkl", event_file="events.pkl", shard_dir="shards", journal=False, compact_threshold=10000, booking_file="bookings.pkl", payment_file="payments.pkl", shared=False, write_behind=None):
+        """Initializes the ShardedStorage, creating the shard directories if needed.
+        Args:
+            user_file (str, optional): Filename for storing user data. Defaults to "users.pkl".
+            event_file (str, optional): Filename for storing event data. Defaults to "events.pkl".
+            shard_dir (str, optional): Directory holding the booking and payment shards. Defaults to "shards".
+            journal (bool, optional): If True, new bookings and payments are appended to a log next to their shard file
+                instead of rewriting the shard. Defaults to False.
+            compact_threshold (int, optional): Number of records in a shard journal after which the logs should be folded back into the shards. Defaults to 10000.
+            booking_file (str, optional): Unsharded booking file migrated into shards on first use. Defaults to "bookings.pkl".
+            payment_file (str, optional): Unsharded payment file migrated into shards on first use. Defaults to "payments.pkl".
+            shared (bool, optional): If True, several processes can use the same files. See PickleStorage. Defaults to False.
+            write_behind (float, optional): If set, changes are written by a background flusher. See PickleStorage. Defaults to None.
+        """
+        super().__init__(user_file, event_file, booking_file, payment_file, False, compact_threshold, shared, write_behind)
+        self.shard_dir = shard_dir
+        self.journal = journal
+        self.journals = {} # Dictionary mapping (kind, shard ID) to the journal of each shard
+        self.bookings = None # Loaded ShardedMapping of bookings, used to file payments under their booking's event
+        for kind in self.KINDS:
+            os.makedirs(os.path.join(shard_dir, kind), exist_ok=True)
+
+    @property
+    def journaled(self):
+        """Returns True if new bookings and payments are written to journals."""
+        return self.journal
+
+    def _shard_file(self, kind, shard_id):
+        """Returns the snapshot filename of a shard."""
+        return os.path.join(self.shard_dir, kind, "unassigned.pkl" if shard_id is None else f"event_{shard_id}.pkl")
+
+    def _counter_file(self, kind):
+        """Returns the filename holding the next ID of a kind of record."""
+        return os.path.join(self.shard_dir, kind, "counter.pkl")
+
+    def _journal(self, kind, shard_id):
+        """Returns the journal of a shard, creating the Journal object on first use."""
+        journal = self.journals.get((kind, shard_id))
+        if journal is None:
+            journal = self.journals[(kind, shard_id)] = Journal(self._shard_file(kind, shard_id) + ".log")
+        return journal
+
+    def shard_ids(self, kind="bookings"):
+        """Lists the shards stored on disk.
+        Args:
+            kind (str, optional): "bookings" or "payments". Defaults to "bookings".
+        Returns:
+            list: The event IDs that have a shard, plus None if there is a shard of records without an event.
+        """
+        shard_ids = set()
+        for filename in os.listdir(os.path.join(self.shard_dir, kind)):
+            name = filename[:-len(".log")] if filename.endswith(".log") else filename
+            if name == "unassigned.pkl":
+                shard_ids.add(None)
+            elif name.startswith("event_") and name.endswith(".pkl"):
+                shard_ids.add(int(name[len("event_"):-len(".pkl")]))
+        return sorted(shard_ids, key=lambda shard_id: -1 if shard_id is None else shard_id)
+
+    def load_shard(self, kind, shard_id):
+        """Reads a single shard, replaying its journal, without touching any other shard.
+        Args:
+            kind (str): "bookings" or "payments".
+            shard_id (int): The event ID of the shard, or None for records without an event.
+        Returns:
+            tuple: A dictionary of the shard's records keyed by ID, and a list of the IDs replayed from its journal.
+        Raises:
+            StorageError: If the shard exists but could not be read.
+        """
+        self.flush() # Changes still queued by the write-behind flusher would be missing from the files
+        records = self._load(self._shard_file(kind, shard_id), kind[:-1], {})
+        replayed = []
+        if self.journal:
+            for key, record in self._replay(self._journal(kind, shard_id), kind[:-1]):
+                records[key] = record
+                replayed.append(key)
+        return records, replayed
+
+    def _load_sharded(self, kind, shard_key):
+        """Loads every shard of a kind of record into a ShardedMapping, with the next ID to allocate.
+        If no shards exist yet, the unsharded snapshot (and its journal) is read instead and every record is marked
+        as changed, so the next save writes it out as shards.
+        """
+        records = ShardedMapping(shard_key)
+        next_id = self._load(self._counter_file(kind), kind[:-1], 1)
+        shard_ids = self.shard_ids(kind)
+        if not shard_ids:
+            legacy = PickleStorage(self.user_file, self.event_file, self.booking_file, self.payment_file, journal=True)
+            legacy_records, legacy_next_id = legacy.load_bookings() if kind == "bookings" else legacy.load_payments()
+            records.update(legacy_records)
+            return records, max(next_id, legacy_next_id)
+        for shard_id in shard_ids:
+            shard, replayed = self.load_shard(kind, shard_id)
+            records.add_shard(shard_id, shard)
+            if replayed: # The snapshot doesn't hold these yet, so the next save has to rewrite it
+                records.dirty.add(shard_id)
+                next_id = max(next_id, max(replayed) + 1)
+        return records, next_id
+
+    def _save_sharded(self, kind, records, next_id):
+        """Writes the shards changed since the last save and the next ID.
+        Returns:
+            bool: True once the data has been saved.
+        Raises:
+            StorageError: If the data could not be saved.
+        """
+        for shard_id in list(records.dirty):
+            self._dump(records.shards.get(shard_id, {}), self._shard_file(kind, shard_id), kind[:-1])
+            records.dirty.discard(shard_id)
+        return self._dump(self._counter(kind[:-1], next_id), self._counter_file(kind), kind[:-1])
+
+    def _append_sharded(self, kind, records, new_records):
+        """Appends new records to the journals of their shards, one write per shard.
+        Raises:
+            StorageError: If the records could not be saved.
+        """
+        by_shard = {}
+        for key, record in new_records:
+            by_shard.setdefault(records.shard_key(record), []).append((key, record))
+        with self.locked():
+            for shard_id, shard_records in by_shard.items():
+                self._append(self._journal(kind, shard_id), shard_records, kind[:-1])
+        return True
+
+    def _store_of(self, key):
+        """Returns the kind of records a versioned file holds, and the Journal object if it is a shard journal."""
+        shard_root = os.path.relpath(os.path.abspath(self.shard_dir), self.data_dir)
+        kind, _, filename = os.path.relpath(key, shard_root).replace(os.sep, "/").partition("/")
+        if kind not in self.KINDS:
+            return super()._store_of(key)
+        if not filename.endswith(".pkl.log"):
+            return kind, None # A shard snapshot or the ID counter
+        name = filename[:-len(".log")]
+        shard_id = None if name == "unassigned.pkl" else int(name[len("event_"):-len(".pkl")])
+        return kind, self._journal(kind, shard_id)
+
+    def _event_of_booking(self, booking_id):
+        """Returns the event ID of a loaded booking, or None if it isn't known."""
+        return self.bookings.shard_of.get(booking_id) if self.bookings is not None else None
+
+    def load_bookings(self):
+        """Loads every booking shard.
+        Returns:
+            tuple: A ShardedMapping of Booking objects keyed by booking ID, and the next booking ID to allocate.
+        """
+        self.bookings, next_id = self._load_sharded("bookings", lambda booking: booking.get_event_id())
+        return self.bookings, next_id
+
+    def save_bookings(self, bookings, next_booking_id):
+        """Writes the booking shards changed since the last save, and the next booking ID."""
+        return self._save_sharded("bookings", bookings, next_booking_id)
+
+    def add_booking(self, bookings, booking, next_booking_id):
+        """Persists a new booking by appending it to its shard's journal, or rewriting only its shard."""
+        if self.journal:
+            return self._append_sharded("bookings", bookings, [(booking.get_booking_id(), booking)])
+        return self.save_bookings(bookings, next_booking_id)
+
+    def add_bookings(self, bookings, new_bookings, next_booking_id):
+        """Persists a batch of new bookings with one write per shard they belong to."""
+        if self.journal:
+            return self._append_sharded("bookings", bookings, [(booking.get_booking_id(), booking) for booking in new_bookings])
+        return self.save_bookings(bookings, next_booking_id)
+
+    def load_payments(self):
+        """Loads every payment shard. Load the bookings first, so new payments are filed under their booking's event.
+        Returns:
+            tuple: A ShardedMapping of Payment objects keyed by payment ID, and the next payment ID to allocate.
+        """
+        return self._load_sharded("payments", lambda payment: self._event_of_booking(payment.get_booking_id()))
+
+    def save_payments(self, payments, next_payment_id):
+        """Writes the payment shards changed since the last save, and the next payment ID."""
+        return self._save_sharded("payments", payments, next_payment_id)
+
+    def add_payment(self, payments, payment, next_payment_id):
+        """Persists a new payment by appending it to its shard's journal, or rewriting only its shard."""
+        if self.journal:
+            return self._append_sharded("payments", payments, [(payment.get_payment_id(), payment)])
+        return self.save_payments(payments, next_payment_id)
+
+    def add_payments(self, payments, new_payments, next_payment_id):
+        """Persists a batch of new payments with one write per shard they belong to."""
+        if self.journal:
+            return self._append_sharded("payments", payments, [(payment.get_payment_id(), payment) for payment in new_payments])
+        return self.save_payments(payments, next_payment_id)
+
+    def needs_compaction(self):
+        """Returns True if a shard journal has grown past the compaction threshold."""
+        return self.journal and max((journal.record_count for journal in self.journals.values()), default=0) >= self.compact_threshold
+
+    def clear_journals(self):
+        """Empties the shard journals once their records have been folded into the shards."""
+        for journal in self.journals.values():
+            self._clear(journal)
+
+class SnapshotStorage(PickleStorage):
+    """Storage backend keeping each collection in a versioned binary snapshot file instead of a pickle (see
+    SnapshotFile). Users and events are decoded into objects when loaded. Bookings and payments are loaded as a
+    BookingStore and a PaymentStore reading their columns straight from the memory-mapped file, so loading them costs
+    little more than mapping the file, whatever their number. Journals, sharing and write-behind work as with
+    PickleStorage; journal records are still pickled.
+    Existing pickle files are converted with convert_storage, or from the command line with convert_snapshots.py.
+    """
+    def __init__(self, user_file="users.snap", event_file="events.snap", booking_file="bookings.snap", payment_file="payments.snap", journal=False, compact_threshold=10000, shared=False, write_behind=None):
+        """Initializes the SnapshotStorage. The arguments are those of PickleStorage, for snapshot files."""
+        super().__init__(user_file, event_file, booking_file, payment_file, journal, compact_threshold, shared, write_behind)
+
+    def _encode(self, filename, data, f):
+        """Writes the data of a file to an open binary file as a snapshot."""
+        kind, _ = self._store_of(self._version_key(filename))
+        if kind == "users":
+            self._encode_users(data['users'], data['next_user_id'], f)
+        elif kind == "events":
+            self._encode_events(data, f)
+        else:
+            store_type = BookingStore if kind == "bookings" else PaymentStore
+            records, next_id = data[kind], data['next_booking_id' if kind == "bookings" else 'next_payment_id']
+            if not isinstance(records, store_type):
+                records = store_type(records)
+            records.to_snapshot(f, kind, next_id)
+
+    def _decode(self, filename, f):
+        """Reads the data of a file from an open snapshot file, in the layout the pickle files hold."""
+        kind, _ = self._store_of(self._version_key(filename))
+        snapshot = SnapshotFile(f, kind)
+        try:
+            if kind == "bookings":
+                return {'bookings': BookingStore.from_snapshot(snapshot), 'next_booking_id': snapshot.next_id}
+            if kind == "payments":
+                return {'payments': PaymentStore.from_snapshot(snapshot), 'next_payment_id': snapshot.next_id}
+        except BaseException:
+            snapshot.close()
+            raise
+        try:
+            if kind == "users":
+                return {'users': self._decode_users(snapshot), 'next_user_id': snapshot.next_id}
+            return self._decode_events(snapshot)
+        finally:
+            snapshot.close() # Users and events are copied into objects, so the file isn't needed any more
+
+    def _encode_users(self, users, next_user_id, f):
+        """Writes the user accounts as a snapshot, one column per field."""
+        text = StringTable()
+        code = lambda value: NULL_STRING if value is None else text.encode(value)
+        ids, balances, names, emails, passwords = array('q'), array('d'), array('I'), array('I'), array('I')
+        for user_id in sorted(users):
+            user = users[user_id]
+            ids.append(user_id)
+            balances.append(user.get_balance())
+            names.append(code(user.get_name()))
+            emails.append(code(user.get_email()))
+            passwords.append(code(user.get_password()))
+        write_snapshot(f, "users", next_user_id, len(ids),
+                       [("ids", 'q', ids), ("balances", 'd', balances), ("names", 'I', names), ("emails", 'I', emails),
+                        ("passwords", 'I', passwords)], [("text", text.values)])
+
+    def _decode_users(self, snapshot):
+        """Builds the User objects held by a users snapshot."""
+        text = snapshot.strings("text")
+        value = lambda code: None if code == NULL_STRING else text[code]
+        return {user_id: User(user_id, value(name), value(email), value(password), balance)
+                for user_id, balance, name, email, password in zip(
+                    snapshot.column("ids", 'q'), snapshot.column("balances", 'd'), snapshot.column("names", 'I'),
+                    snapshot.column("emails", 'I'), snapshot.column("passwords", 'I'))}
+
+    def _encode_events(self, events, f):
+        """Writes the race events as a snapshot. Their ticket types are kept in their own columns, contiguous per event."""
+        text = StringTable()
+        code = lambda value: NULL_STRING if value is None else text.encode(str(value))
+        ids, names, dates, locations, capacities = array('q'), array('I'), array('I'), array('I'), array('q')
+        ticket_starts, ticket_counts = array('q'), array('I')
+        ticket_ids, ticket_names, prices, validities, features = array('q'), array('I'), array('d'), array('I'), array('I')
+        discounts, ticket_capacities = bytearray(), array('q')
+        for event_id in sorted(events):
+            event = events[event_id]
+            tickets = event.get_available_tickets()
+            ids.append(event_id)
+            names.append(code(event.get_name()))
+            dates.append(code(event.get_date()))
+            locations.append(code(event.get_location()))
+            capacities.append(event.get_capacity())
+            ticket_starts.append(len(ticket_ids))
+            ticket_counts.append(len(tickets))
+            for ticket in tickets:
+                ticket_ids.append(ticket.get_ticket_id())
+                ticket_names.append(code(ticket.get_name()))
+                prices.append(ticket.get_price())
+                validities.append(code(ticket.get_validity()))
+                features.append(code(ticket.get_features()))
+                discounts.append(1 if ticket.is_discount_available() else 0)
+                ticket_capacities.append(-1 if ticket.get_capacity() is None else ticket.get_capacity())
+        write_snapshot(f, "events", 0, len(ids),
+                       [("ids", 'q', ids), ("names", 'I', names), ("dates", 'I', dates), ("locations", 'I', locations),
+                        ("capacities", 'q', capacities), ("ticket_starts", 'q', ticket_starts),
+                        ("ticket_counts", 'I', ticket_counts), ("ticket_ids", 'q', ticket_ids),
+                        ("ticket_names", 'I', ticket_names), ("ticket_prices", 'd', prices),
+                        ("ticket_validities", 'I', validities), ("ticket_features", 'I', features),
+                        ("ticket_discounts", 'B', discounts), ("ticket_capacities", 'q', ticket_capacities)],
+                       [("text", text.values)])
+
+    def _decode_events(self, snapshot):
+        """Builds the RaceEvent objects, with their Ticket objects, held by an events snapshot."""
+        text = snapshot.strings("text")
+        value = lambda code: None if code == NULL_STRING else text[code]
+        ticket_ids, ticket_names = snapshot.column("ticket_ids", 'q'), snapshot.column("ticket_names", 'I')
+        prices, validities = snapshot.column("ticket_prices", 'd'), snapshot.column("ticket_validities", 'I')
+        features, discounts = snapshot.column("ticket_features", 'I'), snapshot.column("ticket_discounts", 'B')
+        ticket_capacities = snapshot.column("ticket_capacities", 'q')
+        events = {}
+        for event_id, name, date, location, capacity, start, count in zip(
+                snapshot.column("ids", 'q'), snapshot.column("names", 'I'), snapshot.column("dates", 'I'),
+                snapshot.column("locations", 'I'), snapshot.column("capacities", 'q'),
+                snapshot.column("ticket_starts", 'q'), snapshot.column("ticket_counts", 'I')):
+            event = events[event_id] = RaceEvent(event_id, value(name), value(date), value(location), capacity)
+            for row in range(start, start + count):
+                event.add_ticket(Ticket(ticket_ids[row], value(ticket_names[row]), prices[row], value(validities[row]),
+                                        value(features[row]), bool(discounts[row]),
+                                        None if ticket_capacities[row] < 0 else ticket_capacities[row]))
+        return events
+
+    def load_bookings(self):
+        """Loads the bookings as a BookingStore mapped from the snapshot file, with the journal replayed on top.
+        Returns:
+            tuple: A BookingStore keyed by booking ID, and the next booking ID to allocate.
+        """
+        bookings, next_id = super().load_bookings()
+        return bookings if isinstance(bookings, BookingStore) else BookingStore(bookings), next_id
+
+    def load_payments(self):
+        """Loads the payments as a PaymentStore mapped from the snapshot file, with the journal replayed on top.
+        Returns:
+            tuple: A PaymentStore keyed by payment ID, and the next payment ID to allocate.
+        """
+        payments, next_id = super().load_payments()
+        return payments if isinstance(payments, PaymentStore) else PaymentStore(payments), next_id
+
+def convert_storage(source, target):
+    """Copies every collection from one storage backend to another, such as from pickle files to snapshot files.
+    Journals of the source are replayed into the copy; the target's journals are emptied.
+    Args:
+        source (PickleStorage, ShardedStorage, SnapshotStorage or SqliteStorage): The storage to read.
+        target (PickleStorage, ShardedStorage, SnapshotStorage or SqliteStorage): The storage to write.
+    Returns:
+        dict: The number of users, events, bookings and payments copied.
+    Raises:
+        StorageError: If the data could not be loaded or saved.
+    """
+    users, next_user_id = source.load_users()
+    target.save_users(users, next_user_id)
+    events = source.load_events()
+    target.save_events(events)
+    bookings, next_booking_id = source.load_bookings()
+    target.save_bookings(bookings, next_booking_id)
+    payments, next_payment_id = source.load_payments() # Loaded after the bookings, so sharded payments find their event
+    target.save_payments(payments, next_payment_id)
+    target.clear_journals()
+    target.flush()
+    return {"users": len(users), "events": len(events), "bookings": len(bookings), "payments": len(payments)}
+
+class SqliteTable(MutableMapping):
+    """Dictionary-like view of an SQLite table whose rows hold pickled objects.
+    Objects are only read from the database when they are accessed. Every object handed out stays registered while
+    it is referenced, so objects changed in place are written back by flush().
+    """
+    SCAN_BATCH = 1000 # Rows read per query when iterating over the whole table
+
+    def __init__(self, storage, table, key_column, columns=None, pinned=False):
+        """Initializes the SqliteTable.
+        Args:
+            storage (SqliteStorage): The storage backend owning the database connection.
+            table (str): The name of the table.
+            key_column (str): The name of the primary key column.
+            columns (dict, optional): Indexed columns, mapping each column name to a function extracting its value from an object. Defaults to None.
+            pinned (bool, optional): If True, objects stay in memory once loaded, so state that isn't stored (such as
+                sold seat counters) survives between lookups. Meant for small tables. Defaults to False.
+        """
+        self.storage = storage
+        self.table = table
+        self.key_column = key_column
+        self.columns = columns or {}
+        self.loaded = {} if pinned else weakref.WeakValueDictionary() # Objects currently handed out, keyed by ID
+        column_names = [key_column, *self.columns, "data"]
+        self._insert_sql = f"INSERT OR REPLACE INTO {table} ({', '.join(column_names)}) VALUES ({', '.join('?' * len(column_names))})"
+
+    def _row(self, key, obj):
+        """Builds the column values stored for an object."""
+        return (key, *(extract(obj) for extract in self.columns.values()), pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+
+    def _object(self, key, data):
+        """Returns the registered object for a key, unpickling the row data if it isn't loaded yet."""
+        obj = self.loaded.get(key)
+        if obj is None:
+            obj = load_pickle(io.BytesIO(data))
+            self.loaded[key] = obj
+        return obj
+
+    def __getitem__(self, key):
+        obj = self.loaded.get(key)
+        if obj is not None:
+            return obj
+        row = self.storage.execute(f"SELECT data FROM {self.table} WHERE {self.key_column} = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return self._object(key, row[0])
+
+    def __setitem__(self, key, obj):
+        self.storage.execute(self._insert_sql, self._row(key, obj))
+        self.loaded[key] = obj
+
+    def update(self, other=(), **kwargs):
+        """Inserts or replaces several objects with a single batched statement."""
+        pairs = list(other.items() if hasattr(other, "items") else other) + list(kwargs.items())
+        self.storage.execute_many(self._insert_sql, [self._row(key, obj) for key, obj in pairs])
+        for key, obj in pairs:
+            self.loaded[key] = obj
+
+    def __delitem__(self, key):
+        if self.storage.execute(f"DELETE FROM {self.table} WHERE {self.key_column} = ?", (key,)).rowcount == 0:
+            raise KeyError(key)
+        self.loaded.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self.loaded or self.storage.execute(f"SELECT 1 FROM {self.table} WHERE {self.key_column} = ?", (key,)).fetchone() is not None
+
+    def __iter__(self):
+        return iter([row[0] for row in self.storage.execute(f"SELECT {self.key_column} FROM {self.table} ORDER BY {self.key_column}")])
+
+    def __len__(self):
+        return self.storage.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def values(self):
+        """Yields every object in the table, ordered by ID."""
+        for _, obj in self.items():
+            yield obj
+
+    def items(self):
+        """Yields every (ID, object) pair in the table, ordered by ID, reading the rows in batches."""
+        return self.items_after(None)
+
+    def items_after(self, last_key):
+        """Yields the (ID, object) pairs whose ID is above last_key, ordered by ID, reading the rows in batches.
+        Args:
+            last_key (int): The highest ID already seen, or None to start from the first row.
+        """
+        while True:
+            if last_key is None:
+                rows = self.storage.execute(f"SELECT {self.key_column}, data FROM {self.table} ORDER BY {self.key_column} LIMIT ?", (self.SCAN_BATCH,)).fetchall()
+            else:
+                rows = self.storage.execute(f"SELECT {self.key_column}, data FROM {self.table} WHERE {self.key_column} > ? ORDER BY {self.key_column} LIMIT ?", (last_key, self.SCAN_BATCH)).fetchall()
+            for key, data in rows:
+                yield key, self._object(key, data)
+            if len(rows) < self.SCAN_BATCH:
+                return
+            last_key = rows[-1][0]
+
+    def select(self, column, value, offset=0, limit=None):
+        """Retrieves the objects whose indexed column equals a value.
+        Args:
+            column (str): The name of an indexed column.
+            value: The value to match.
+            offset (int, optional): Number of matching rows to skip. Defaults to 0.
+            limit (int, optional): Maximum number of objects returned. Defaults to None, returning every match.
+        Returns:
+            list: The matching objects, ordered by ID.
+        """
+        if column not in self.columns:
+            raise ValueError(f"Column '{column}' is not indexed on table '{self.table}'.")
+        rows = self.storage.execute(f"SELECT {self.key_column}, data FROM {self.table} WHERE {column} = ? ORDER BY {self.key_column} LIMIT ? OFFSET ?",
+                                    (value, -1 if limit is None else limit, offset)).fetchall()
+        return [self._object(key, data) for key, data in rows]
+
+    def count(self, column, value):
+        """Counts the rows whose indexed column equals a value.
+        Args:
+            column (str): The name of an indexed column.
+            value: The value to match.
+        Returns:
+            int: The number of matching rows.
+        """
+        if column not in self.columns:
+            raise ValueError(f"Column '{column}' is not indexed on table '{self.table}'.")
+        return self.storage.execute(f"SELECT COUNT(*) FROM {self.table} WHERE {column} = ?", (value,)).fetchone()[0]
+
+    def max_key(self):
+        """Returns the highest ID in the table, or 0 if it is empty."""
+        return self.storage.execute(f"SELECT MAX({self.key_column}) FROM {self.table}").fetchone()[0] or 0
+
+    def flush(self):
+        """Writes every object currently handed out back to the table, so in-place changes are stored."""
+        rows = [self._row(key, obj) for key, obj in list(self.loaded.items())]
+        self.storage.execute_many(self._insert_sql, rows)
+
+class SqliteStorage:
+    """Storage backend that keeps every collection in an SQLite database with indexes on the lookup columns.
+    Rows are only read into memory when they are accessed, so large histories don't have to fit in RAM.
+    """
+    native_indexes = True # Lookups are answered by SQL queries against the table indexes
+    journaled = False
+    shared = False # Multi-process mode is only offered by the pickle backends
+    write_behind = None # Every change is committed straight away
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (user_id INTEGER PRIMARY KEY, email TEXT, data BLOB NOT NULL);
+        CREATE INDEX IF NOT EXISTS users_email ON users (email);
+        CREATE TABLE IF NOT EXISTS events (event_id INTEGER PRIMARY KEY, data BLOB NOT NULL);
+        CREATE TABLE IF NOT EXISTS bookings (booking_id INTEGER PRIMARY KEY, user_id INTEGER, event_id INTEGER, booking_date TEXT, data BLOB NOT NULL);
+        CREATE INDEX IF NOT EXISTS bookings_user_id ON bookings (user_id);
+        CREATE INDEX IF NOT EXISTS bookings_event_id ON bookings (event_id);
+        CREATE INDEX IF NOT EXISTS bookings_booking_date ON bookings (booking_date);
+        CREATE TABLE IF NOT EXISTS payments (payment_id INTEGER PRIMARY KEY, booking_id INTEGER, data BLOB NOT NULL);
+        CREATE INDEX IF NOT EXISTS payments_booking_id ON payments (booking_id);
+        CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+    """
+
+    def __init__(self, filename="tickets.db"):
+        """Initializes the SqliteStorage, creating the database schema if needed.
+        Args:
+            filename (str, optional): Filename of the SQLite database. Defaults to "tickets.db".
+        """
+        self.filename = filename
+        self.lock = threading.RLock() # Serializes access to the shared connection
+        self.data_lock = threading.RLock() # Held by the managers while they change the collections handed out here
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.executescript(self.SCHEMA)
+        self.users = SqliteTable(self, "users", "user_id", {"email": lambda user: AccountManager.normalize_email(user.get_email())})
+        self.events = SqliteTable(self, "events", "event_id", pinned=True)
+        self.bookings = SqliteTable(self, "bookings", "booking_id", {"user_id": Booking.get_user_id, "event_id": Booking.get_event_id, "booking_date": Booking.get_booking_date})
+        self.payments = SqliteTable(self, "payments", "payment_id", {"booking_id": Payment.get_booking_id})
+
+    def execute(self, sql, parameters=()):
+        """Executes a single SQL statement on the shared connection."""
+        with self.lock:
+            return self.connection.execute(sql, parameters)
+
+    def execute_many(self, sql, rows):
+        """Executes an SQL statement once per row on the shared connection."""
+        with self.lock:
+            return self.connection.executemany(sql, rows)
+
+    def commit(self, label):
+        """Commits the pending changes.
+        Returns:
+            bool: True once the changes have been committed.
+        Raises:
+            StorageError: If the changes could not be committed.
+        """
+        start = time.perf_counter() if metrics.registry.enabled else None
+        try:
+            with self.lock:
+                self.connection.commit()
+        except sqlite3.Error as e:
+            raise StorageError(f"Could not save {label} data: {e}") from e
+        finally:
+            if start is not None:
+                metrics.registry.observe_storage("commit", label, time.perf_counter() - start)
+        return True
+
+    def _flush(self, table, label):
+        """Writes a table's in-place changes and commits them."""
+        try:
+            table.flush()
+        except sqlite3.Error as e:
+            raise StorageError(f"Could not save {label} data: {e}") from e
+        return self.commit(label)
+
+    def _load_counter(self, name, table):
+        """Reads an ID counter, never returning an ID at or below the highest one in the table."""
+        row = self.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return max(row[0] if row else 1, table.max_key() + 1)
+
+    def _save_counter(self, name, value):
+        """Writes an ID counter. It is committed with the next commit."""
+        self.execute("INSERT OR REPLACE INTO counters (name, value) VALUES (?, ?)", (name, value))
+
+    def load_users(self):
+        """Returns the users table and the next user ID to allocate."""
+        return self.users, self._load_counter('next_user_id', self.users)
+
+    def save_users(self, users, next_user_id):
+        """Writes changed users and the user ID counter to the database."""
+        self._save_counter('next_user_id', next_user_id)
+        return self._flush(users, "user")
+
+    def load_events(self):
+        """Returns the events table."""
+        return self.events
+
+    def save_events(self, events):
+        """Writes changed events to the database."""
+        return self._flush(events, "event")
+
+    def load_bookings(self):
+        """Returns the bookings table and the next booking ID to allocate."""
+        return self.bookings, self._load_counter('next_booking_id', self.bookings)
+
+    def save_bookings(self, bookings, next_booking_id):
+        """Writes changed bookings and the booking ID counter to the database."""
+        self._save_counter('next_booking_id', next_booking_id)
+        return self._flush(bookings, "booking")
+
+    def add_booking(self, bookings, booking, next_booking_id):
+        """Commits a booking already inserted into the bookings table, along with the booking ID counter."""
+        self._save_counter('next_booking_id', next_booking_id)
+        return self.commit("booking")
+
+    def add_bookings(self, bookings, new_bookings, next_booking_id):
+        """Commits a batch of bookings already inserted into the bookings table in one transaction, along with the booking ID counter."""
+        self._save_counter('next_booking_id', next_booking_id)
+        return self.commit("booking")
+
+    def load_payments(self):
+        """Returns the payments table and the next payment ID to allocate."""
+        return self.payments, self._load_counter('next_payment_id', self.payments)
+
+    def save_payments(self, payments, next_payment_id):
+        """Writes changed payments and the payment ID counter to the database."""
+        self._save_counter('next_payment_id', next_payment_id)
+        return self._flush(payments, "payment")
+
+    def add_payment(self, payments, payment, next_payment_id):
+        """Commits a payment already inserted into the payments table, along with the payment ID counter."""
+        self._save_counter('next_payment_id', next_payment_id)
+        return self.commit("payment")
+
+    def add_payments(self, payments, new_payments, next_payment_id):
+        """Commits a batch of payments already inserted into the payments table in one transaction, along with the payment ID counter."""
+        self._save_counter('next_payment_id', next_payment_id)
+        return self.commit("payment")
+
+    def needs_compaction(self):
+        """Returns False, since SQLite manages its own write-ahead journal."""
+        return False
+
+    def locked(self):
+        """Returns a context manager that does nothing, since this backend is not shared between processes."""
+        return nullcontext()
+
+    def poll_changes(self):
+        """Returns no changes, since this backend is not shared between processes."""
+        return {}
+
+    def clear_journals(self):
+        """Does nothing, since this backend keeps no journals of its own."""
+
+    def flush(self):
+        """Returns True at once, since every change is committed when it is made."""
+        return True
+
+    def close(self):
+        """Closes the database connection."""
+        with self.lock:
+            self.connection.close()
+
+# Objects deep_sizeof doesn't descend into: code, modules, and the managers and storages that every store refers back to
+SIZE_SKIP_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+                   sqlite3.Connection, threading.Thread)
+
+def deep_sizeof(obj, sample_size=1000, seen=None, skip=()):
+    """Estimates the memory held by an object and everything it references that nothing measured before references.
+    Containers with more than sample_size entries are measured from an evenly spaced sample of them, scaled up.
+    Objects are walked through their __dict__ and __slots__; mappings that aren't dicts (such as the column stores)
+    are walked through their attributes, so their records aren't materialized.
+    Args:
+        obj (object): The object to measure.
+        sample_size (int, optional): Largest number of entries measured per container. Defaults to 1000.
+        seen (set, optional): IDs of objects already measured, shared between calls to count shared objects once.
+        skip (tuple, optional): More types not to descend into. Defaults to ().
+    Returns:
+        tuple: The estimated size in bytes, and True if any container was sampled.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, SIZE_SKIP_TYPES + skip):
+        return 0, False
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, array)) or obj is None:
+        return size, False
+    if isinstance(obj, dict):
+        count, entries = len(obj), iter(obj.items()) # Keys and values are measured together, one entry per item
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        count, entries = len(obj), ((item,) for item in obj)
+    else:
+        attributes = [vars(obj)] if hasattr(obj, '__dict__') else [] # The instance dictionary with its values
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if name not in ('__dict__', '__weakref__') and hasattr(obj, name):
+                    attributes.append(getattr(obj, name))
+        count, entries = 1, iter([attributes])
+    sampled = count > sample_size
+    step = count // sample_size if sampled else 1
+    measured = child_size = 0
+    for entry in itertools.islice(entries, 0, None, step):
+        for child in entry:
+            child_bytes, child_sampled = deep_sizeof(child, sample_size, seen, skip)
+            child_size += child_bytes
+            sampled = sampled or child_sampled
+        measured += 1
+    if sampled and measured:
+        child_size = child_size * count // measured
+    return size + child_size, sampled
+
+def tracks_allocations(method):
+    """Decorator recording how much memory a DataManager method allocates while allocation tracking is on."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.allocation_tracking:
+            return method(self, *args, **kwargs)
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            after, peak = tracemalloc.get_traced_memory()
+            self._record_allocation(method.__name__, after - before, peak - before)
+    return wrapper
+
+class EventCatalog:
+    """Search index over the race events: exact name lookup, type-ahead by the start of any word in the name, and
+    filters by date range and location. Keys are kept in sorted lists searched with bisect, so a search only reads
+    the events that match instead of scanning the whole calendar.
+    """
+    def __init__(self, events=()):
+        """Initializes the EventCatalog.
+        Args:
+            events (iterable, optional): The RaceEvent objects to index. Defaults to ().
+        """
+        self.entries = {} # Dictionary mapping event IDs to the indexed (normalized name, date, normalized location)
+        self.names = {} # Dictionary mapping normalized names to the IDs of the events with that name
+        self.words = [] # Sorted (name from one of its words onwards, event ID) pairs, for prefix search
+        self.dates = [] # Sorted (date, event ID) pairs, for date range filters
+        self.locations = {} # Dictionary mapping normalized locations to the IDs of the events held there
+        self.location_names = {} # Dictionary mapping normalized locations to how they are spelled
+        for event in events:
+            self.add(event)
+
+    @staticmethod
+    def normalize(text):
+        """Normalizes a name or location so searches ignore case and repeated whitespace."""
+        return " ".join(str(text).lower().split())
+
+    @staticmethod
+    def word_keys(name):
+        """Returns the normalized name from each of its words onwards, so "Grand National" is found by typing
+        "gra" or "nat"."""
+        words = name.split(" ")
+        return {" ".join(words[index:]) for index in range(len(words))}
+
+    def add(self, event):
+        """Indexes an event, replacing what was indexed for its ID before."""
+        event_id = event.get_event_id()
+        self.remove(event_id)
+        name, date, location = self.normalize(event.get_name()), str(event.get_date()), self.normalize(event.get_location())
+        self.entries[event_id] = (name, date, location)
+        self.names.setdefault(name, set()).add(event_id)
+        for key in self.word_keys(name):
+            insort(self.words, (key, event_id))
+        insort(self.dates, (date, event_id))
+        self.locations.setdefault(location, set()).add(event_id)
+        self.location_names.setdefault(location, event.get_location())
+
+    def remove(self, event_id):
+        """Removes an event from the index. Does nothing if it isn't indexed."""
+        indexed = self.entries.pop(event_id, None)
+        if indexed is None:
+            return
+        name, date, location = indexed
+        self.names[name].discard(event_id)
+        if not self.names[name]:
+            del self.names[name]
+        for key in self.word_keys(name):
+            del self.words[bisect_left(self.words, (key, event_id))]
+        del self.dates[bisect_left(self.dates, (date, event_id))]
+        self.locations[location].discard(event_id)
+        if not self.locations[location]:
+            del self.locations[location]
+            del self.location_names[location]
+
+    def find_by_name(self, name):
+        """Returns the ID of the event with a name, ignoring case, or None if there is none. If several events share
+        the name, the earliest one is returned."""
+        event_ids = self.names.get(self.normalize(name))
+        return min(event_ids, key=lambda event_id: (self.entries[event_id][1], event_id)) if event_ids else None
+
+    def search(self, text="", start_date=None, end_date=None, location=None, limit=None):
+        """Finds the events matching every given criterion.
+        Args:
+            text (str, optional): Start of the name or of any word in it, ignoring case. Defaults to "", matching every name.
+            start_date (str, optional): Earliest date, as YYYY-MM-DD. Defaults to None.
+            end_date (str, optional): Latest date, as YYYY-MM-DD. Defaults to None.
+            location (str, optional): Location, ignoring case. Defaults to None, matching every location.
+            limit (int, optional): Maximum number of IDs returned. Defaults to None, returning every match.
+        Returns:
+            list: The IDs of the matching events, ordered by date, then name.
+        """
+        text = self.normalize(text)
+        candidates = None # IDs matching the name and location, None while unrestricted
+        if text:
+            candidates = set()
+            for index in range(bisect_left(self.words, (text,)), len(self.words)):
+                key, event_id = self.words[index]
+                if not key.startswith(text):
+                    break
+                candidates.add(event_id)
+        if location:
+            at_location = self.locations.get(self.normalize(location), set())
+            candidates = at_location if candidates is None else candidates & at_location
+        if candidates is None:
+            # Only the date range is restricted: slice it out of the sorted dates
+            low = bisect_left(self.dates, (start_date,)) if start_date else 0
+            high = bisect_right(self.dates, (end_date, float("inf"))) if end_date else len(self.dates)
+            matches = [event_id for _, event_id in self.dates[low:high]]
+        else:
+            matches = [event_id for event_id in candidates
+                       if (not start_date or self.entries[event_id][1] >= start_date)
+                       and (not end_date or self.entries[event_id][1] <= end_date)]
+        matches.sort(key=lambda event_id: (self.entries[event_id][1], self.entries[event_id][0], event_id))
+        return matches if limit is None else matches[:limit]
+
+    def get_locations(self):
+        """Returns every location with at least one event, sorted alphabetically."""
+        return sorted(self.location_names.values(), key=str.lower)
+
+class DiscountRule:
+    """A discount taking a percentage off discount-eligible tickets, either for groups of a minimum number of seats or
+    for bookings made a minimum number of days before the event (early-bird)."""
+    __slots__ = ('name', 'percent', 'min_quantity', 'days_before', 'ticket_names')
+    def __init__(self, name, percent, min_quantity=None, days_before=None, ticket_names=None):
+        """Initializes a new DiscountRule object.
+        Args:
+            name (str): Name of the discount (e.g., "Group of 5+").
+            percent (float): Percentage taken off the ticket price, between 0 and 100.
+            min_quantity (int, optional): Seats in the cart, over every ticket type, from which the discount applies.
+                Defaults to None.
+            days_before (int, optional): Days between the booking and the event from which the discount applies.
+                Defaults to None.
+            ticket_names (iterable, optional): Names of the ticket types the discount is limited to. Defaults to None,
+                applying it to every ticket type flagged for discounts.
+        Raises:
+            ValueError: If the percentage is out of range, or not exactly one of min_quantity and days_before is set.
+        """
+        if not 0 < percent <= 100:
+            raise ValueError(f"Discount percentage must be between 0 and 100, got {percent}.")
+        if (min_quantity is None) == (days_before is None):
+            raise ValueError("A discount applies either from a group size or from a number of days before the event.")
+        self.name = name
+        self.percent = percent
+        self.min_quantity = min_quantity
+        self.days_before = days_before
+        self.ticket_names = frozenset(ticket_names) if ticket_names is not None else None
+
+    def get_name(self):
+        """Returns the name of the discount."""
+        return self.name
+
+    def get_percent(self):
+        """Returns the percentage taken off the ticket price."""
+        return self.percent
+
+    def applies_to(self, ticket):
+        """Returns True if the discount can apply to a ticket type: it is flagged for discounts and, if the rule is
+        limited to some ticket types, one of them."""
+        return ticket.is_discount_available() and (self.ticket_names is None or ticket.get_name() in self.ticket_names)
+
+# Only the group discount is on by default. Early-bird offers differ per season, so they are passed in as rules,
+# e.g. PricingEngine(DEFAULT_DISCOUNT_RULES + (DiscountRule("Early bird", 10, days_before=60),))
+DEFAULT_DISCOUNT_RULES = (DiscountRule("Group of 5+", 10, min_quantity=5),)
+
+class EventPricing:
+    """Discount rules compiled for the ticket types of one event. Each ticket type gets its group size and early-bird
+    thresholds as sorted lists with the best price factor reached at each, so pricing a cart is one bisect per
+    threshold kind and line instead of a pass over every rule. Only one discount applies to a line: the larger one.
+    """
+    __slots__ = ('event', 'event_day', 'tickets')
+    def __init__(self, event, rules):
+        """Compiles the discount rules for an event.
+        Args:
+            event (RaceEvent): The event to price.
+            rules (iterable): The DiscountRule objects in force.
+        """
+        self.event = event
+        self.event_day = self.day_number(event.get_date()) # None if the event date can't be read, disabling early-bird
+        self.tickets = {} # Dictionary mapping ticket names to (price, group thresholds, early-bird thresholds, ticket if it has a minimum quantity)
+        compiled = {} # Thresholds already built, shared by ticket types that the same rules apply to
+        for ticket in event.get_available_tickets():
+            applicable = tuple(rule for rule in rules if rule.applies_to(ticket))
+            if applicable not in compiled:
+                compiled[applicable] = (self.thresholds([(rule.min_quantity, rule.percent) for rule in applicable if rule.min_quantity is not None]),
+                                        self.thresholds([(rule.days_before, rule.percent) for rule in applicable if rule.days_before is not None]))
+            self.tickets[ticket.get_name()] = (ticket.get_price(), *compiled[applicable], ticket if ticket.get_min_quantity() > 1 else None)
+
+    @staticmethod
+    def thresholds(rules):
+        """Sorts (threshold, percent) pairs into a list of thresholds and the best price factor reached at each."""
+        limits, factors = [], []
+        for limit, percent in sorted(rules):
+            factor = 1 - percent / 100
+            if limits and limits[-1] == limit:
+                factors[-1] = min(factors[-1], factor)
+            else:
+                limits.append(limit)
+                factors.append(min(factor, factors[-1]) if factors else factor)
+        return limits, factors
+
+    @staticmethod
+    def day_number(date):
+        """Returns the day number (proleptic Gregorian ordinal) of a "YYYY-MM-DD" date or timestamp, or None if it
+        can't be read."""
+        try:
+            return datetime.strptime(str(date)[:10], '%Y-%m-%d').toordinal()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def factor(thresholds, value):
+        """Returns the price factor reached by a value in compiled thresholds, 1.0 below the first one."""
+        limits, factors = thresholds
+        index = bisect_right(limits, value) - 1
+        return factors[index] if index >= 0 else 1.0
+
+    def unit_prices(self, selected_tickets, booking_day):
+        """Prices the lines of a cart.
+        Args:
+            selected_tickets (dict): A dictionary of ticket names and their quantities.
+            booking_day (int): Day number of the booking, see day_number.
+        Returns:
+            dict: The price of a single ticket per ticket name, rounded to cents. Unknown ticket types and empty
+                quantities are left out.
+        Raises:
+            ValueError: If a ticket type is below its minimum quantity.
+        """
+        tickets = self.tickets
+        seats = sum(quantity for name, quantity in selected_tickets.items() if quantity > 0 and name in tickets)
+        days = self.event_day - booking_day if self.event_day is not None and booking_day is not None else None
+        prices = {}
+        for name, quantity in selected_tickets.items():
+            line = tickets.get(name)
+            if line is None or quantity <= 0:
+                continue
+            price, group, early, restricted = line
+            if restricted is not None:
+                restricted.check_quantity(quantity)
+            factor = self.factor(group, seats) if group[0] else 1.0
+            if early[0] and days is not None:
+                factor = min(factor, self.factor(early, days))
+            prices[name] = round(price * factor, 2) if factor < 1.0 else price
+        return prices
+
+    def total(self, selected_tickets, booking_day):
+        """Returns the total price of a cart, see unit_prices."""
+        return sum(price * selected_tickets[name] for name, price in self.unit_prices(selected_tickets, booking_day).items())
+
+class PricingEngine:
+    """Prices carts of tickets under a set of discount rules. The rules are compiled once per event into an
+    EventPricing and reused until the event is replaced or invalidate() is called after its tickets change.
+    """
+    def __init__(self, rules=DEFAULT_DISCOUNT_RULES):
+        """Initializes the PricingEngine.
+        Args:
+            rules (iterable, optional): The DiscountRule objects in force. Defaults to DEFAULT_DISCOUNT_RULES.
+        """
+        self.rules = tuple(rules)
+        self.compiled = {} # Dictionary mapping event IDs to their EventPricing
+
+    def get_rules(self):
+        """Returns the DiscountRule objects in force."""
+        return self.rules
+
+    def for_event(self, event):
+        """Returns the compiled pricing of an event, compiling it on first use or if the event object was replaced."""
+        pricing = self.compiled.get(event.get_event_id())
+        if pricing is None or pricing.event is not event:
+            pricing = self.compiled[event.get_event_id()] = EventPricing(event, self.rules)
+        return pricing
+
+    def invalidate(self, event_id=None):
+        """Discards compiled pricing, so it is rebuilt from the current tickets and discount flags.
+        Args:
+            event_id (int, optional): The event whose pricing is discarded. Defaults to None, discarding every event's.
+        """
+        if event_id is None:
+            self.compiled = {}
+        else:
+            self.compiled.pop(event_id, None)
+
+class HistoryAttribute:
+    """DataManager attribute filled in by the booking and payment history load.
+    Reading it waits until the history has loaded, so a DataManager created with lazy=True can be used straight away.
+    """
+    def __set_name__(self, owner, name):
+        self.name = '_' + name
+
+    def __get__(self, data_manager, owner=None):
+        if data_manager is None:
+            return self
+        data_manager.wait_until_loaded()
+        return data_manager.__dict__[self.name]
+
+    def __set__(self, data_manager, value):
+        data_manager.__dict__[self.name] = value
+
+class DataManager:
+    """Manages the storage and retrieval of application data, including users, events, bookings, and payments."""
+    def __init__(self, user_file="users.pkl", event_file="events.pkl", booking_file="bookings.pkl", payment_file="payments.pkl", journal=False, compact_threshold=10000, storage=None, columnar=False, lazy=False, shared=False, write_behind=None, track_allocations=False, pricing=None):
+        """Initializes the DataManager.
+        Args:
+            user_file (str, optional): Filename for storing user data. Defaults to "users.pkl".
+            event_file (str, optional): Filename for storing event data. Defaults to "events.pkl".
+            booking_file (str, optional): Filename for storing booking data. Defaults to "bookings.pkl".
+            payment_file (str, optional): Filename for storing payment data. Defaults to "payments.pkl".
+            journal (bool, optional): If True, new bookings and payments are appended to a log next to their snapshot file
+                instead of rewriting the whole file. Defaults to False.
+            compact_threshold (int, optional): Number of journal records after which the logs are folded back into the snapshots. Defaults to 10000.
+            storage (PickleStorage, ShardedStorage or SqliteStorage, optional): The storage backend to use. The filename and journal
+                arguments only configure the default PickleStorage. Defaults to None.
+            columnar (bool, optional): If True, bookings and payments held in memory are kept in struct-of-arrays stores
+                (BookingStore and PaymentStore) that hand out read-only views, instead of one object per record. Cuts
+                memory use for large datasets. Has no effect with SqliteStorage, which already loads records on demand,
+                or SnapshotStorage, which always loads them into column stores. Defaults to False.
+            lazy (bool, optional): If True, only events and users are loaded before returning. Bookings and payments
+                load in a background thread, and anything that needs them waits for it to finish. Defaults to False.
+            shared (bool, optional): If True, the default PickleStorage is shared with other processes using the same
+                files, such as other box office terminals. Changes are made in transactions. Defaults to False.
+            write_behind (float, optional): If set, the default PickleStorage queues changes and a background flusher
+                writes them this many seconds later, coalescing bursts into one write per file. Call flush() before
+                confirming anything that must survive a crash, and close() on shutdown. Defaults to None.
+            track_allocations (bool, optional): If True, allocation tracking starts before anything is loaded, so the
+                loads are measured too. See start_allocation_tracking. Defaults to False.
+            pricing (PricingEngine, optional): Prices quotes and bookings. Defaults to None, using a PricingEngine with
+                the DEFAULT_DISCOUNT_RULES.
+        """
+        if storage is None:
+            storage = PickleStorage(user_file, event_file, booking_file, payment_file, journal, compact_threshold, shared, write_behind)
+        self.storage = storage # Storage backend persisting every collection
+        self.lock = storage.data_lock # Serializes ID allocation and writes to the stores across checkout threads
+        self.columnar = columnar and not storage.native_indexes # Keep bookings and payments in column stores
+        self.history_loaded = threading.Event() # Set once bookings and payments have been loaded
+        self.history_loader = None # Thread loading bookings and payments, in the background when lazy
+        self.history_error = None # StorageError raised by the background load, re-raised to whoever waits for it
+        self.booking_revision = 0 # Incremented whenever a stored booking changes in place, such as when it is cancelled
+        self.allocations = {} # Memory allocated per tracked method, see allocation_report()
+        self.allocation_lock = threading.Lock() # Guards the allocation totals, updated from checkout threads
+        if track_allocations:
+            self.start_allocation_tracking()
+        self.events = self.load_events() # Loads race event data; sold seat counters are filled in with the bookings
+        self.catalog = EventCatalog(self.events.values()) # Name, date and location search index over the events
+        self.pricing = pricing or PricingEngine() # Discount rules, compiled per event
+        if lazy:
+            self.history_loader = threading.Thread(target=self._load_history_in_background, name="history-loader", daemon=True)
+            self.history_loader.start()
+        self.user_manager = AccountManager(user_file, storage) # Manages user accounts, loaded while the history loads
+        self.user_manager.transaction = self.transaction # Account changes merge every kind of record changed elsewhere
+        if not lazy:
+            self.load_history()
+
+    allocation_tracking = False # True while tracemalloc measures the methods marked with tracks_allocations
+
+    bookings = HistoryAttribute() # Booking objects keyed by booking ID
+    payments = HistoryAttribute() # Payment objects keyed by payment ID
+    bookings_by_user = HistoryAttribute() # Dictionary mapping user IDs to the IDs of their bookings
+    bookings_by_event = HistoryAttribute() # Dictionary mapping event IDs to the IDs of their bookings
+    payments_by_booking = HistoryAttribute() # Dictionary mapping booking IDs to the IDs of their payments
+    sales = HistoryAttribute() # Running sales totals per event ID and ticket name, see get_sales_totals()
+    next_booking_id = HistoryAttribute() # Next unique booking ID, persisted with the bookings
+    next_payment_id = HistoryAttribute() # Next unique payment ID, persisted with the payments
+
+    def load_history(self):
+        """Loads the bookings and payments and rebuilds the booking indexes, sales totals and sold seat counters.
+        Raises:
+            StorageError: If the data could not be loaded.
+        """
+        self.history_loader = threading.current_thread() # Lets this thread read the attributes it is filling in
+        self.bookings = self.load_bookings() # Loads booking data and the next booking ID
+        self.payments = self.load_payments() # Loads payment data and the next payment ID
+        self.history_loaded.set()
+
+    def _load_history_in_background(self):
+        """Runs load_history on the loader thread, keeping any error for the threads waiting on it."""
+        try:
+            self.load_history()
+        except Exception as e:
+            self.history_error = e if isinstance(e, StorageError) else StorageError(f"Could not load booking data: {e}")
+            self.history_loaded.set()
+
+    def wait_until_loaded(self, timeout=None):
+        """Waits for the bookings and payments to finish loading. Returns at once if they already have.
+        Args:
+            timeout (float, optional): Maximum number of seconds to wait. Defaults to None, waiting as long as needed.
+        Returns:
+            bool: True if the history has loaded, False if the timeout expired first.
+        Raises:
+            StorageError: If the background load failed.
+        """
+        if not self.history_loaded.is_set():
+            if threading.current_thread() is self.history_loader:
+                return True # The loader itself fills in the attributes
+            if not self.history_loaded.wait(timeout):
+                return False
+        if self.history_error is not None:
+            raise self.history_error
+        return True
+
+    @contextmanager
+    def transaction(self):
+        """Runs a block of changes as one step among processes sharing the data files (a storage created with
+        shared=True). The file lock is taken and whatever other processes committed is merged in first (see sync), so
+        seat counts and IDs are current, and both are held until the block ends. Unless shared, only the data lock is
+        taken, and only when writing behind, so the flusher never pickles a half-made change.
+        """
+        if not self.storage.shared:
+            with self.lock if self.storage.write_behind is not None else nullcontext():
+                yield # The write-behind flusher must not pickle the collections halfway through a change
+            return
+        with self.lock, self.storage.locked():
+            self.sync()
+            yield
+
+    @metrics.timed()
+    def flush(self):
+        """Returns once every change made so far is on disk, writing whatever the write-behind flusher still has
+        queued. Does nothing more when changes are written straight away.
+        Returns:
+            bool: True once every change has been saved.
+        Raises:
+            StorageError: If a change could not be saved.
+        """
+        return self.storage.flush()
+
+    def close(self):
+        """Saves every queued change and releases the storage backend. Call it when the application shuts down.
+        Raises:
+            StorageError: If a change could not be saved.
+        """
+        self.storage.close()
+
+    @metrics.timed()
+    def sync(self):
+        """Merges the changes other processes sharing the data files have committed since this one last read or wrote
+        them. New journal records are applied one by one; collections whose snapshot was rewritten are reloaded.
+        Returns:
+            set: The kinds of records ("users", "events", "bookings", "payments") that changed.
+        Raises:
+            StorageError: If the changed data could not be loaded.
+        """
+        with self.lock:
+            changes = self.storage.poll_changes()
+            if "users" in changes:
+                self.user_manager.load_data()
+            if "events" in changes:
+                self.events = self.load_events()
+                self.catalog = EventCatalog(self.events.values())
+                self.pricing.invalidate()
+                changes["bookings"] = None # The new event objects need their sold seat counters rebuilt
+            new_bookings = changes.get("bookings", [])
+            if new_bookings is None or any(booking_id in self.bookings for booking_id, _ in new_bookings):
+                self.bookings = self.load_bookings()
+            else:
+                for booking_id, booking in new_bookings:
+                    self.bookings[booking_id] = booking
+                    self._index_booking(booking)
+                    self._count_sales(booking)
+                    self._add_to_sales(booking)
+                    self.next_booking_id = max(self.next_booking_id, booking_id + 1)
+            new_payments = changes.get("payments", [])
+            if new_payments is None:
+                self.payments = self.load_payments()
+            else:
+                for payment_id, payment in new_payments:
+                    self.payments[payment_id] = payment
+                    self._index_payment(payment)
+                    self.next_payment_id = max(self.next_payment_id, payment_id + 1)
+            return set(changes)
+
+    def get_next_id(self, data_dict):
+        """Finds the next available ID in a dictionary of data.
+        Args:
+            data_dict (dict): A dictionary where keys are IDs.
+        Returns:
+            int: The next highest ID, or 0 if the dictionary is empty.
+        """
+        return highest_key(data_dict)
+
+    def get_account_manager(self):
+        """Returns the AccountManager instance."""
+        return self.user_manager
+
+    def get_events(self):
+        """Returns a list of all RaceEvent objects."""
+        return list(self.events.values())
+
+    def get_event(self, event_id):
+        """Retrieves a RaceEvent object by its ID.
+        Args:
+            event_id (int): The ID of the event to retrieve.
+        Returns:
+            RaceEvent: The RaceEvent object if found, otherwise None.
+        """
+        return self.events.get(event_id)
+
+    def find_event_by_name(self, name):
+        """Retrieves a RaceEvent object by its name, ignoring case.
+        Args:
+            name (str): The name of the event.
+        Returns:
+            RaceEvent: The RaceEvent object if found, otherwise None. If several events share the name, the earliest.
+        """
+        event_id = self.catalog.find_by_name(name)
+        return self.get_event(event_id) if event_id is not None else None
+
+    @metrics.timed()
+    def search_events(self, text="", start_date=None, end_date=None, location=None, limit=None):
+        """Finds events for type-ahead search through the event catalog index.
+        Args:
+            text (str, optional): Start of the event name or of any word in it, ignoring case. Defaults to "",
+                matching every event.
+            start_date (str, optional): Earliest event date, as YYYY-MM-DD. Defaults to None.
+            end_date (str, optional): Latest event date, as YYYY-MM-DD. Defaults to None.
+            location (str, optional): Location of the event, ignoring case. Defaults to None, matching every location.
+            limit (int, optional): Maximum number of events returned. Defaults to None, returning every match.
+        Returns:
+            list: The matching RaceEvent objects, ordered by date, then name.
+        """
+        return [self.events[event_id] for event_id in self.catalog.search(text, start_date, end_date, location, limit)]
+
+    def get_event_locations(self):
+        """Returns every location with at least one event, sorted alphabetically."""
+        return self.catalog.get_locations()
+
+    def add_event(self, event):
+        """Adds a new RaceEvent object to the stored events.
+        Args:
+            event (RaceEvent): The RaceEvent object to add.
+        """
+        with self.transaction():
+            self.wait_until_loaded() # The history loader walks the events while it counts sold seats
+            self.events[event.get_event_id()] = event
+            self.catalog.add(event)
+            self.save_events() # Persist the updated event data
+
+    @metrics.timed()
+    def save_events(self):
+        """Saves the race event data to the storage backend.
+        Returns:
+            bool: True once the data has been saved.
+        Raises:
+            StorageError: If the data could not be saved.
+        """
+        self.pricing.invalidate() # Prices and discount flags may have changed since the events were last saved
+        return self.storage.save_events(self.events)
+
+    @metrics.timed()
+    @tracks_allocations
+    def load_events(self):
+        """Loads the race event data from the storage backend.
+        Returns:
+            dict: A dictionary containing RaceEvent objects, or an empty dictionary if no data exists or loading fails.
+        """
+        return self.storage.load_events()
+
+    @metrics.timed()
+    @tracks_allocations
+    def create_booking(self, user_id, event_id, selected_tickets):
+        """Creates a new booking for a user for a specific event.
+        Args:
+            user_id (int): The ID of the user making the booking.
+            event_id (int): The ID of the event being booked.
+            selected_tickets (dict): A dictionary of ticket names and their quantities.
+        Raises:
+            ValueError: If no known ticket type is selected, there aren't enough seats left for the selected tickets,
+                or a ticket type is below its minimum quantity.
+        Returns:
+            Booking: The newly created Booking object if successful, otherwise None.
+        """
+        with self.transaction():
+            event = self.get_event(event_id) # Retrieve the event details
+            if not event or not self.user_manager.get_user(user_id): # Only existing users can book existing events
+                return None
+            # Unknown ticket types and empty quantities are ignored
+            selected_tickets = {name: quantity for name, quantity in selected_tickets.items() if quantity > 0 and event.get_ticket(name)}
+            if not selected_tickets:
+                raise ValueError("No valid tickets selected.") # As create_bookings_bulk reports it
+            self.reserve(event_id, selected_tickets) # Claim the seats first so concurrent checkouts can't oversell
+            with self.lock:
+                booking_id = self.next_booking_id
+                self.next_booking_id += 1
+                booking = Booking(booking_id, user_id, event_id) # Create a new Booking object
+                prices = self.pricing.for_event(event).unit_prices(selected_tickets, EventPricing.day_number(booking.get_booking_date()))
+                for ticket_name, quantity in selected_tickets.items():
+                    booking.add_ticket(event.get_ticket(ticket_name), quantity, prices.get(ticket_name)) # One line item per ticket type, priced at today's discounted price
+                self.bookings[booking_id] = booking # Store the booking
+                self._index_booking(booking) # The user's history is resolved through the booking indexes
+                self._add_to_sales(booking)
+                try:
+                    self.storage.add_booking(self.bookings, booking, self.next_booking_id) # Persist the new booking data
+                except Exception:
+                    # Nothing of a booking that wasn't saved may stay behind, or a later save would persist it
+                    self._discard_bookings([(booking, selected_tickets)], booking_id)
+                    raise
+                if self.storage.needs_compaction():
+                    self.compact()
+            return booking
+
+    @metrics.timed()
+    def cancel_booking(self, booking_id):
+        """Cancels a booking, returning its seats to the event and taking it out of the sales totals.
+        Args:
+            booking_id (int): The ID of the booking.
+        Returns:
+            bool: True if the booking was cancelled, False if it doesn't exist or was already cancelled.
+        Raises:
+            StorageError: If the cancellation could not be saved. The booking is left as it was.
+        """
+        with self.transaction():
+            with self.lock:
+                booking = self.bookings.get(booking_id)
+                if booking is None or booking.get_status() == "Cancelled":
+                    return False
+                # Stored records may be read-only views, so the cancelled booking is a new object replacing the old
+                cancelled = Booking(booking_id, booking.get_user_id(), booking.get_event_id(), booking.get_booking_date(), "Cancelled")
+                cancelled.items = list(booking.get_items())
+                cancelled.total_amount = booking.calculate_total()
+                self._remove_from_sales(booking)
+                self.bookings[booking_id] = cancelled
+                self.booking_revision += 1
+                try:
+                    self.storage.add_booking(self.bookings, cancelled, self.next_booking_id)
+                except Exception:
+                    self.bookings[booking_id] = booking
+                    self._add_to_sales(booking)
+                    raise
+            seats = {}
+            for item in cancelled.get_items():
+                seats[item.get_name()] = seats.get(item.get_name(), 0) + item.get_quantity()
+            self.release(cancelled.get_event_id(), seats)
+            return True
+
+    def reserve(self, event_id, selected_tickets):
+        """Atomically reserves seats for an event. Only the event's own lock is held, so events don't contend.
+        Args:
+            event_id (int): The ID of the event.
+            selected_tickets (dict): A dictionary of ticket names and their quantities.
+        Raises:
+            ValueError: If the event or a ticket type doesn't exist, or there isn't enough capacity left.
+        """
+        self.wait_until_loaded() # Sold seat counters are only complete once every booking has been counted
+        event = self.get_event(event_id)
+        if not event:
+            raise ValueError(f"Event ID {event_id} does not exist.")
+        event.reserve(selected_tickets)
+
+    def release(self, event_id, selected_tickets):
+        """Returns previously reserved seats to an event's inventory.
+        Args:
+            event_id (int): The ID of the event.
+            selected_tickets (dict): A dictionary of ticket names and their quantities.
+        """
+        self.wait_until_loaded()
+        event = self.get_event(event_id)
+        if event:
+            event.release(selected_tickets)
+
+    @metrics.timed()
+    def create_bookings_bulk(self, requests):
+        """Creates many bookings at once, allocating their IDs in one block and persisting them with a single write.
+        Every request is validated and its seats reserved first. Requests that fail are reported and skipped,
+        without stopping the rest of the batch.
+        Args:
+            requests (list): A list of (user_id, event_id, selected_tickets) tuples, as passed to create_booking.
+        Returns:
+            tuple: A list with the new Booking object (or None if it failed) for each request, and a list of
+                (request index, error message) tuples for the requests that failed.
+        """
+        with self.transaction():
+            self.wait_until_loaded() # Sold seat counters are only complete once every booking has been counted
+            results = [None] * len(requests)
+            failures = []
+            accepted = [] # (request index, user ID, event, tickets) of the requests that passed validation
+            for index, (user_id, event_id, selected_tickets) in enumerate(requests):
+                event = self.get_event(event_id)
+                if not event:
+                    failures.append((index, f"Event ID {event_id} does not exist."))
+                    continue
+                if not self.user_manager.get_user(user_id):
+                    failures.append((index, f"User ID {user_id} does not exist."))
+                    continue
+                selected_tickets = {name: quantity for name, quantity in selected_tickets.items() if quantity > 0 and event.get_ticket(name)}
+                if not selected_tickets:
+                    failures.append((index, "No valid tickets selected."))
+                    continue
+                try:
+                    event.reserve(selected_tickets)
+                except ValueError as e:
+                    failures.append((index, str(e)))
+                    continue
+                accepted.append((index, user_id, event, selected_tickets))
+            if not accepted:
+                return results, failures
+            with self.lock:
+                first_id = self.next_booking_id
+                self.next_booking_id += len(accepted)
+                new_bookings = {}
+                for booking_id, (index, user_id, event, selected_tickets) in enumerate(accepted, start=first_id):
+                    booking = Booking(booking_id, user_id, event.get_event_id())
+                    prices = self.pricing.for_event(event).unit_prices(selected_tickets, EventPricing.day_number(booking.get_booking_date()))
+                    for ticket_name, quantity in selected_tickets.items():
+                        booking.add_ticket(event.get_ticket(ticket_name), quantity, prices.get(ticket_name))
+                    new_bookings[booking_id] = booking
+                    results[index] = booking
+                self.bookings.update(new_bookings)
+                for booking in new_bookings.values():
+                    self._index_booking(booking)
+                    self._add_to_sales(booking)
+                try:
+                    self.storage.add_bookings(self.bookings, list(new_bookings.values()), self.next_booking_id) # One write for the whole batch
+                except Exception:
+                    self._discard_bookings([(results[index], selected_tickets) for index, _, _, selected_tickets in accepted], first_id)
+                    raise
+                if self.storage.needs_compaction():
+                    self.compact()
+            return results, failures
+
+    @metrics.timed()
+    def quote(self, event_id, selected_tickets, booking_date=None):
+        """Calculates the price of a cart of tickets without booking it, after discounts.
+        Args:
+            event_id (int): The ID of the event.
+            selected_tickets (dict): A dictionary of ticket names and their quantities.
+            booking_date (str, optional): Date the cart would be booked on, as YYYY-MM-DD. Defaults to None, meaning today.
+        Returns:
+            float: The total price. Unknown ticket types are ignored.
+        Raises:
+            ValueError: If a ticket type is below its minimum quantity.
+        """
+        return sum(price * selected_tickets[name] for name, price in self.get_unit_prices(event_id, selected_tickets, booking_date).items())
+
+    def get_unit_prices(self, event_id, selected_tickets, booking_date=None):
+        """Prices each line of a cart of tickets, after discounts.
+        Args:
+            event_id (int): The ID of the event.
+            selected_tickets (dict): A dictionary of ticket names and their quantities.
+            booking_date (str, optional): Date the cart would be booked on, as YYYY-MM-DD. Defaults to None, meaning today.
+        Returns:
+            dict: The price of a single ticket per ticket name. Unknown ticket types and empty quantities are left out,
+                as is everything if the event doesn't exist.
+        Raises:
+            ValueError: If a ticket type is below its minimum quantity.
+        """
+        event = self.get_event(event_id)
+        if not event:
+            return {}
+        return self.pricing.for_event(event).unit_prices(selected_tickets, EventPricing.day_number(booking_date or datetime.now().strftime('%Y-%m-%d')))
+
+    @metrics.timed()
+    def quote_batch(self, carts, booking_date=None):
+        """Calculates the prices of many carts at once, as quote() would one by one. Each event's compiled pricing
+        is looked up once for the whole batch.
+        Args:
+            carts (iterable): (event ID, selected tickets) pairs, the selected tickets being a dictionary of ticket
+                names and their quantities.
+            booking_date (str, optional): Date the carts would be booked on, as YYYY-MM-DD. Defaults to None, meaning today.
+        Returns:
+            list: The total price of each cart, in order. Carts for events that don't exist cost 0.
+        Raises:
+            ValueError: If a ticket type is below its minimum quantity in a cart.
+        """
+        booking_day = EventPricing.day_number(booking_date or datetime.now().strftime('%Y-%m-%d'))
+        pricings = {} # Dictionary mapping event IDs to their EventPricing, or None if the event doesn't exist
+        totals = []
+        for event_id, selected_tickets in carts:
+            pricing = pricings.get(event_id, False)
+            if pricing is False:
+                event = self.get_event(event_id)
+                pricing = pricings[event_id] = self.pricing.for_event(event) if event else None
+            totals.append(pricing.total(selected_tickets, booking_day) if pricing else 0)
+        return totals
+
+    @metrics.timed()
+    def get_bookings_for_user(self, user_id, offset=0, limit=None):
+        """Retrieves the bookings made by a specific user, oldest first, or one page of them.
+        Args:
+            user_id (int): The ID of the user.
+            offset (int, optional): Number of bookings to skip. Defaults to 0.
+            limit (int, optional): Maximum number of bookings returned. Defaults to None, returning all of them.
+        Returns:
+            list: A list of Booking objects associated with the user. Only the returned page is read or materialized.
+        """
+        if self.storage.native_indexes:
+            return self.bookings.select("user_id", user_id, offset, limit)
+        booking_ids = self.bookings_by_user.get(user_id, [])
+        return [self.bookings[booking_id] for booking_id in booking_ids[offset:None if limit is None else offset + limit]]
+
+    def count_bookings_for_user(self, user_id):
+        """Counts the bookings made by a specific user without loading them.
+        Args:
+            user_id (int): The ID of the user.
+        Returns:
+            int: The number of bookings made by the user.
+        """
+        if self.storage.native_indexes:
+            return self.bookings.count("user_id", user_id)
+        return len(self.bookings_by_user.get(user_id, []))
+
+    @metrics.timed()
+    def get_bookings_for_event(self, event_id):
+        """Retrieves all bookings made for a specific event.
+        Args:
+            event_id (int): The ID of the event.
+        Returns:
+            list: A list of Booking objects for the event.
+        """
+        if self.storage.native_indexes:
+            return self.bookings.select("event_id", event_id)
+        return [self.bookings[booking_id] for booking_id in self.bookings_by_event.get(event_id, [])]
+
+    def count_bookings_for_event(self, event_id):
+        """Counts the bookings made for a specific event without loading them.
+        Args:
+            event_id (int): The ID of the event.
+        Returns:
+            int: The number of bookings for the event.
+        """
+        if self.storage.native_indexes:
+            return self.bookings.count("event_id", event_id)
+        return len(self.bookings_by_event.get(event_id, []))
+
+    def _index_booking(self, booking):
+        """Adds a booking to the user and event booking indexes."""
+        if not self.storage.native_indexes:
+            self.bookings_by_user.setdefault(booking.get_user_id(), []).append(booking.get_booking_id())
+            self.bookings_by_event.setdefault(booking.get_event_id(), []).append(booking.get_booking_id())
+
+    def _unindex_booking(self, booking):
+        """Removes a booking from the user and event booking indexes."""
+        if not self.storage.native_indexes:
+            for index, key in ((self.bookings_by_user, booking.get_user_id()), (self.bookings_by_event, booking.get_event_id())):
+                booking_ids = index.get(key, [])
+                if booking.get_booking_id() in booking_ids:
+                    booking_ids.remove(booking.get_booking_id())
+                    if not booking_ids:
+                        del index[key]
+
+    def _discard_bookings(self, new_bookings, next_booking_id):
+        """Undoes the creation of bookings whose save failed. Called with the data lock held.
+        Args:
+            new_bookings (list): (Booking, selected tickets) pairs, the selected tickets being the reserved cart.
+            next_booking_id (int): The booking ID counter before the bookings were created.
+        """
+        for booking, selected_tickets in new_bookings:
+            self.bookings.pop(booking.get_booking_id(), None)
+            self._unindex_booking(booking)
+            self._remove_from_sales(booking)
+            self.release(booking.get_event_id(), selected_tickets)
+        self.next_booking_id = next_booking_id
+
+    @metrics.timed()
+    def save_bookings(self):
+        """Saves the booking data to the storage backend.
+        Returns:
+            bool: True once the data has been saved.
+        Raises:
+            StorageError: If the data could not be saved.
+        """
+        return self.storage.save_bookings(self.bookings, self.next_booking_id)
+
+    @metrics.timed()
+    @tracks_allocations
+    def load_bookings(self):
+        """Loads the booking data and the next booking ID from the storage backend.
+        Returns:
+            dict: A dictionary containing Booking objects, or an empty dictionary if no data exists or loading fails.
+        """
+        bookings, self.next_booking_id = self.storage.load_bookings()
+        if self.columnar and isinstance(bookings, ShardedMapping):
+            bookings.convert_shards(BookingStore) # One column store per event shard
+        elif self.columnar and not isinstance(bookings, BookingStore):
+            bookings = BookingStore(bookings) # Converts snapshots saved as a dictionary of Booking objects
+        self.bookings_by_user = {}
+        self.bookings_by_event = {}
+        self.sales = {}
+        for event in self.events.values():
+            event.reset_sales()
+        if isinstance(bookings, BookingStore) and not self.storage.native_indexes:
+            # Rebuild the indexes and totals from the columns, without a view and line items per booking
+            self.bookings_by_user = bookings.group_ids("user_ids")
+            self.bookings_by_event = bookings.group_ids("event_ids")
+            self.sales = bookings.sales_totals()
+            for event_id, event_sales in self.sales.items():
+                event = self.events.get(event_id)
+                if event:
+                    for ticket_name, totals in event_sales.items():
+                        event.record_sale(ticket_name, totals["units"])
+            return bookings
+        for booking in bookings.values():
+            self._index_booking(booking)
+            self._count_sales(booking)
+            self._add_to_sales(booking)
+        return bookings
+
+    def _count_sales(self, booking):
+        """Adds a stored booking's tickets to its event's sold seat counters."""
+        event = self.events.get(booking.get_event_id())
+        if event and booking.get_status() != "Cancelled":
+            for item in booking.get_items():
+                event.record_sale(item.get_name(), item.get_quantity())
+
+    def _add_to_sales(self, booking):
+        """Adds a booking's line items to the running sales totals."""
+        if booking.get_status() == "Cancelled":
+            return
+        event_sales = self.sales.setdefault(booking.get_event_id(), {})
+        for item in booking.get_items():
+            totals = event_sales.setdefault(item.get_name(), {"units": 0, "revenue": 0.0, "discounted_units": 0})
+            totals["units"] += item.get_quantity()
+            totals["revenue"] += item.get_subtotal()
+            if item.is_discount_available():
+                totals["discounted_units"] += item.get_quantity()
+
+    def _remove_from_sales(self, booking):
+        """Subtracts a booking's line items from the running sales totals."""
+        if booking.get_status() == "Cancelled":
+            return
+        event_sales = self.sales.get(booking.get_event_id(), {})
+        for item in booking.get_items():
+            totals = event_sales.get(item.get_name())
+            if totals:
+                totals["units"] -= item.get_quantity()
+                totals["revenue"] -= item.get_subtotal()
+                if item.is_discount_available():
+                    totals["discounted_units"] -= item.get_quantity()
+                if not totals["units"]:
+                    del event_sales[item.get_name()]
+        if not event_sales:
+            self.sales.pop(booking.get_event_id(), None)
+
+    @metrics.timed()
+    def get_sales_totals(self):
+        """Returns the running sales totals, kept up to date as bookings are created.
+        Returns:
+            dict: A dictionary where keys are event IDs and values are dictionaries mapping ticket names to their
+                "units" sold, "revenue" and "discounted_units" (units sold while flagged for discounts).
+        """
+        with self.lock:
+            return {event_id: {ticket_name: dict(totals) for ticket_name, totals in event_sales.items()}
+                    for event_id, event_sales in self.sales.items()}
+
+    @metrics.timed()
+    def get_sales_report(self):
+        """Returns the ticket sales report without walking the bookings.
+        Returns:
+            dict: A dictionary where keys are event IDs and values are dictionaries of ticket names and their sales counts,
+                in the same shape as Admin.view_report.
+        """
+        with self.lock:
+            return {event_id: {ticket_name: totals["units"] for ticket_name, totals in event_sales.items()}
+                    for event_id, event_sales in self.sales.items()}
+
+    @metrics.timed()
+    def create_payment(self, booking_id, amount, method):
+        """Creates a new payment record for a booking.
+        Args:
+            booking_id (int): The ID of the booking the payment is for.
+            amount (float): The amount paid.
+            method (str): The payment method used.
+        Returns:
+            Payment: The newly created Payment object.
+        """
+        with self.transaction():
+            with self.lock:
+                payment_id = self.next_payment_id
+                self.next_payment_id += 1
+                payment = Payment(payment_id, booking_id, amount, method=method) # Create a new Payment object
+                self.payments[payment_id] = payment # Store the payment
+                self._index_payment(payment)
+                try:
+                    self.storage.add_payment(self.payments, payment, self.next_payment_id) # Persist the new payment data
+                except Exception:
+                    self._discard_payments([payment], payment_id)
+                    raise
+                if self.storage.needs_compaction():
+                    self.compact()
+            return payment
+
+    @metrics.timed()
+    def create_payments_bulk(self, requests):
+        """Creates many payment records at once, allocating their IDs in one block and persisting them with a single write.
+        Args:
+            requests (list): A list of (booking_id, amount, method) tuples, as passed to create_payment.
+        Returns:
+            tuple: A list with the new Payment object (or None if it failed) for each request, and a list of
+                (request index, error message) tuples for the requests that failed.
+        """
+        with self.transaction():
+            results = [None] * len(requests)
+            failures = []
+            accepted = []
+            for index, (booking_id, amount, method) in enumerate(requests):
+                if booking_id not in self.bookings:
+                    failures.append((index, f"Booking ID {booking_id} does not exist."))
+                elif not isinstance(amount, (int, float)) or amount < 0:
+                    failures.append((index, f"Invalid amount: {amount!r}."))
+                elif not method:
+                    failures.append((index, "A payment method is required."))
+                else:
+                    accepted.append((index, booking_id, amount, method))
+            if not accepted:
+                return results, failures
+            with self.lock:
+                first_id = self.next_payment_id
+                self.next_payment_id += len(accepted)
+                new_payments = {}
+                for payment_id, (index, booking_id, amount, method) in enumerate(accepted, start=first_id):
+                    payment = Payment(payment_id, booking_id, amount, method=method)
+                    new_payments[payment_id] = payment
+                    results[index] = payment
+                self.payments.update(new_payments)
+                for payment in new_payments.values():
+                    self._index_payment(payment)
+                try:
+                    self.storage.add_payments(self.payments, list(new_payments.values()), self.next_payment_id) # One write for the whole batch
+                except Exception:
+                    self._discard_payments(new_payments.values(), first_id)
+                    raise
+                if self.storage.needs_compaction():
+                    self.compact()
+            return results, failures
+
+    def _discard_payments(self, new_payments, next_payment_id):
+        """Undoes the creation of payments whose save failed. Called with the data lock held.
+        Args:
+            new_payments (iterable): The Payment objects created.
+            next_payment_id (int): The payment ID counter before the payments were created.
+        """
+        for payment in list(new_payments):
+            self.payments.pop(payment.get_payment_id(), None)
+            self._unindex_payment(payment)
+        self.next_payment_id = next_payment_id
+
+    @metrics.timed()
+    def get_payments_for_booking(self, booking_id):
+        """Retrieves all payments made for a specific booking.
+        Args:
+            booking_id (int): The ID of the booking.
+        Returns:
+            list: A list of Payment objects associated with the booking.
+        """
+        if self.storage.native_indexes:
+            return self.payments.select("booking_id", booking_id)
+        return [self.payments[payment_id] for payment_id in self.payments_by_booking.get(booking_id, [])]
+
+    def _index_payment(self, payment):
+        """Adds a payment to the booking payment index."""
+        if not self.storage.native_indexes:
+            self.payments_by_booking.setdefault(payment.get_booking_id(), []).append(payment.get_payment_id())
+
+    def _unindex_payment(self, payment):
+        """Removes a payment from the booking payment index."""
+        if not self.storage.native_indexes:
+            payment_ids = self.payments_by_booking.get(payment.get_booking_id(), [])
+            if payment.get_payment_id() in payment_ids:
+                payment_ids.remove(payment.get_payment_id())
+                if not payment_ids:
+                    del self.payments_by_booking[payment.get_booking_id()]
+
+    @metrics.timed()
+    def save_payments(self):
+        """Saves the payment data to the storage backend.
+        Returns:
+            bool: True once the data has been saved.
+        Raises:
+            StorageError: If the data could not be saved.
+        """
+        return self.storage.save_payments(self.payments, self.next_payment_id)
+
+    @metrics.timed()
+    @tracks_allocations
+    def load_payments(self):
+        """Loads the payment data and the next payment ID from the storage backend.
+        Returns:
+            dict: A dictionary containing Payment objects, or an empty dictionary if no data exists or loading fails.
+        """
+        payments, self.next_payment_id = self.storage.load_payments()
+        if self.columnar and isinstance(payments, ShardedMapping):
+            payments.convert_shards(PaymentStore) # One column store per event shard
+        elif self.columnar and not isinstance(payments, PaymentStore):
+            payments = PaymentStore(payments) # Converts snapshots saved as a dictionary of Payment objects
+        self.payments_by_booking = {}
+        if isinstance(payments, PaymentStore):
+            self.payments_by_booking = payments.group_ids("booking_ids") # Read from the columns, without a view per payment
+        elif not self.storage.native_indexes:
+            for payment in payments.values():
+                self._index_payment(payment)
+        return payments
+
+    @metrics.timed()
+    def compact(self):
+        """Folds the booking and payment journals back into their snapshot files.
+        The journals are only cleared once every snapshot has been written, so a failed save loses nothing.
+        Returns:
+            bool: True if the journals were compacted, False otherwise.
+        """
+        with self.transaction():
+            if not self.storage.journaled:
+                return False
+            if self.save_bookings() and self.save_payments():
+                self.storage.clear_journals()
+                return True
+            return False
+
+    @metrics.timed()
+    def memory_usage(self, sample_size=1000):
+        """Reports how many records each in-memory store holds and roughly how much memory it takes.
+        Sizes are deep (records with everything they reference) and estimated from a sample of sample_size entries
+        for larger containers. Objects shared between stores are counted with the first store that references them.
+        SQLite tables only hold the records currently cached, the rest stay in the database.
+        Args:
+            sample_size (int, optional): Largest number of entries measured per container. Defaults to 1000.
+        Returns:
+            dict: For each store ("users", "events", "bookings", "payments", and "indexes" for the lookup indexes
+                and sales totals), its type, record count, estimated bytes, bytes per record and whether it was
+                sampled; plus "total_bytes".
+        """
+        self.wait_until_loaded()
+        with self.lock:
+            stores = {"users": self.user_manager.users, "events": self.events, "bookings": self.bookings,
+                      "payments": self.payments,
+                      "indexes": {"bookings_by_user": self.bookings_by_user, "bookings_by_event": self.bookings_by_event,
+                                  "payments_by_booking": self.payments_by_booking, "sales": self.sales, "email_index": self.user_manager.email_index}}
+            seen = set()
+            skip = (DataManager, AccountManager, PickleStorage, SqliteStorage)
+            report = {}
+            for name, store in stores.items():
+                size, sampled = deep_sizeof(store, sample_size, seen, skip)
+                count = len(store) if name != "indexes" else sum(len(index) for index in store.values())
+                report[name] = {"type": type(store).__name__, "count": count, "bytes": size,
+                                "bytes_per_record": size / count if count else 0.0, "sampled": sampled}
+        report["total_bytes"] = sum(store["bytes"] for store in report.values())
+        return report
+
+    def start_allocation_tracking(self, frames=1):
+        """Starts measuring the memory allocated by load_events, load_bookings, load_payments and create_booking,
+        starting tracemalloc if it isn't running. Tracing slows Python down noticeably, so only use it while hunting
+        a leak or planning capacity. Allocations made by other threads during a tracked call are counted with it.
+        Args:
+            frames (int, optional): Stack frames kept per allocation by tracemalloc. Defaults to 1.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.allocation_tracking = True
+
+    def stop_allocation_tracking(self):
+        """Stops measuring allocations and stops tracemalloc. The totals recorded so far are kept."""
+        self.allocation_tracking = False
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _record_allocation(self, name, net_bytes, peak_bytes):
+        """Adds one tracked call's allocations to the totals."""
+        with self.allocation_lock:
+            totals = self.allocations.setdefault(name, {"calls": 0, "net_bytes": 0, "peak_bytes": 0})
+            totals["calls"] += 1
+            totals["net_bytes"] += net_bytes
+            totals["peak_bytes"] = max(totals["peak_bytes"], peak_bytes)
+
+    def allocation_report(self, top=10):
+        """Reports the memory allocated by the tracked methods, and where the memory still allocated comes from.
+        Args:
+            top (int, optional): Number of allocation sites to list. Defaults to 10.
+        Returns:
+            dict: "methods" maps each tracked method to its calls, net bytes still allocated after them and highest
+                peak; "traced_bytes" and "top_sites" (file:line, bytes, allocation count) describe what tracemalloc
+                currently sees, and are empty unless tracking is on.
+        """
+        with self.allocation_lock:
+            report = {"methods": {name: dict(totals) for name, totals in self.allocations.items()}, "traced_bytes": 0, "top_sites": []}
+        if tracemalloc.is_tracing():
+            report["traced_bytes"] = tracemalloc.get_traced_memory()[0]
+            for statistic in tracemalloc.take_snapshot().statistics('lineno')[:top]:
+                frame = statistic.traceback[0]
+                report["top_sites"].append({"location": f"{frame.filename}:{frame.lineno}", "bytes": statistic.size,
+                                            "count": statistic.count})
+        return report
+
+    def dump_memory_report(self, filename, sample_size=1000):
+        """Writes memory_usage() and allocation_report() to a JSON file, for capacity planning and leak hunting.
+        Args:
+            filename (str): The file to write.
+            sample_size (int, optional): Largest number of entries measured per container. Defaults to 1000.
+        Returns:
+            dict: The report written.
+        """
+        report = {"time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'), "stores": self.memory_usage(sample_size),
+                  "allocations": self.allocation_report()}
+        with open(filename, 'w') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+class GUI:
+    """Graphical User Interface for the Race Event Ticket System."""
+    POLL_INTERVAL = 50 # Milliseconds between checks for finished background work
+    PAGE_SIZE = 50 # Bookings shown per page of the booking history and purchase order tables
+    EVENT_CHOICES = 100 # Events listed in an event combobox at a time; typing narrows the list down
+    ALL_LOCATIONS = "All locations" # Location filter choice matching every location
+    def __init__(self, data_manager):
+        """Initializes the GUI.
+        Args:
+            data_manager (DataManager): An instance of the DataManager class for data access.
+        """
+        if tk is None:
+            raise RuntimeError("Tkinter is not available. Use service.py to run the ticket system headless.")
+        self.data_manager = data_manager
+        self.account_manager = data_manager.get_account_manager() # Get the account manager from data manager
+        self.admin = Admin(1, "AdminUser") # Simple admin user instance
+        self.current_user_id = None # Stores the ID of the currently logged-in user
+        # Data layer calls run on these threads so saving or scanning a large store doesn't freeze the window
+        self.workers = ThreadPoolExecutor(max_workers=2, thread_name_prefix="gui-worker")
+        self.busy = set() # Names of the background tasks still running, each allowed to run once at a time
+        self.window = tk.Tk() # Create the main Tkinter window
+        self.window.title("Race Event Ticket System") # Set the title of the window
+        self.setup_login_register() # Initialize the login and registration interface
+
+    def run(self):
+        """Starts the Tkinter event loop, making the GUI interactive. Once the window closes, waits for background
+        work still running, so a checkout in progress is saved before the data manager is closed."""
+        try:
+            self.window.mainloop()
+        finally:
+            self.workers.shutdown(wait=True)
+
+    def run_in_background(self, name, work, on_done, on_error=None, busy_widgets=()):
+        """Runs data layer work on a worker thread and hands its result back on the Tk main thread.
+        While the work runs the window shows a busy cursor and the given widgets are disabled, and a second request
+        under the same name is ignored, so a double click can't submit twice.
+        Args:
+            name (str): Name of the task, such as "checkout". None for read-only work that may run alongside itself,
+                such as loading a screen the user left and reopened.
+            work (callable): Called without arguments on a worker thread. It must not touch any widget.
+            on_done (callable): Called on the main thread with the value work returned.
+            on_error (callable, optional): Called on the main thread with the exception work raised. Defaults to None,
+                showing the exception in an error box.
+            busy_widgets (tuple, optional): Widgets to disable until the work finishes. Defaults to ().
+        Returns:
+            bool: True if the work was started, False if a task of the same name is still running.
+        """
+        if name is None:
+            name = object() # Never equal to a running task
+        elif name in self.busy:
+            return False
+        self.busy.add(name)
+        for widget in busy_widgets:
+            widget.config(state=tk.DISABLED)
+        self.window.config(cursor="watch")
+        future = self.workers.submit(work)
+
+        def check():
+            if not future.done():
+                self.window.after(self.POLL_INTERVAL, check)
+                return
+            self.busy.discard(name)
+            for widget in busy_widgets:
+                if widget.winfo_exists(): # The screen may have changed while the work ran
+                    widget.config(state=tk.NORMAL)
+            if not self.busy:
+                self.window.config(cursor="")
+            error = future.exception()
+            if error is None:
+                on_done(future.result())
+            elif on_error is not None:
+                on_error(error)
+            else:
+                messagebox.showerror("Error", str(error))
+        self.window.after(self.POLL_INTERVAL, check)
+        return True
+
+    def setup_login_register(self):
+        """Sets up the login and registration screen."""
+        # Destroy any existing widgets in the window
+        for widget in self.window.winfo_children():
+            widget.destroy()
+
+        # Create a frame for the login section
+        login_frame = ttk.LabelFrame(self.window, text="Login")
+        login_frame.pack(padx=20, pady=20)
+
+        # Email label and entry
+        ttk.Label(login_frame, text="Email:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        self.login_email_entry = ttk.Entry(login_frame)
+        self.login_email_entry.grid(row=0, column=1, padx=5, pady=5)
+
+        # Password label and entry (masked for security)
+        ttk.Label(login_frame, text="Password:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        self.login_password_entry = ttk.Entry(login_frame, show="*")
+        self.login_password_entry.grid(row=1, column=1, padx=5, pady=5)
+
+        # Login and Register buttons
+        ttk.Button(login_frame, text="Login", command=self.login).grid(row=2, column=0, columnspan=2, padx=5, pady=10)
+        ttk.Button(login_frame, text="Register", command=self.setup_registration).grid(row=3, column=0, columnspan=2, padx=5, pady=5)
+
+    def login(self):
+        """Handles the login process."""
+        email = self.login_email_entry.get()
+        password = self.login_password_entry.get()
+        # Look the user up through the account manager's email index
+        user = self.account_manager.authenticate(email, password)
+        if user:
+            self.current_user_id = user.get_user_id() # Store the logged-in user's ID
+            messagebox.showinfo("Login Successful", f"Welcome, {user.get_name()}!")
+            self.show_main_menu() # Navigate to the main menu
+            return
+        # If no matching user is found
+        messagebox.showerror("Login Failed", "Invalid email or password.")
+
+    def setup_registration(self):
+        """Sets up the user registration screen."""
+        # Destroy any existing widgets
+        for widget in self.window.winfo_children():
+            widget.destroy()
+
+        # Create a frame for registration
+        reg_frame = ttk.LabelFrame(self.window, text="Register New Account")
+        reg_frame.pack(padx=20, pady=20)
+
+        # Name label and entry
+        ttk.Label(reg_frame, text="Name:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        self.reg_name_entry = ttk.Entry(reg_frame)
+        self.reg_name_entry.grid(row=0, column=1, padx=5, pady=5)
+
+        # Email label and entry
+        ttk.Label(reg_frame, text="Email:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        self.reg_email_entry = ttk.Entry(reg_frame)
+        self.reg_email_entry.grid(row=1, column=1, padx=5, pady=5)
+
+        # Password label and entry (masked)
+        ttk.Label(reg_frame, text="Password:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        self.reg_password_entry = ttk.Entry(reg_frame, show="*")
+        self.reg_password_entry.grid(row=2, column=1, padx=5, pady=5)
+
+        # Register and Back to Login buttons
+        self.register_button = ttk.Button(reg_frame, text="Register", command=self.register_user)
+        self.register_button.grid(row=3, column=0, columnspan=2, padx=5, pady=10)
+        ttk.Button(reg_frame, text="Back to Login", command=self.setup_login_register).grid(row=4, column=0, columnspan=2, padx=5, pady=5)
+
+    def register_user(self):
+        """Handles the user registration process."""
+        name = self.reg_name_entry.get()
+        email = self.reg_email_entry.get()
+        password = self.reg_password_entry.get()
+        # Check if all required fields are filled
+        if not name or not email or not password:
+            messagebox.showerror("Registration Failed", "All fields are required.")
+            return
+
+        def registered(user):
+            messagebox.showinfo("Registration Successful", "Account created successfully. Please log in.")
+            self.setup_login_register() # Go back to the login screen
+
+        def failed(e):
+            # Handle errors during account creation (e.g., email already exists or the data couldn't be saved)
+            messagebox.showerror("Registration Failed", str(e))
+        # Creating the account saves the user store, so it runs in the background
+        self.run_in_background("register", lambda: self.account_manager.create_account(name, email, password),
+                               registered, failed, busy_widgets=(self.register_button,))
+
+    def show_main_menu(self):
+        """Displays the main menu after successful login."""
+        # Destroy all current widgets
+        for widget in self.window.winfo_children():
+            widget.destroy()
+
+        # Create the main menu frame
+        main_frame = ttk.LabelFrame(self.window, text="Main Menu")
+        main_frame.pack(padx=20, pady=20)
+
+        # Buttons for different functionalities
+        ttk.Button(main_frame, text="View/Update Account", command=self.show_account_management).pack(fill=tk.X, pady=5)
+        ttk.Button(main_frame, text="Purchase Tickets", command=self.show_ticket_purchasing).pack(fill=tk.X, pady=5)
+        ttk.Button(main_frame, text="View Booking History", command=self.show_booking_history).pack(fill=tk.X, pady=5)
+        ttk.Button(main_frame, text="Admin Dashboard", command=self.show_admin_dashboard).pack(fill=tk.X, pady=5)
+        ttk.Button(main_frame, text="Logout", command=self.setup_login_register).pack(fill=tk.X, pady=10)
+
+    def show_account_management(self):
+        """Displays the account management screen for the logged-in user."""
+        # Check if a user is logged in
+        if self.current_user_id is None:
+            messagebox.showerror("Error", "No user logged in.")
+            return
+
+        # Destroy current widgets
+        for widget in self.window.winfo_children():
+            widget.destroy()
+
+        # Get the logged-in user's details
+        user = self.account_manager.get_user(self.current_user_id)
+        if not user:
+            messagebox.showerror("Error", "User not found.")
+            self.show_main_menu()
+            return
+
+        # Create the account management frame
+        account_frame = ttk.LabelFrame(self.window, text="Account Management")
+        account_frame.pack(padx=20, pady=20)
+
+        # Display user information with entry fields for updates
+        ttk.Label(account_frame, text=f"User ID: {user.get_user_id()}").pack(pady=2)
+        ttk.Label(account_frame, text=f"Name:").pack(pady=2)
+        self.name_entry = ttk.Entry(account_frame)
+        self.name_entry.insert(0, user.get_name()) # Fill with current name
+        self.name_entry.pack(pady=2)
+
+        ttk.Label(account_frame, text=f"Email:").pack(pady=2)
+        self.email_entry = ttk.Entry(account_frame)
+        self.email_entry.insert(0, user.get_email()) # Fill with current email
+        self.email_entry.pack(pady=2)
+
+        ttk.Label(account_frame, text=f"Password:").pack(pady=2)
+        self.password_entry = ttk.Entry(account_frame, show="*")
+        self.password_entry.insert(0, user.get_password()) # Fill with current password (masked)
+        self.password_entry.pack(pady=2)
+
+        # Buttons for updating profile, viewing purchase orders, and going back to the main menu
+        ttk.Button(account_frame, text="Update Profile", command=self.update_profile).pack(pady=10)
+        ttk.Button(account_frame, text="View Purchase Orders", command=self.view_purchase_orders).pack(pady=5)
+        ttk.Button(account_frame, text="Back to Main Menu", command=self.show_main_menu).pack(pady=10)
+
+    def update_profile(self):
+        """Handles the process of updating the logged-in user's profile."""
+        # Check if a user is logged in
+        if self.current_user_id is None:
+            messagebox.showerror("Error", "No user logged in.")
+            return
+        # Get the updated information from the entry fields
+        name = self.name_entry.get()
+        email = self.email_entry.get()
+        password = self.password_entry.get()
+        # Attempt to update the user's information
+        try:
+            if self.account_manager.update_user(self.current_user_id, name, email, password):
+                messagebox.showinfo("Profile Updated", "Your profile has been updated.")
+            else:
+                messagebox.showerror("Update Failed", "Could not update profile.")
+        except StorageError as e:
+            messagebox.showerror("Update Failed", str(e))
+        self.show_account_management() # Refresh the account management screen
+
+    def view_purchase_orders(self):
+        """Displays the purchase orders (booking history) for the logged-in user."""
+        # Check if a user is logged in
+        if self.current_user_id is None:
+            messagebox.showerror("Error", "No user logged in.")
+            return
+
+        # Destroy current widgets
+        for widget in self.window.winfo_children():
+            widget.destroy()
+
+        # Create a frame for displaying purchase orders
+        orders_frame = ttk.LabelFrame(self.window, text="Purchase Orders")
+        orders_frame.pack(padx=20, pady=20)
+
+        # Get the logged-in user's details
+        user = self.account_manager.get_user(self.current_user_id)
+        if user:
+            # Page through the user's booking history, one page of bookings in the table at a time
+            self.create_booking_table(orders_frame, user.get_user_id(), [
+                ("Event ID", 70, lambda booking: booking.get_event_id()),
+                ("Date", 140, lambda booking: booking.get_booking_date()),
+                ("Total", 90, lambda booking: f"${booking.calculate_total():.2f}"),
+            ], "No purchase orders found.")
+        else:
+            ttk.Label(orders_frame, text="User not found.").pack(pady=5)
+
+        # Button to go back to the account management screen
+        ttk.Button(orders_frame, text="Back to Account", command=self.show_account_management).pack(pady=10)
+
+    def show_ticket_purchasing(self):
+        """Displays the interface for purchasing tickets."""
+        # Check if a user is logged in
+        if self.current_user_id is None:
+            messagebox.showerror("Error", "No user logged in.")
+            return
+
+        # Destroy current widgets
+        for widget in self.window.winfo_children():
+            widget.destroy()
+
+        # Create a frame for purchasing tickets
+        purchase_frame = ttk.LabelFrame(self.window, text="Purchase Tickets")
+        purchase_frame.pack(padx=20, pady=20)
+
+        # Filters narrowing the events offered by location and date range
+        filter_frame = ttk.Frame(purchase_frame)
+        filter_frame.pack(pady=5)
+        ttk.Label(filter_frame, text="Location:").grid(row=0, column=0, padx=5, pady=2, sticky="w")
+        self.location_combobox = ttk.Combobox(filter_frame, state="readonly",
+                                              values=[self.ALL_LOCATIONS, *self.data_manager.get_event_locations()])
+        self.location_combobox.current(0)
+        self.location_combobox.grid(row=0, column=1, columnspan=3, padx=5, pady=2, sticky="we")
+        self.location_combobox.bind("<<ComboboxSelected>>", self.filter_event_choices)
+        ttk.Label(filter_frame, text="From (YYYY-MM-DD):").grid(row=1, column=0, padx=5, pady=2, sticky="w")
+        self.start_date_entry = ttk.Entry(filter_frame, width=12)
+        self.start_date_entry.grid(row=1, column=1, padx=5, pady=2)
+        ttk.Label(filter_frame, text="To:").grid(row=1, column=2, padx=5, pady=2, sticky="w")
+        self.end_date_entry = ttk.Entry(filter_frame, width=12)
+        self.end_date_entry.grid(row=1, column=3, padx=5, pady=2)
+        self.start_date_entry.bind("<KeyRelease>", self.filter_event_choices)
+        self.end_date_entry.bind("<KeyRelease>", self.filter_event_choices)
+
+        # Label and Combobox to select an event; typing searches the event catalog
+        event_label = ttk.Label(purchase_frame, text="Select Event (type to search):")
+        event_label.pack(pady=5)
+        self.event_combobox = ttk.Combobox(purchase_frame)
+        self.event_combobox.pack(pady=5)
+        self.update_event_choices(self.event_combobox)
+        self.event_combobox.bind("<KeyRelease>", self.filter_event_choices) # Narrow the choices down as the user types
+        self.event_combobox.bind("<<ComboboxSelected>>", self.populate_ticket_options) # Populate tickets when an event is selected
+        self.event_combobox.bind("<Return>", self.populate_ticket_options)
+
+        # Dictionary to store ticket quantity selection frames
+        self.ticket_frames = {}
+        # Dictionary to store the selected tickets and their quantities for the cart
+        self.cart = {}
+        # Frame to hold the ticket options (populated after event selection)
+        self.ticket_options_frame = ttk.Frame(purchase_frame)
+        self.ticket_options_frame.pack(pady=10)
+
+        # Label and Listbox to display the shopping cart
+        self.cart_label = ttk.Label(purchase_frame, text="Shopping Cart:")
+        self.cart_label.pack(pady=5)
+        self.cart_listbox = tk.Listbox(purchase_frame, height=5)
+        self.cart_listbox.pack(pady=5)
+
+        # Buttons for adding to cart, removing from cart, checkout, and going back to the main menu
+        ttk.Button(purchase_frame, text="Add to Cart", command=self.add_to_cart).pack(pady=5)
+        ttk.Button(purchase_frame, text="Remove from Cart", command=self.remove_from_cart).pack(pady=5)
+        self.checkout_button = ttk.Button(purchase_frame, text="Checkout", command=self.checkout)
+        self.checkout_button.pack(pady=10)
+        ttk.Button(purchase_frame, text="Back to Main Menu", command=self.show_main_menu).pack(pady=10)
+
+    def populate_ticket_options(self, event=None):
+        """Populates the ticket options frame based on the selected event."""
+        selected_event_name = self.event_combobox.get()  # Get the name of the selected event from the combobox
+        # Find the corresponding RaceEvent object through the event catalog
+        self.selected_event = self.data_manager.find_event_by_name(selected_event_name)
+
+        if self.selected_event:
+            # Clear any existing widgets in the ticket options frame
+            for widget in self.ticket_options_frame.winfo_children():
+                widget.destroy()
+            self.ticket_frames = {}  # Reset the dictionary to store ticket quantity spinboxes
+            seats_label = ttk.Label(self.ticket_options_frame, text="Seats left: loading...")
+            seats_label.pack(pady=2)
+            def count_seats(selected_event=self.selected_event):
+                self.data_manager.wait_until_loaded()  # Seats left counts every booking, so wait for the history to load
+                return selected_event.get_availability()
+            def counted(seats):
+                if seats_label.winfo_exists():  # The event may have been changed or the screen left meanwhile
+                    seats_label.config(text=f"Seats left: {seats}")
+            def failed(e):
+                if seats_label.winfo_exists():
+                    seats_label.config(text=f"Seats left: unavailable ({e})")
+            self.run_in_background(None, count_seats, counted, failed)
+            ttk.Label(self.ticket_options_frame, text="Select Ticket Quantities:").pack(pady=5)
+            # Iterate through the available tickets for the selected event
+            for ticket in self.selected_event.get_available_tickets():
+                ticket_frame = ttk.Frame(self.ticket_options_frame)
+                ticket_frame.pack(pady=2, anchor="w")
+                # Display ticket name, price, validity, and features
+                ttk.Label(ticket_frame,
+                          text=f"{ticket.get_name()} (${ticket.get_price():.2f}) - {ticket.get_validity()} - {ticket.get_features()}: ").pack(
+                    side=tk.LEFT)
+                # Spinbox to select the quantity of each ticket
+                qty_spinbox = tk.Spinbox(ticket_frame, from_=0, to=10)
+                qty_spinbox.pack(side=tk.LEFT, padx=5)
+                # Store the spinbox widget associated with the ticket name
+                self.ticket_frames[ticket.get_name()] = qty_spinbox
+
+    def update_event_choices(self, combobox, location=None, start_date=None, end_date=None):
+        """Lists the events whose name starts with what has been typed in a combobox, or has a word that does.
+        Args:
+            combobox (ttk.Combobox): The event combobox.
+            location (str, optional): Only list events held here. Defaults to None.
+            start_date (str, optional): Only list events on or after this date, as YYYY-MM-DD. Defaults to None.
+            end_date (str, optional): Only list events on or before this date, as YYYY-MM-DD. Defaults to None.
+        """
+        events = self.data_manager.search_events(combobox.get(), start_date, end_date, location, limit=self.EVENT_CHOICES)
+        combobox["values"] = [event.get_name() for event in events]
+
+    def filter_event_choices(self, event=None):
+        """Lists the events matching the search text and the location and date filters of the purchase screen."""
+        location = self.location_combobox.get()
+        self.update_event_choices(self.event_combobox, None if location == self.ALL_LOCATIONS else location,
+                                  self.date_filter(self.start_date_entry), self.date_filter(self.end_date_entry))
+
+    @staticmethod
+    def date_filter(entry):
+        """Returns the date typed in an entry, or None while it is empty or not a complete YYYY-MM-DD date."""
+        text = entry.get().strip()
+        try:
+            datetime.strptime(text, '%Y-%m-%d')
+        except ValueError:
+            return None
+        return text
+
+    def add_to_cart(self):
+        """Adds the selected tickets and their quantities to the shopping cart."""
+        if not self.selected_event:
+            messagebox.showerror("Error", "Please select an event first.")
+            return
+
+        # Iterate through the ticket quantity spinboxes
+        for ticket_name, qty_widget in self.ticket_frames.items():
+            quantity = int(qty_widget.get())  # Get the selected quantity
+            if quantity > 0:
+                # Add the selected quantity to the cart (or update if already present)
+                self.cart[ticket_name] = self.cart.get(ticket_name, 0) + quantity
+        self.update_cart_display()  # Refresh the display of the shopping cart
+
+    def remove_from_cart(self):
+        """Removes a selected item from the shopping cart."""
+        selected_item_index = self.cart_listbox.curselection()  # Get the index of the selected item in the listbox
+        if selected_item_index:
+            # Extract the ticket name from the selected item string
+            selected_ticket = self.cart_listbox.get(selected_item_index[0]).split(" x ")[1]
+            if selected_ticket in self.cart:
+                del self.cart[selected_ticket]  # Remove the ticket from the cart
+                self.update_cart_display()  # Update the cart display
+
+    def update_cart_display(self):
+        """Updates the display of the shopping cart in the listbox."""
+        self.cart_listbox.delete(0, tk.END)  # Clear the current contents of the listbox
+        # Add each item in the cart to the listbox in the format "quantity x ticket_name"
+        for ticket, qty in self.cart.items():
+            self.cart_listbox.insert(tk.END, f"{qty} x {ticket}")
+
+    def checkout(self):
+        """Handles the checkout process, creating a booking and processing payment."""
+        if not self.cart:
+            messagebox.showinfo("Info", "Your cart is empty.")
+            return
+
+        if not self.selected_event:
+            messagebox.showerror("Error", "No event selected.")
+            return
+
+        if "checkout" in self.busy:
+            messagebox.showinfo("Info", "The previous checkout is still being processed.")
+            return
+
+        # Calculate the total price of the items in the cart
+        try:
+            total_price = self.data_manager.quote(self.selected_event.get_event_id(), self.cart)
+        except ValueError as e: # Such as a group ticket below its minimum quantity
+            messagebox.showerror("Error", str(e))
+            return
+
+        # Prompt the user for a payment method
+        payment_method = simpledialog.askstring("Payment", f"Total amount: ${total_price:.2f}\nEnter payment method:")
+        if not payment_method:
+            return
+        user_id = self.current_user_id
+        event_id = self.selected_event.get_event_id()
+        cart = dict(self.cart) # The cart can still change on screen while the booking is saved
+
+        def book():
+            # Create a new booking in the data manager
+            booking = self.data_manager.create_booking(user_id, event_id, cart)
+            if not booking:
+                return None, None, False
+            try:
+                # Create a new payment record
+                payment = self.data_manager.create_payment(booking.get_booking_id(), booking.calculate_total(), payment_method)
+                self.data_manager.flush() # Don't confirm a booking that is still only queued for writing
+                # Simulate payment processing
+                paid = payment.process_payment()
+            except Exception:
+                self.data_manager.cancel_booking(booking.get_booking_id()) # An unpaid booking mustn't keep its seats
+                raise
+            if not paid:
+                self.data_manager.cancel_booking(booking.get_booking_id())
+            return booking, payment, paid
+
+        def booked(result):
+            booking, payment, paid = result
+            if not booking:
+                messagebox.showerror("Booking Failed", "Could not create booking.")
+            elif paid:
+                messagebox.showinfo("Checkout Successful",
+                                    f"Booking successful! Booking ID: {booking.get_booking_id()}, Payment ID: {payment.get_payment_id()}, Total: ${payment.get_amount():.2f}, Method: {payment.get_method()}")
+                self.cart = {}  # Clear the shopping cart after successful checkout
+                if self.cart_listbox.winfo_exists():
+                    self.update_cart_display()  # Update the cart display to show it's empty
+            else:
+                messagebox.showerror("Payment Failed", "There was an issue processing your payment. The booking was cancelled.")
+
+        def failed(e):
+            if isinstance(e, (ValueError, StorageError)):
+                # Not enough seats left for the tickets in the cart, or the booking couldn't be saved
+                messagebox.showerror("Booking Failed", str(e))
+            else:
+                messagebox.showerror("Error", f"The checkout failed unexpectedly: {e}")
+        self.run_in_background("checkout", book, booked, failed, busy_widgets=(self.checkout_button,))
+
+    def show_booking_history(self):
+        """Displays the booking history for the logged-in user."""
+        if self.current_user_id is None:
+            messagebox.showerror("Error", "No user logged in.")
+            return
+
+        # Clear the current window content
+        for widget in self.window.winfo_children():
+            widget.destroy()
+
+        # Create a frame for the booking history
+        history_frame = ttk.LabelFrame(self.window, text="Booking History")
+        history_frame.pack(padx=20, pady=20)
+
+        def event_name(booking):
+            event = self.data_manager.get_event(booking.get_event_id())
+            return event.get_name() if event else "Unknown Event"
+        # Page through the booking history, one page of bookings in the table at a time
+        self.create_booking_table(history_frame, self.current_user_id, [
+            ("Event", 160, event_name),
+            ("Date", 140, lambda booking: booking.get_booking_date()),
+            ("Total", 90, lambda booking: f"${booking.calculate_total():.2f}"),
+            ("Status", 90, lambda booking: booking.get_status()),
+        ], "No booking history found.")
+
+        # Button to go back to the main menu
+        ttk.Button(history_frame, text="Back to Main Menu", command=self.show_main_menu).pack(pady=10)
+
+    def create_booking_table(self, parent, user_id, columns, empty_text):
+        """Builds a table of a user's bookings that shows one page at a time.
+        Only the page on screen is fetched from the DataManager, on a worker thread, and a booking's ticket lines are
+        only added to the table when its row is expanded.
+        Args:
+            parent (ttk.Frame): The frame to build the table in.
+            user_id (int): The ID of the user whose bookings are shown.
+            columns (list): A (heading, width, value) tuple per column after the booking ID, where value is called
+                with a Booking on the worker thread and returns the text of the cell.
+            empty_text (str): Shown instead of the page number when the user has no bookings.
+        """
+        table_frame = ttk.Frame(parent)
+        table_frame.pack(padx=5, pady=5, fill=tk.BOTH, expand=True)
+        column_ids = [f"column{index}" for index in range(len(columns))]
+        tree = ttk.Treeview(table_frame, columns=column_ids, show="tree headings", height=15, selectmode="browse")
+        tree.heading("#0", text="Booking / Tickets")
+        tree.column("#0", width=200, stretch=False)
+        for column_id, (heading, width, _) in zip(column_ids, columns):
+            tree.heading(column_id, text=heading)
+            tree.column(column_id, width=width, anchor="w")
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # Page navigation
+        nav_frame = ttk.Frame(parent)
+        nav_frame.pack(pady=5)
+        previous_button = ttk.Button(nav_frame, text="< Previous", command=lambda: show_page(page["number"] - 1))
+        previous_button.pack(side=tk.LEFT, padx=5)
+        page_label = ttk.Label(nav_frame, text="Loading...")
+        page_label.pack(side=tk.LEFT, padx=10)
+        next_button = ttk.Button(nav_frame, text="Next >", command=lambda: show_page(page["number"] + 1))
+        next_button.pack(side=tk.LEFT, padx=5)
+
+        page = {"number": 0, "count": 1} # The page on screen and the number of pages
+        tickets = {} # Ticket lines of the rows on screen that haven't been expanded yet, keyed by row ID
+
+        def fetch(number):
+            # Runs on a worker thread: count the bookings and format the requested page
+            total = self.data_manager.count_bookings_for_user(user_id)
+            number = min(number, max(0, (total - 1) // self.PAGE_SIZE)) # Bookings may have changed since the last page
+            rows = []
+            for booking in self.data_manager.get_bookings_for_user(user_id, number * self.PAGE_SIZE, self.PAGE_SIZE):
+                ticket_lines = [f"{item.get_quantity()} x {item.get_name()} (${item.get_unit_price():.2f})"
+                                for item in booking.get_items()]
+                rows.append((booking.get_booking_id(), [value(booking) for _, _, value in columns], ticket_lines))
+            return number, total, rows
+
+        def fetched(result):
+            if not tree.winfo_exists(): # The user left the screen while the page loaded
+                return
+            number, total, rows = result
+            page["number"], page["count"] = number, max(1, -(-total // self.PAGE_SIZE))
+            tree.delete(*tree.get_children())
+            tickets.clear()
+            for booking_id, values, ticket_lines in rows:
+                row = tree.insert("", tk.END, text=f"Booking {booking_id}", values=values)
+                if ticket_lines:
+                    tickets[row] = ticket_lines
+                    tree.insert(row, tk.END, text="...") # Placeholder so the row shows as expandable
+            tree.yview_moveto(0)
+            page_label.config(text=f"Page {number + 1} of {page['count']} ({total} bookings)" if total else empty_text)
+            previous_button.config(state=tk.NORMAL if number > 0 else tk.DISABLED)
+            next_button.config(state=tk.NORMAL if number + 1 < page["count"] else tk.DISABLED)
+
+        def show_page(number):
+            self.run_in_background(None, lambda: fetch(number), fetched, busy_widgets=(previous_button, next_button))
+
+        def expand(event):
+            # Replace the placeholder with the booking's ticket lines the first time its row is opened
+            row = tree.focus()
+            ticket_lines = tickets.pop(row, None)
+            if ticket_lines is not None:
+                tree.delete(*tree.get_children(row))
+                for line in ticket_lines:
+                    tree.insert(row, tk.END, text=line)
+        tree.bind("<<TreeviewOpen>>", expand)
+        show_page(0)
+
+    def show_admin_dashboard(self):
+        """Displays the admin dashboard with sales report and discount modification options."""
+        # Clear the current window content
+        for widget in self.window.winfo_children():
+            widget.destroy()
+
+        # Create a frame for the admin dashboard
+        admin_frame = ttk.LabelFrame(self.window, text="Admin Dashboard")
+        admin_frame.pack(padx=20, pady=20)
+
+        # Display the ticket sales report
+        ttk.Label(admin_frame, text="Ticket Sales Report:").pack(pady=5)
+        self.report_text = tk.Text(admin_frame, height=15, width=60)
+        self.report_text.pack(pady=5)
+        self.report_text.insert(tk.END, "Loading report...\n")
+        self.report_text.config(state=tk.DISABLED)  # Make the report text read-only
+
+        def load():
+            # Build the report text off the main thread: the analytics read every booking made since the last report
+            lines = []
+            try:
+                report = self.admin.view_sales_analytics(self.data_manager)  # Columnar engine, refreshed incrementally
+            except ImportError:
+                report = None  # NumPy isn't installed, fall back to the running totals kept by the DataManager
+            if report is not None:
+                sales_totals = {event_id: {ticket_name: {"units": units, "revenue": report["revenue"][event_id][ticket_name],
+                                                         "discounted_units": report["discounted_units"][event_id][ticket_name]}
+                                           for ticket_name, units in tickets.items()}
+                                for event_id, tickets in report["units"].items()}
+            else:
+                sales_totals = self.data_manager.get_sales_totals()
+            # Format the sales report
+            for event_id, sales in sales_totals.items():
+                event = self.data_manager.get_event(event_id)
+                event_name = event.get_name() if event else f"Event ID {event_id}"
+                lines.append(f"Event: {event_name}\n")
+                for ticket_name, totals in sales.items():
+                    lines.append(f"  - {ticket_name}: {totals['units']} (${totals['revenue']:.2f}, {totals['discounted_units']} discount-eligible)\n")
+                lines.append("\n")
+            if report is not None:
+                lines.append("Payments by method:\n")
+                for method, totals in report["payments_by_method"].items():
+                    lines.append(f"  - {method}: {totals['count']} (${totals['amount']:.2f})\n")
+                lines.append("\nRevenue by day:\n")
+                for day, revenue in report["revenue_by_day"].items():
+                    lines.append(f"  - {day}: ${revenue:.2f}\n")
+            return "".join(lines)
+
+        def loaded(text):
+            # Filled into the dashboard shown now, which may have been reopened while the report was built
+            report_text = self.report_text
+            if not report_text.winfo_exists(): # The dashboard was left while the report was built
+                return
+            report_text.config(state=tk.NORMAL)
+            report_text.delete("1.0", tk.END)
+            report_text.insert(tk.END, text)
+            report_text.config(state=tk.DISABLED)
+        # Named, so reopening the dashboard while a report is still being built doesn't start a second one
+        self.run_in_background("admin_report", load, loaded)
+        ttk.Button(admin_frame, text="Save Memory Report...", command=self.save_memory_report).pack(pady=5)
+
+        # Section for modifying discount availability
+        ttk.Label(admin_frame, text="Modify Discount Availability:").pack(pady=5)
+        event_label_discount = ttk.Label(admin_frame, text="Select Event:")
+        event_label_discount.pack()
+        # Combobox to select an event for discount modification
+        self.event_combobox_discount = ttk.Combobox(admin_frame)
+        self.event_combobox_discount.pack()
+        self.update_event_choices(self.event_combobox_discount)
+        self.event_combobox_discount.bind("<KeyRelease>", lambda e: self.update_event_choices(self.event_combobox_discount))
+        self.event_combobox_discount.bind("<Return>", self.populate_ticket_discount_options)
+        self.event_combobox_discount.bind("<<ComboboxSelected>>",
+                                          self.populate_ticket_discount_options)  # Populate ticket options for discount modification
+
+        # Frame to hold the ticket discount availability options
+        self.ticket_discount_frame = ttk.Frame(admin_frame)
+        self.ticket_discount_frame.pack(pady=5)
+
+        # Button to go back to the main menu
+        ttk.Button(admin_frame, text="Back to Main Menu", command=self.show_main_menu).pack(pady=10)
+
+    def save_memory_report(self):
+        """Asks for a file and writes the memory usage and allocation report to it as JSON. Measuring scans every store,
+        so it is only done on request, not each time the dashboard opens."""
+        filename = filedialog.asksaveasfilename(title="Save Memory Report", defaultextension=".json",
+                                                initialfile="memory_report.json", filetypes=[("JSON", "*.json")])
+        if filename:
+            def saved(report):
+                # Memory held by each store, to tell which one is growing
+                stores = report["stores"]
+                lines = [f"Memory report saved to {filename}.", "",
+                         f"Memory usage (estimated): {stores['total_bytes'] / 2 ** 20:.1f} MB"]
+                for store in ("users", "events", "bookings", "payments", "indexes"):
+                    usage = stores[store]
+                    lines.append(f"  - {store}: {usage['count']} records, {usage['bytes'] / 2 ** 20:.1f} MB "
+                                 f"({usage['bytes_per_record']:.0f} bytes each)")
+                messagebox.showinfo("Memory Report", "\n".join(lines))
+            # Measuring every store takes a while on large data, so the report is written in the background
+            self.run_in_background("memory_report", lambda: self.data_manager.dump_memory_report(filename), saved,
+                                   lambda e: messagebox.showerror("Error", f"Could not save the memory report: {e}"))
+
+    def populate_ticket_discount_options(self, event=None):
+        selected_event_name = self.event_combobox_discount.get()
+        self.selected_discount_event = self.data_manager.find_event_by_name(selected_event_name)
+
+        if self.selected_discount_event:
+            for widget in self.ticket_discount_frame.winfo_children():
+                widget.destroy()
+            ttk.Label(self.ticket_discount_frame, text="Set Discount Availability:").pack(pady=5)
+            for ticket in self.selected_discount_event.get_available_tickets():
+                discount_control = ttk.Frame(self.ticket_discount_frame)
+                discount_control.pack(pady=2, anchor="w")
+                ttk.Label(discount_control, text=f"{ticket.get_name()}: ").pack(side=tk.LEFT)
+                available_var = tk.BooleanVar(value=ticket.is_discount_available())
+                checkbutton = ttk.Checkbutton(discount_control, text="Available", variable=available_var, command=lambda t=ticket, var=available_var: self.update_discount(self.selected_discount_event, t.get_name(), var.get()))
+                checkbutton.pack(side=tk.LEFT)
+
+    def update_discount(self, event, ticket_name, available):
+        if event:
+            event_id = event.get_event_id()
+            def modify():
+                with self.data_manager.transaction(): # Changes other terminals saved are merged in before this one
+                    current = self.data_manager.get_event(event_id)
+                    if not current or not self.admin.modify_discount_availability(current, ticket_name, available):
+                        return False
+                    self.data_manager.save_events() # Saving the events also recompiles their pricing
+                    return True
+            def modified(updated):
+                if updated:
+                    messagebox.showinfo("Discount Updated", f"Discount for {ticket_name} set to {'available' if available else 'unavailable'}.")
+                else:
+                    messagebox.showerror("Update Failed", f"Could not update discount for {ticket_name}.")
+            self.run_in_background(None, modify, modified,
+                                   lambda e: messagebox.showerror("Update Failed", f"Could not save the discount for {ticket_name}: {e}"))
+
+if __name__ == "__main__":
+    try:
+        # Bookings and payments load in the background while the window opens. With --shared, several box office
+        # terminals can run against the same files, at the cost of file locking on every change.
+        data_manager = DataManager(lazy=True, shared="--shared" in sys.argv[1:])
+    except StorageError as e:
+        # Refuse to start on unreadable data rather than overwrite it with empty stores
+        if tk is None:
+            print(f"Error: {e}", file=sys.stderr)
+        else:
+            messagebox.showerror("Error", str(e))
+        raise SystemExit(1)
+
+    # Initialize some events and tickets if they don't exist
+    if not data_manager.get_events():
+        event1 = RaceEvent(1, "Grand National", "2025-06-10", "Aintree Racecourse", 500)
+        event1.add_ticket(Ticket(101, "Single Race", 50.00, "Valid for one race", "Access to general areas"))
+        event1.add_ticket(Ticket(102, "Weekend Package", 120.00, "Valid for all weekend races", "Access to VIP lounge"))
+        # Already priced for groups, so the group discount doesn't apply on top
+        event1.add_ticket(Ticket(103, "Group Discount", 45.00, "Per person for groups of 5+", "General access, group booking only",
+                                 discount_available=False, min_quantity=5))
+        data_manager.add_event(event1)
+
+        event2 = RaceEvent(2, "Royal Ascot", "2025-07-15", "Ascot Racecourse", 1000)
+        event2.add_ticket(Ticket(201, "Queen Anne Enclosure", 80.00, "Access to Queen Anne Enclosure", "Dress code applies"))
+        event2.add_ticket(Ticket(202, "Village Enclosure", 60.00, "Access to Village Enclosure", "Lively atmosphere"))
+        data_manager.add_event(event2)
+
+    gui = GUI(data_manager)
+    gui.run()
+    data_manager.close()
\ No newline at end of file
@@ -0,0 +1,17 @@
+"""Microbenchmarks for the Race Event Ticket System data layer.
+
+Runs headless (Tk is never started) from the repository root:
+
+    python -m benchmarks run --bookings 100000 --output results.json
+    python -m benchmarks run --storage journal --baseline results.json
+    python -m benchmarks compare results.json new-results.json --tolerance 0.1
+    python -m benchmarks load --buyers 32 --checkouts 100 --capacity 2000
+
+A run generates a deterministic dataset (see datagen) in a temporary directory and times the account, booking,
+payment, history, report and load/save paths (see suite). Results are JSON; comparing two runs lists the benchmarks
+that got slower than the tolerance allows and exits with status 1 if any did. A load run drives concurrent checkouts
+(see loadtest) and exits with status 1 if the data left on disk fails its checks.
+"""
+from benchmarks.datagen import generate_bookings, generate_events, generate_payments, generate_users, write_dataset
+from benchmarks.loadtest import run_load
+from benchmarks.suite import BenchmarkSuite, compare, load_results, measure, save_results
@@ -0,0 +1,86 @@
+"""Command line entry point: python -m benchmarks run|compare|load ..."""
+import argparse
+import json
+import sys
+
+from benchmarks.loadtest import format_report, run_load
+from benchmarks.suite import STORAGES, BenchmarkSuite, compare, load_results, save_results
+
+
+def print_comparison(baseline, current, tolerance):
+    """Prints a comparison table and returns the names of the benchmarks that regressed."""
+    if baseline["config"] != current["config"]:
+        print("Warning: the runs used different settings, so the timings may not be comparable.")
+    rows, regressions = compare(baseline, current, tolerance)
+    print(f"{'benchmark':<24}{'baseline':>14}{'current':>14}{'ratio':>9}")
+    for name, before, after, ratio in rows:
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<24}{before * 1e6:>12.1f}us{after * 1e6:>12.1f}us{ratio:>8.2f}x{flag}")
+    return regressions
+
+
+def main():
+    """Runs the benchmarks or compares two result files."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the ticket system data layer.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="generate a dataset and time every benchmark")
+    run.add_argument("--users", type=int, default=1000, help="number of generated users")
+    run.add_argument("--events", type=int, default=10, help="number of generated events")
+    run.add_argument("--bookings", type=int, default=10000, help="number of generated bookings (one payment each)")
+    run.add_argument("--seed", type=int, default=0, help="seed of the data generator")
+    run.add_argument("--storage", choices=STORAGES, default="pickle", help="storage backend to benchmark")
+    run.add_argument("--columnar", action="store_true", help="keep bookings and payments in column stores")
+    run.add_argument("--calls", type=int, default=100, help="calls per measurement for the per-call benchmarks")
+    run.add_argument("--repeat", type=int, default=5, help="measurements per benchmark")
+    run.add_argument("--only", nargs="+", choices=BenchmarkSuite.BENCHMARKS, help="run only these benchmarks")
+    run.add_argument("--output", help="write the results to this JSON file")
+    run.add_argument("--baseline", help="compare the results with this JSON file")
+    run.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against the baseline, 0.2 meaning 20%%")
+    comparison = commands.add_parser("compare", help="compare two result files")
+    comparison.add_argument("baseline", help="results of the reference run")
+    comparison.add_argument("current", help="results of the new run")
+    comparison.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown, 0.2 meaning 20%%")
+    load = commands.add_parser("load", help="simulate concurrent checkouts and report throughput and latency")
+    load.add_argument("--buyers", type=int, default=16, help="buyer threads per process")
+    load.add_argument("--checkouts", type=int, default=50, help="checkouts each buyer attempts")
+    load.add_argument("--processes", type=int, default=1, help="processes sharing the data files")
+    load.add_argument("--storage", choices=STORAGES, default="journal", help="storage backend to load")
+    load.add_argument("--users", type=int, default=1000, help="number of generated users")
+    load.add_argument("--events", type=int, default=5, help="number of events buyers choose from")
+    load.add_argument("--bookings", type=int, default=0, help="bookings generated before the run as existing history")
+    load.add_argument("--capacity", type=int, help="seats per event; set it below the demand to test selling out")
+    load.add_argument("--write-behind", type=float, metavar="SECONDS", help="write-behind window of the storage")
+    load.add_argument("--seed", type=int, default=0, help="seed of the data generator and the buyers")
+    load.add_argument("--output", help="write the report to this JSON file")
+    args = parser.parse_args()
+
+    if args.command == "load":
+        try:
+            report = run_load(args.buyers, args.checkouts, args.processes, args.storage, args.users, args.events,
+                              args.bookings, args.capacity, args.write_behind, args.seed)
+        except ValueError as e:
+            parser.error(str(e))
+        print("\n".join(format_report(report)))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+        return 0 if report["checks"]["passed"] else 1
+
+    if args.command == "compare":
+        regressions = print_comparison(load_results(args.baseline), load_results(args.current), args.tolerance)
+        return 1 if regressions else 0
+
+    suite = BenchmarkSuite(args.users, args.events, args.bookings, args.seed, args.storage, args.columnar, args.calls, args.repeat)
+    results = suite.run(args.only, progress=lambda name: print(f"Running {name}...", file=sys.stderr))
+    print(f"Generated the dataset in {results['generate_seconds']:.2f}s")
+    for name, result in results["results"].items():
+        print(f"{name:<24}{result['per_call'] * 1e6:>12.1f}us per call (best {result['best'] / result['number'] * 1e6:.1f}us)")
+    if args.output:
+        save_results(results, args.output)
+    if args.baseline:
+        return 1 if print_comparison(load_results(args.baseline), results, args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Deterministic synthetic data for the benchmarks.
+
+Every generator draws from a random.Random seeded by the caller, so the same seed and sizes always produce the same
+users, events, bookings and payments. Generators yield one object at a time, so datasets of millions of rows are only
+held in memory by the storage collection they are written into.
+"""
+import random
+from datetime import datetime, timedelta
+
+from app import Booking, Payment, RaceEvent, Ticket, User
+
+FIRST_NAMES = ["Alice", "Ben", "Chloe", "Dan", "Ella", "Finn", "Grace", "Harry", "Isla", "Jack", "Lily", "Noah"]
+LAST_NAMES = ["Smith", "Jones", "Taylor", "Brown", "Wilson", "Evans", "Thomas", "Roberts", "Walker", "Wright"]
+VENUES = ["Aintree Racecourse", "Ascot Racecourse", "Cheltenham Racecourse", "Epsom Downs", "Goodwood", "York Racecourse"]
+TICKET_TYPES = [("Single Race", 50.0), ("Weekend Package", 120.0), ("Group Discount", 45.0), ("Grandstand", 80.0)]
+PAYMENT_METHODS = ["Credit Card", "Debit Card", "PayPal", "Bank Transfer"]
+START_DATE = datetime(2025, 1, 1)
+
+
+def user_email(user_id):
+    """Returns the email address generated for a user ID."""
+    return f"user{user_id}@example.com"
+
+def user_password(user_id):
+    """Returns the password generated for a user ID."""
+    return f"password{user_id}"
+
+
+def generate_users(count, rng):
+    """Yields User objects with IDs 1 to count.
+    Args:
+        count (int): Number of users.
+        rng (random.Random): Source of randomness.
+    """
+    for user_id in range(1, count + 1):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        yield User(user_id, name, user_email(user_id), user_password(user_id))
+
+def generate_events(count, rng, capacity):
+    """Yields RaceEvent objects with IDs 1 to count, each selling two to four ticket types.
+    Args:
+        count (int): Number of events.
+        rng (random.Random): Source of randomness.
+        capacity (int): Seats per event.
+    """
+    for event_id in range(1, count + 1):
+        date = (START_DATE + timedelta(days=event_id)).strftime('%Y-%m-%d')
+        event = RaceEvent(event_id, f"Race Day {event_id}", date, rng.choice(VENUES), capacity)
+        for index, (name, price) in enumerate(rng.sample(TICKET_TYPES, rng.randint(2, len(TICKET_TYPES)))):
+            event.add_ticket(Ticket(event_id * 100 + index, name, price, "Valid on race day", "General access",
+                                    discount_available=rng.random() < 0.5))
+        yield event
+
+def generate_bookings(count, rng, user_count, events, capacity=None):
+    """Yields Booking objects with IDs 1 to count, for random users and events, booked in date order.
+    Args:
+        count (int): Number of bookings.
+        rng (random.Random): Source of randomness.
+        user_count (int): Number of users to book for (IDs 1 to user_count).
+        events (list): The RaceEvent objects to book.
+        capacity (int, optional): Seats per event. Once an event is full, later bookings go to the events with seats
+            left, and generation stops early when every event is full. Defaults to None, booking without a limit.
+    """
+    booking_time = START_DATE - timedelta(days=90)
+    seats_left = {event.get_event_id(): capacity for event in events} if capacity is not None else None
+    open_events = events
+    for booking_id in range(1, count + 1):
+        booking_time += timedelta(seconds=rng.randint(1, 30))
+        event = rng.choice(open_events)
+        booking = Booking(booking_id, rng.randint(1, user_count), event.get_event_id(),
+                          booking_time.strftime('%Y-%m-%d %H:%M:%S'), "Confirmed")
+        for ticket in rng.sample(event.get_available_tickets(), rng.randint(1, 2)):
+            quantity = rng.randint(1, 4)
+            if seats_left is not None:
+                quantity = min(quantity, seats_left[event.get_event_id()])
+                seats_left[event.get_event_id()] -= quantity
+            if quantity:
+                booking.add_ticket(ticket, quantity)
+        yield booking
+        if seats_left is not None and not seats_left[event.get_event_id()]:
+            open_events = [open_event for open_event in open_events if seats_left[open_event.get_event_id()]]
+            if not open_events:
+                return
+
+def generate_payments(bookings, rng):
+    """Yields one Payment per booking, with IDs in booking order.
+    Args:
+        bookings (iterable): The Booking objects to pay for.
+        rng (random.Random): Source of randomness.
+    """
+    for payment_id, booking in enumerate(bookings, 1):
+        yield Payment(payment_id, booking.get_booking_id(), booking.calculate_total(), booking.get_booking_date(),
+                      rng.choice(PAYMENT_METHODS))
+
+
+def write_dataset(storage, users=1000, events=10, bookings=10000, seed=0, capacity=None):
+    """Generates a dataset and writes it through a storage backend, so the benchmarks read it back the way the
+    application does. Meant for an empty storage: records already stored under the generated IDs are replaced.
+    The generated bookings never sell an event beyond its capacity, so fewer are written if every event fills up.
+    Args:
+        storage (PickleStorage, ShardedStorage or SqliteStorage): The storage to write to.
+        users (int, optional): Number of users. Defaults to 1000.
+        events (int, optional): Number of events. Defaults to 10.
+        bookings (int, optional): Number of bookings, each with one payment. Defaults to 10000.
+        seed (int, optional): Seed of the random generator. Defaults to 0.
+        capacity (int, optional): Seats per event. Defaults to None, leaving room for every generated booking and
+            plenty more.
+    Returns:
+        dict: The number of users, events, bookings and payments written.
+    Raises:
+        StorageError: If the data could not be saved.
+    """
+    rng = random.Random(seed)
+    if capacity is None:
+        capacity = max(1000, bookings * 8 // max(events, 1) * 2) # Room for every generated ticket and the benchmarks' own
+    user_records, _ = storage.load_users()
+    user_records.update((user.get_user_id(), user) for user in generate_users(users, rng))
+    storage.save_users(user_records, users + 1)
+    event_list = list(generate_events(events, rng, capacity))
+    event_records = storage.load_events()
+    event_records.update((event.get_event_id(), event) for event in event_list)
+    storage.save_events(event_records)
+    new_bookings = list(generate_bookings(bookings, random.Random(rng.random()), users, event_list, capacity))
+    booking_records, _ = storage.load_bookings()
+    booking_records.update((booking.get_booking_id(), booking) for booking in new_bookings)
+    storage.save_bookings(booking_records, len(new_bookings) + 1)
+    payment_records, _ = storage.load_payments() # Loaded after the bookings, so sharded payments find their event
+    payment_records.update((payment.get_payment_id(), payment) for payment in generate_payments(new_bookings, random.Random(rng.random())))
+    storage.save_payments(payment_records, len(new_bookings) + 1)
+    return {"users": users, "events": events, "bookings": len(new_bookings), "payments": len(new_bookings)}
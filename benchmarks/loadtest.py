@@ -0,0 +1,236 @@
+"""Concurrent checkout load simulator.
+
+Simulated buyers run the full purchase flow of GUI.checkout (quote the cart, create_booking, create_payment,
+process_payment, cancel_booking if the payment fails, then flush as the durability barrier) against a headless DataManager, either as threads sharing one
+DataManager or as processes each opening the same files with shared=True. A run reports the checkout throughput, the
+latency percentiles, and checks the data left on disk: no booking or payment ID handed out twice, no confirmed booking
+missing, no unpaid booking left uncancelled, no event sold beyond its capacity, and how much the storage grew.
+"""
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from app import DataManager, StorageError
+
+from benchmarks.datagen import PAYMENT_METHODS, write_dataset
+from benchmarks.suite import environment, make_storage
+
+
+def percentile(sorted_values, fraction):
+    """Returns the nearest-rank percentile of an already sorted list, or 0.0 if it is empty."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))]
+
+def directory_size(directory):
+    """Returns the total size in bytes of the files under a directory."""
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+
+def checkout(data_manager, user_id, event_id, cart, method):
+    """Runs one purchase the way GUI.checkout does, cancelling the booking if the payment fails.
+    Returns:
+        tuple: The outcome ("ok", "sold_out", "rejected", "payment_failed" or "error"), the booking ID and the
+            payment ID (None where nothing was created).
+    """
+    data_manager.quote(event_id, cart)
+    try:
+        booking = data_manager.create_booking(user_id, event_id, cart)
+    except ValueError:
+        return "sold_out", None, None
+    except StorageError:
+        return "error", None, None
+    if not booking:
+        return "rejected", None, None
+    try:
+        payment = data_manager.create_payment(booking.get_booking_id(), booking.calculate_total(), method)
+        paid = payment.process_payment()
+        if not paid:
+            data_manager.cancel_booking(booking.get_booking_id()) # An unpaid booking mustn't keep its seats
+        data_manager.flush()
+    except StorageError:
+        try:
+            data_manager.cancel_booking(booking.get_booking_id())
+        except StorageError:
+            pass # Reported as an error either way
+        return "error", None, None
+    if not paid:
+        return "payment_failed", booking.get_booking_id(), payment.get_payment_id()
+    return "ok", booking.get_booking_id(), payment.get_payment_id()
+
+def run_buyer(data_manager, seed, checkouts, user_count, event_ids):
+    """Runs one simulated buyer's checkouts for random users, events and carts.
+    Returns:
+        list: A (latency in seconds, outcome, booking ID, payment ID, event ID, seats) tuple per checkout.
+    """
+    rng = random.Random(seed)
+    data_manager.wait_until_loaded()
+    records = []
+    for _ in range(checkouts):
+        event = data_manager.get_event(rng.choice(event_ids))
+        cart = {rng.choice(event.get_available_tickets()).get_name(): rng.randint(1, 4)}
+        start = time.perf_counter()
+        outcome, booking_id, payment_id = checkout(data_manager, rng.randint(1, user_count), event.get_event_id(), cart,
+                                                   rng.choice(PAYMENT_METHODS))
+        records.append((time.perf_counter() - start, outcome, booking_id, payment_id, event.get_event_id(), sum(cart.values())))
+    return records
+
+def run_buyers(data_manager, seeds, checkouts, user_count, event_ids):
+    """Runs one buyer thread per seed against a DataManager, all starting together.
+    Returns:
+        tuple: Every buyer's checkout records, and the wall clock time the buyers started and finished.
+    """
+    barrier = threading.Barrier(len(seeds) + 1)
+    results = [None] * len(seeds)
+    def buyer(index):
+        barrier.wait()
+        results[index] = run_buyer(data_manager, seeds[index], checkouts, user_count, event_ids)
+    threads = [threading.Thread(target=buyer, args=(index,), name=f"buyer-{index}") for index in range(len(seeds))]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.time()
+    for thread in threads:
+        thread.join()
+    finished = time.time()
+    return [record for records in results for record in records], started, finished
+
+def run_process(kind, directory, seeds, checkouts, user_count, event_ids):
+    """Process entry point: opens the shared files and runs buyer threads in this process."""
+    data_manager = DataManager(storage=make_storage(kind, directory, shared=True))
+    try:
+        return run_buyers(data_manager, seeds, checkouts, user_count, event_ids)
+    finally:
+        data_manager.close()
+
+
+def run_load(buyers=16, checkouts=50, processes=1, storage="journal", users=1000, events=5, bookings=0, capacity=None,
+             write_behind=None, seed=0, directory=None):
+    """Generates a dataset, runs concurrent checkouts against it and checks the result.
+    Args:
+        buyers (int, optional): Buyer threads per process. Defaults to 16.
+        checkouts (int, optional): Checkouts each buyer attempts. Defaults to 50.
+        processes (int, optional): Number of processes. With more than one, each opens the files with shared=True.
+            Defaults to 1, running every buyer against one DataManager.
+        storage (str, optional): Storage backend, one of benchmarks.suite.STORAGES. Defaults to "journal".
+        users (int, optional): Number of generated users. Defaults to 1000.
+        events (int, optional): Number of generated events buyers choose from. Defaults to 5.
+        bookings (int, optional): Number of bookings generated before the run, as existing history. Defaults to 0.
+        capacity (int, optional): Seats per event. Set it below the demand to test selling out. Defaults to None,
+            leaving room for every checkout.
+        write_behind (float, optional): Write-behind window of the storage, single process only. Defaults to None.
+        seed (int, optional): Seed of the data generator and the buyers. Defaults to 0.
+        directory (str, optional): Directory to keep the data in. Defaults to None, using a temporary directory.
+    Returns:
+        dict: The settings, outcome counts, throughput, latency percentiles in milliseconds, checks and storage growth.
+    Raises:
+        ValueError: If several processes are asked of a storage that can't be shared or writes behind.
+    """
+    if processes > 1 and (storage == "sqlite" or write_behind is not None):
+        raise ValueError("Several processes need a shared pickle storage without write-behind.")
+    config = {"buyers": buyers, "checkouts": checkouts, "processes": processes, "storage": storage, "users": users,
+              "events": events, "bookings": bookings, "capacity": capacity, "write_behind": write_behind, "seed": seed}
+    if directory is None:
+        with tempfile.TemporaryDirectory(prefix="ticket-load-") as directory:
+            return run_load(**dict(config, directory=directory))
+    if capacity is None:
+        capacity = max(1000, (bookings * 8 + buyers * processes * checkouts * 4) // max(events, 1) * 2)
+    write_dataset(make_storage(storage, directory), users, events, bookings, seed, capacity)
+    bytes_before = directory_size(directory)
+    event_ids = list(range(1, events + 1))
+    seeds = [[seed * 1_000_003 + process * buyers + buyer + 1 for buyer in range(buyers)] for process in range(processes)]
+    if processes == 1:
+        data_manager = DataManager(storage=make_storage(storage, directory, write_behind=write_behind))
+        sold_before = {event_id: data_manager.get_event(event_id).get_seats_sold() for event_id in event_ids}
+        try:
+            records, started, finished = run_buyers(data_manager, seeds[0], checkouts, users, event_ids)
+        finally:
+            data_manager.close()
+    else:
+        data_manager = DataManager(storage=make_storage(storage, directory))
+        sold_before = {event_id: data_manager.get_event(event_id).get_seats_sold() for event_id in event_ids}
+        data_manager.close()
+        with ProcessPoolExecutor(processes, mp_context=get_context("spawn")) as pool:
+            futures = [pool.submit(run_process, storage, directory, process_seeds, checkouts, users, event_ids)
+                       for process_seeds in seeds]
+            runs = [future.result() for future in futures]
+        records = [record for run in runs for record in run[0]]
+        started, finished = min(run[1] for run in runs), max(run[2] for run in runs)
+    report = summarize(records, finished - started)
+    report["checks"] = verify(storage, directory, records, sold_before, capacity)
+    report["storage"] = {"bytes_before": bytes_before, "bytes_after": directory_size(directory)}
+    report["storage"]["bytes_per_checkout"] = ((report["storage"]["bytes_after"] - bytes_before) / report["outcomes"].get("ok", 0)
+                                               if report["outcomes"].get("ok") else 0.0)
+    report["config"] = config
+    report["environment"] = environment()
+    return report
+
+def summarize(records, seconds):
+    """Counts the outcomes and computes the throughput and latency percentiles of a run."""
+    outcomes = {}
+    for _, outcome, *_ in records:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    latencies = sorted(record[0] * 1000 for record in records)
+    confirmed = sorted(record[0] * 1000 for record in records if record[1] == "ok")
+    return {"attempts": len(records), "outcomes": outcomes, "seconds": seconds,
+            "throughput": outcomes.get("ok", 0) / seconds if seconds else 0.0,
+            "latency_ms": {"p50": percentile(confirmed, 0.50), "p95": percentile(confirmed, 0.95),
+                           "p99": percentile(confirmed, 0.99), "max": confirmed[-1] if confirmed else 0.0,
+                           "all_attempts_p99": percentile(latencies, 0.99)}}
+
+def verify(storage, directory, records, sold_before, capacity):
+    """Reloads the data from disk and checks it against what the buyers were told.
+    Returns:
+        dict: The duplicated booking and payment IDs, confirmed bookings missing on disk, bookings whose payment failed
+            but aren't cancelled on disk, oversold events (seats over capacity) and events whose sold seats don't match
+            the confirmed bookings, plus "passed".
+    """
+    booking_ids = [record[2] for record in records if record[2] is not None]
+    payment_ids = [record[3] for record in records if record[3] is not None]
+    unpaid_ids = [record[2] for record in records if record[1] == "payment_failed"]
+    booked = {}
+    for _, outcome, booking_id, _, event_id, seats in records:
+        if outcome == "ok": # The seats of unpaid bookings were given back when they were cancelled
+            booked[event_id] = booked.get(event_id, 0) + seats
+    data_manager = DataManager(storage=make_storage(storage, directory))
+    try:
+        checks = {"booking_id_collisions": len(booking_ids) - len(set(booking_ids)),
+                  "payment_id_collisions": len(payment_ids) - len(set(payment_ids)),
+                  "missing_bookings": sum(1 for booking_id in booking_ids if booking_id not in data_manager.bookings),
+                  "missing_payments": sum(1 for payment_id in payment_ids if payment_id not in data_manager.payments),
+                  "uncancelled_unpaid_bookings": sum(1 for booking_id in unpaid_ids if booking_id not in data_manager.bookings
+                                                     or data_manager.bookings[booking_id].get_status() != "Cancelled"),
+                  "oversold_events": {}, "seat_mismatches": {}}
+        for event_id, before in sold_before.items():
+            sold = data_manager.get_event(event_id).get_seats_sold()
+            if sold > capacity:
+                checks["oversold_events"][event_id] = sold - capacity
+            if sold != before + booked.get(event_id, 0):
+                checks["seat_mismatches"][event_id] = {"on_disk": sold, "expected": before + booked.get(event_id, 0)}
+    finally:
+        data_manager.close()
+    checks["passed"] = not any(value for key, value in checks.items())
+    return checks
+
+
+def format_report(report):
+    """Renders a load test report as lines of text."""
+    latency = report["latency_ms"]
+    checks = report["checks"]
+    growth = report["storage"]
+    return [
+        f"{report['attempts']} checkouts in {report['seconds']:.2f}s: "
+        + ", ".join(f"{count} {outcome}" for outcome, count in sorted(report["outcomes"].items())),
+        f"throughput {report['throughput']:.1f} confirmed checkouts/s",
+        f"latency p50 {latency['p50']:.2f}ms  p95 {latency['p95']:.2f}ms  p99 {latency['p99']:.2f}ms  max {latency['max']:.2f}ms",
+        f"ID collisions: {checks['booking_id_collisions']} booking, {checks['payment_id_collisions']} payment; "
+        f"missing on disk: {checks['missing_bookings']} bookings, {checks['missing_payments']} payments; "
+        f"unpaid bookings left uncancelled: {checks['uncancelled_unpaid_bookings']}",
+        f"oversold events: {checks['oversold_events'] or 'none'}; seat mismatches: {checks['seat_mismatches'] or 'none'}",
+        f"storage {growth['bytes_before']} -> {growth['bytes_after']} bytes ({growth['bytes_per_checkout']:.0f} bytes per checkout)",
+        "checks passed" if checks["passed"] else "CHECKS FAILED",
+    ]
@@ -0,0 +1,237 @@
+"""Timed benchmarks of the data layer hot paths, and comparison of result files.
+
+Each benchmark times a number of calls and repeats the measurement; the median time per call is what gets compared
+between runs. Mutating benchmarks persist every change, exactly as the GUI does, so they include the disk writes.
+"""
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from app import Admin, DataManager, PickleStorage, ShardedStorage, SnapshotStorage, SqliteStorage
+
+from benchmarks.datagen import user_email, user_password, write_dataset
+
+STORAGES = ("pickle", "journal", "sharded", "snapshot", "sqlite")
+
+
+def measure(function, number=1, repeat=5, setup=None):
+    """Times a function.
+    Args:
+        function (callable): Called with the call index (0 to number - 1) and the value returned by setup.
+        number (int, optional): Calls per measurement. Defaults to 1.
+        repeat (int, optional): Number of measurements. Defaults to 5.
+        setup (callable, optional): Called before each measurement, outside the timed section. Defaults to None.
+    Returns:
+        dict: The number of calls and measurements, the best and median seconds per measurement, and the median
+            seconds per call ("per_call"), which is what comparisons use.
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        for index in range(number):
+            function(index, state)
+        times.append(time.perf_counter() - start)
+    median = statistics.median(times)
+    return {"number": number, "repeat": repeat, "best": min(times), "median": median, "per_call": median / number}
+
+
+def make_storage(kind, directory, shared=False, write_behind=None):
+    """Creates a storage backend of one of the STORAGES kinds, keeping its files in a directory.
+    The shared and write_behind options are passed on to the pickle and snapshot backends; see PickleStorage.
+    """
+    path = lambda name: os.path.join(directory, name)
+    if kind == "sqlite":
+        return SqliteStorage(path("tickets.db"))
+    if kind == "sharded":
+        return ShardedStorage(path("users.pkl"), path("events.pkl"), path("shards"), journal=True,
+                              booking_file=path("bookings.pkl"), payment_file=path("payments.pkl"), shared=shared,
+                              write_behind=write_behind)
+    if kind == "snapshot":
+        return SnapshotStorage(path("users.snap"), path("events.snap"), path("bookings.snap"), path("payments.snap"),
+                               journal=True, shared=shared, write_behind=write_behind) # Journaled, as every unjournaled save rewrites a whole snapshot
+    return PickleStorage(path("users.pkl"), path("events.pkl"), path("bookings.pkl"), path("payments.pkl"),
+                         journal=kind == "journal", shared=shared, write_behind=write_behind)
+
+
+class BenchmarkSuite:
+    """Runs every benchmark against one generated dataset held in a temporary directory."""
+    def __init__(self, users=1000, events=10, bookings=10000, seed=0, storage="pickle", columnar=False, calls=100, repeat=5):
+        """Initializes the BenchmarkSuite. Nothing is generated until run() is called.
+        Args:
+            users (int, optional): Number of generated users. Defaults to 1000.
+            events (int, optional): Number of generated events. Defaults to 10.
+            bookings (int, optional): Number of generated bookings, each with a payment. Defaults to 10000.
+            seed (int, optional): Seed of the data generator and of the benchmarks' random choices. Defaults to 0.
+            storage (str, optional): Storage backend, one of STORAGES. Defaults to "pickle".
+            columnar (bool, optional): If True, the DataManager keeps bookings and payments in column stores. Defaults to False.
+            calls (int, optional): Calls timed per measurement by the per-call benchmarks. Defaults to 100.
+            repeat (int, optional): Measurements per benchmark. Defaults to 5.
+        Raises:
+            ValueError: If the storage kind is unknown.
+        """
+        if storage not in STORAGES:
+            raise ValueError(f"Unknown storage '{storage}', expected one of {', '.join(STORAGES)}.")
+        self.config = {"users": users, "events": events, "bookings": bookings, "seed": seed, "storage": storage,
+                       "columnar": columnar, "calls": calls, "repeat": repeat}
+        self.rng = random.Random(seed)
+        self.directory = None # Temporary directory holding the dataset while the suite runs
+        self.data_manager = None
+
+    def open(self):
+        """Opens a DataManager on the generated dataset."""
+        storage = make_storage(self.config["storage"], self.directory)
+        return DataManager(storage=storage, columnar=self.config["columnar"])
+
+    def random_user_id(self):
+        """Returns the ID of a random generated user."""
+        return self.rng.randint(1, self.config["users"])
+
+    def random_cart(self):
+        """Returns a random event ID and a cart of one of its ticket types."""
+        event = self.data_manager.get_event(self.rng.randint(1, self.config["events"]))
+        return event.get_event_id(), {self.rng.choice(event.get_available_tickets()).get_name(): self.rng.randint(1, 4)}
+
+    def bench_load(self):
+        """Times opening a DataManager, which loads every store."""
+        return measure(lambda index, state: self.open().close(), repeat=self.config["repeat"])
+
+    def bench_save(self):
+        """Times writing every store back in full."""
+        def save(index, state):
+            self.data_manager.user_manager.save_data()
+            self.data_manager.save_events()
+            self.data_manager.save_bookings()
+            self.data_manager.save_payments()
+        return measure(save, repeat=self.config["repeat"])
+
+    def bench_create_account(self):
+        """Times AccountManager.create_account with new email addresses."""
+        accounts = self.data_manager.get_account_manager()
+        counter = iter(range(10 ** 9))
+        return measure(lambda index, state: accounts.create_account("Bench User", f"bench{next(counter)}@example.com", "secret"),
+                       self.config["calls"], self.config["repeat"])
+
+    def bench_login(self):
+        """Times the login lookup, AccountManager.authenticate, for random generated users."""
+        accounts = self.data_manager.get_account_manager()
+        def login(index, user_ids):
+            user_id = user_ids[index]
+            if not accounts.authenticate(user_email(user_id), user_password(user_id)):
+                raise RuntimeError(f"Generated user {user_id} could not log in.")
+        return measure(login, self.config["calls"], self.config["repeat"],
+                       setup=lambda: [self.random_user_id() for _ in range(self.config["calls"])])
+
+    def bench_create_booking(self):
+        """Times DataManager.create_booking for random users, events and tickets."""
+        def book(index, requests):
+            self.data_manager.create_booking(*requests[index])
+        return measure(book, self.config["calls"], self.config["repeat"],
+                       setup=lambda: [(self.random_user_id(), *self.random_cart()) for _ in range(self.config["calls"])])
+
+    def bench_create_payment(self):
+        """Times DataManager.create_payment for existing bookings."""
+        def pay(index, booking_ids):
+            self.data_manager.create_payment(booking_ids[index], 10.0, "Credit Card")
+        return measure(pay, self.config["calls"], self.config["repeat"],
+                       setup=lambda: [self.rng.randint(1, self.config["bookings"]) for _ in range(self.config["calls"])])
+
+    def bench_quote(self):
+        """Times DataManager.quote for random carts."""
+        def quote(index, carts):
+            self.data_manager.quote(*carts[index])
+        return measure(quote, self.config["calls"], self.config["repeat"],
+                       setup=lambda: [self.random_cart() for _ in range(self.config["calls"])])
+
+    def bench_quote_batch(self):
+        """Times DataManager.quote_batch pricing as many random carts as the quote benchmark, in one call."""
+        return measure(lambda index, carts: self.data_manager.quote_batch(carts), repeat=self.config["repeat"],
+                       setup=lambda: [self.random_cart() for _ in range(self.config["calls"])])
+
+    def bench_get_bookings_for_user(self):
+        """Times DataManager.get_bookings_for_user for random users."""
+        def history(index, user_ids):
+            self.data_manager.get_bookings_for_user(user_ids[index])
+        return measure(history, self.config["calls"], self.config["repeat"],
+                       setup=lambda: [self.random_user_id() for _ in range(self.config["calls"])])
+
+    def bench_view_report(self):
+        """Times Admin.view_report over every booking."""
+        admin = Admin(1, "Benchmark")
+        return measure(lambda index, state: admin.view_report(self.data_manager.bookings.values()), repeat=self.config["repeat"])
+
+    BENCHMARKS = ("load", "save", "create_account", "login", "create_booking", "create_payment", "quote", "quote_batch",
+                  "get_bookings_for_user", "view_report")
+
+    def run(self, names=None, progress=None):
+        """Generates the dataset and runs the benchmarks.
+        Args:
+            names (list, optional): The benchmarks to run, from BENCHMARKS. Defaults to None, running all of them.
+            progress (callable, optional): Called with each benchmark's name before it runs. Defaults to None.
+        Returns:
+            dict: The results, as written by save_results.
+        """
+        names = list(names or self.BENCHMARKS)
+        results = {}
+        with tempfile.TemporaryDirectory(prefix="ticket-bench-") as self.directory:
+            start = time.perf_counter()
+            write_dataset(make_storage(self.config["storage"], self.directory), self.config["users"],
+                          self.config["events"], self.config["bookings"], self.config["seed"])
+            generate_time = time.perf_counter() - start
+            self.data_manager = self.open()
+            try:
+                for name in names:
+                    if progress:
+                        progress(name)
+                    results[name] = getattr(self, "bench_" + name)()
+            finally:
+                self.data_manager.close()
+                self.data_manager = None
+        return {"environment": environment(), "config": self.config, "generate_seconds": generate_time, "results": results}
+
+
+def environment():
+    """Describes the machine and interpreter a run was made on."""
+    return {"python": sys.version.split()[0], "implementation": platform.python_implementation(),
+            "platform": platform.platform(), "machine": platform.machine(), "cpus": os.cpu_count(),
+            "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+
+def save_results(results, filename):
+    """Writes benchmark results to a JSON file."""
+    with open(filename, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+def load_results(filename):
+    """Reads benchmark results written by save_results."""
+    with open(filename) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, tolerance=0.2):
+    """Compares two benchmark runs by median time per call.
+    Args:
+        baseline (dict): Results of the reference run.
+        current (dict): Results of the new run.
+        tolerance (float, optional): Allowed slowdown as a fraction, 0.2 meaning 20% slower. Defaults to 0.2.
+    Returns:
+        tuple: A list of (name, baseline seconds, current seconds, ratio) tuples for every benchmark in both runs,
+            and a list of the names that regressed beyond the tolerance.
+    """
+    rows = []
+    regressions = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        ratio = result["per_call"] / reference["per_call"] if reference["per_call"] else float("inf")
+        rows.append((name, reference["per_call"], result["per_call"], ratio))
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return rows, regressions
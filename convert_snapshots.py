@@ -0,0 +1,43 @@
+"""Converts the pickle data files of the Race Event Ticket System to binary snapshot files.
+
+    python convert_snapshots.py                                  # users.pkl, ... -> users.snap, ... in this directory
+    python convert_snapshots.py --source old-data --target data  # Between directories
+    python convert_snapshots.py --journal                        # Fold the pickle journals into the snapshots too
+
+Run it while nothing else is using the files, then start the application on the snapshot files (service.py
+--snapshots). The pickle files are left as they are.
+"""
+import argparse
+import os
+import time
+
+from app import PickleStorage, SnapshotStorage, StorageError, convert_storage
+
+FILES = ("users", "events", "bookings", "payments")
+
+
+def main():
+    """Converts the files named on the command line."""
+    parser = argparse.ArgumentParser(description="Convert the pickle data files to binary snapshot files.")
+    parser.add_argument("--source", default=".", help="directory holding the pickle files")
+    parser.add_argument("--target", help="directory to write the snapshot files to (defaults to --source)")
+    parser.add_argument("--journal", action="store_true", help="replay the bookings.pkl.log and payments.pkl.log journals into the snapshots")
+    args = parser.parse_args()
+    target = args.target or args.source
+    os.makedirs(target, exist_ok=True)
+    source_files = [os.path.join(args.source, name + ".pkl") for name in FILES]
+    target_files = [os.path.join(target, name + ".snap") for name in FILES]
+    start = time.perf_counter()
+    try:
+        counts = convert_storage(PickleStorage(*source_files, journal=args.journal), SnapshotStorage(*target_files))
+    except StorageError as e:
+        parser.exit(1, f"Conversion failed: {e}\n")
+    print(f"Converted {', '.join(f'{count} {kind}' for kind, count in counts.items())} in {time.perf_counter() - start:.2f}s")
+    for source_file, target_file in zip(source_files, target_files):
+        if os.path.exists(target_file):
+            size = os.path.getsize(source_file) if os.path.exists(source_file) else 0
+            print(f"  {source_file} ({size} bytes) -> {target_file} ({os.path.getsize(target_file)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Operation metrics for the Race Event Ticket System.
+
+The data layer reports into the module-level registry: how often each DataManager, AccountManager and Admin operation
+runs and how long it takes, how long each store takes to load and save, and how many bytes are written per store.
+Recording is off until enable() is called; until then an instrumented call costs one attribute check.
+
+    import metrics
+    metrics.enable()
+    ...
+    print(metrics.registry.prometheus_text())               # Prometheus text exposition format
+    metrics.registry.start_log("metrics.jsonl", interval=60) # One JSON snapshot per line, every minute
+"""
+import functools
+import json
+import threading
+import time
+from datetime import datetime
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Counts observed durations in cumulative-style buckets, with their count and sum."""
+    __slots__ = ('counts', 'count', 'total', 'errors')
+    def __init__(self):
+        """Initializes an empty Histogram."""
+        self.counts = [0] * (len(BUCKETS) + 1) # Observations per bucket; the last counts those above every bound
+        self.count = 0 # Number of observations
+        self.total = 0.0 # Sum of the observed durations, in seconds
+        self.errors = 0 # Number of observed calls that raised an exception
+
+    def observe(self, seconds, failed=False):
+        """Records one duration."""
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            index = len(BUCKETS)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if failed:
+            self.errors += 1
+
+    def cumulative(self):
+        """Returns (upper bound, observations at or below it) pairs, ending with ("+Inf", count)."""
+        pairs = []
+        running = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            running += count
+            pairs.append((bound, running))
+        pairs.append(("+Inf", self.count))
+        return pairs
+
+    def quantile(self, fraction):
+        """Estimates a quantile as the upper bound of the bucket it falls in, or None without observations."""
+        if not self.count:
+            return None
+        for bound, running in self.cumulative():
+            if running >= fraction * self.count:
+                return bound if bound != "+Inf" else float("inf")
+
+
+class MetricsRegistry:
+    """Collects operation latencies, store load/save latencies and bytes written, and exports them."""
+    def __init__(self):
+        """Initializes an empty, disabled MetricsRegistry."""
+        self.enabled = False # Checked by every instrumented call before anything is recorded
+        self.lock = threading.Lock() # Guards the histograms and counters, updated from many threads
+        self.operations = {} # Dictionary mapping operation names to their Histogram
+        self.storage = {} # Dictionary mapping (action, store) pairs, such as ("save", "booking"), to their Histogram
+        self.bytes_written = {} # Dictionary mapping store names to the bytes written for them
+        self.started = time.time() # When recording started or was last reset
+        self.log_thread = None
+        self.log_stop = threading.Event()
+
+    def observe(self, operation, seconds, failed=False):
+        """Records the duration of a manager operation."""
+        with self.lock:
+            histogram = self.operations.get(operation)
+            if histogram is None:
+                histogram = self.operations[operation] = Histogram()
+            histogram.observe(seconds, failed)
+
+    def observe_storage(self, action, store, seconds, size=0, failed=False):
+        """Records the duration of a storage action ("load", "save", "append", "flush" or "commit") on a store, and
+        the bytes it wrote."""
+        with self.lock:
+            histogram = self.storage.get((action, store))
+            if histogram is None:
+                histogram = self.storage[(action, store)] = Histogram()
+            histogram.observe(seconds, failed)
+            if size:
+                self.bytes_written[store] = self.bytes_written.get(store, 0) + size
+
+    def reset(self):
+        """Discards everything recorded so far."""
+        with self.lock:
+            self.operations = {}
+            self.storage = {}
+            self.bytes_written = {}
+            self.started = time.time()
+
+    def snapshot(self):
+        """Returns everything recorded so far as a JSON-serializable dictionary.
+        Returns:
+            dict: Per operation and per store action, the count, errors, total and mean seconds, and estimated p50,
+                p95 and p99 seconds; the bytes written per store; and the time the snapshot was taken.
+        """
+        def summary(histogram):
+            return {"count": histogram.count, "errors": histogram.errors, "seconds": histogram.total,
+                    "mean": histogram.total / histogram.count if histogram.count else 0.0,
+                    "p50": histogram.quantile(0.5), "p95": histogram.quantile(0.95), "p99": histogram.quantile(0.99)}
+        with self.lock:
+            return {"time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'), "uptime": time.time() - self.started,
+                    "operations": {name: summary(histogram) for name, histogram in sorted(self.operations.items())},
+                    "storage": {f"{action}:{store}": summary(histogram) for (action, store), histogram in sorted(self.storage.items())},
+                    "bytes_written": dict(sorted(self.bytes_written.items()))}
+
+    def prometheus_text(self):
+        """Renders everything recorded so far in the Prometheus text exposition format."""
+        lines = []
+        def histogram_lines(name, labels, histogram):
+            for bound, running in histogram.cumulative():
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {running}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        with self.lock:
+            lines.append("# HELP tickets_operation_seconds Latency of data layer operations.")
+            lines.append("# TYPE tickets_operation_seconds histogram")
+            for name, histogram in sorted(self.operations.items()):
+                histogram_lines("tickets_operation_seconds", f'operation="{name}"', histogram)
+            lines.append("# HELP tickets_operation_errors_total Data layer operations that raised an exception.")
+            lines.append("# TYPE tickets_operation_errors_total counter")
+            for name, histogram in sorted(self.operations.items()):
+                lines.append(f'tickets_operation_errors_total{{operation="{name}"}} {histogram.errors}')
+            lines.append("# HELP tickets_storage_seconds Latency of loading, saving and appending each store.")
+            lines.append("# TYPE tickets_storage_seconds histogram")
+            for (action, store), histogram in sorted(self.storage.items()):
+                histogram_lines("tickets_storage_seconds", f'action="{action}",store="{store}"', histogram)
+            lines.append("# HELP tickets_storage_bytes_written_total Bytes written to disk per store.")
+            lines.append("# TYPE tickets_storage_bytes_written_total counter")
+            for store, size in sorted(self.bytes_written.items()):
+                lines.append(f'tickets_storage_bytes_written_total{{store="{store}"}} {size}')
+        return "\n".join(lines) + "\n"
+
+    def start_log(self, filename, interval=60.0):
+        """Appends a snapshot to a file as one JSON line every interval seconds, from a background thread.
+        Args:
+            filename (str): The log file.
+            interval (float, optional): Seconds between snapshots. Defaults to 60.
+        """
+        self.stop_log()
+        self.log_stop.clear()
+        def run():
+            while not self.log_stop.wait(interval):
+                self.write_log(filename)
+        self.log_thread = threading.Thread(target=run, name="metrics-log", daemon=True)
+        self.log_thread.start()
+
+    def write_log(self, filename):
+        """Appends one snapshot to a file as a JSON line."""
+        with open(filename, 'a') as f:
+            f.write(json.dumps(self.snapshot(), sort_keys=True) + "\n")
+
+    def stop_log(self):
+        """Stops the periodic log, if one is running."""
+        if self.log_thread is not None:
+            self.log_stop.set()
+            self.log_thread.join()
+            self.log_thread = None
+
+
+registry = MetricsRegistry() # Registry every instrumented call reports to
+
+def enable():
+    """Starts recording metrics."""
+    registry.enabled = True
+
+def disable():
+    """Stops recording metrics. What was recorded is kept until reset."""
+    registry.enabled = False
+
+
+def timed(operation=None):
+    """Decorator recording the latency of every call to a function while metrics are enabled.
+    Args:
+        operation (str, optional): The name recorded. Defaults to None, using the function's qualified name, such
+            as "DataManager.create_booking".
+    """
+    def decorate(function):
+        name = operation or function.__qualname__
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = function(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                registry.observe(name, time.perf_counter() - start, failed)
+        return wrapper
+    return decorate
@@ -0,0 +1,469 @@
+"""Headless service layer for the Race Event Ticket System.
+
+TicketService exposes login, event listing, quotes, checkout, booking history and the sales report without Tkinter,
+raising exceptions instead of showing dialogs. ApiServer serves it as an asyncio HTTP/JSON API:
+
+    python service.py --port 8080 --journal
+
+    POST /login     {"email": ..., "password": ...}                            -> {"token": ..., "user_id": ..., "name": ...}
+    GET  /events                                                               -> [event, ...]
+    POST /quote     {"event_id": ..., "tickets": {name: quantity}}             -> quote
+    POST /quotes    {"carts": [{"event_id": ..., "tickets": {...}}, ...]}       -> {"totals": [total, ...]}
+    POST /checkout  {"event_id": ..., "tickets": {...}, "payment_method": ...} -> {"booking": ..., "payment": ...}
+    GET  /bookings                                                             -> [booking, ...]
+    GET  /report                                                               -> {event_id: {ticket_name: totals}}
+    GET  /metrics                                                              -> Prometheus text (start with --metrics)
+    GET  /memory                                                               -> {store: {count, bytes, ...}, ...}
+
+/checkout and /bookings need an "Authorization: Bearer <token>" header with the token returned by /login. /report and
+/memory need the token of an admin, a user whose email was given with --admin.
+"""
+import argparse
+import asyncio
+import json
+import secrets
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from app import (DEFAULT_DISCOUNT_RULES, Admin, DataManager, DiscountRule, PricingEngine, ShardedStorage, SnapshotStorage,
+                 SqliteStorage, StorageError)
+
+
+class ServiceError(Exception):
+    """Raised when a request to the service can't be fulfilled."""
+    status = 400 # HTTP status reported by the API
+
+class AuthenticationError(ServiceError):
+    """Raised when credentials or a session token are invalid."""
+    status = 401
+
+class PermissionDeniedError(ServiceError):
+    """Raised when a logged-in user isn't allowed to use an admin operation."""
+    status = 403
+
+class NotFoundError(ServiceError):
+    """Raised when a requested event doesn't exist."""
+    status = 404
+
+class SoldOutError(ServiceError):
+    """Raised when there aren't enough seats left for a checkout."""
+    status = 409
+
+class PaymentError(ServiceError):
+    """Raised when a payment could not be processed."""
+    status = 402
+
+
+def event_to_dict(event):
+    """Converts a RaceEvent into a JSON-serializable dictionary."""
+    return {
+        "event_id": event.get_event_id(),
+        "name": event.get_name(),
+        "date": event.get_date(),
+        "location": event.get_location(),
+        "capacity": event.get_capacity(),
+        "available": event.get_availability(),
+        "tickets": [{"ticket_id": ticket.get_ticket_id(), "name": ticket.get_name(), "price": ticket.get_price(),
+                     "validity": ticket.get_validity(), "features": ticket.get_features(),
+                     "available": event.get_ticket_availability(ticket.get_name())}
+                    for ticket in event.get_available_tickets()],
+    }
+
+def booking_to_dict(booking):
+    """Converts a Booking into a JSON-serializable dictionary."""
+    return {
+        "booking_id": booking.get_booking_id(),
+        "user_id": booking.get_user_id(),
+        "event_id": booking.get_event_id(),
+        "booking_date": booking.get_booking_date(),
+        "status": booking.get_status(),
+        "total": booking.calculate_total(),
+        "items": [{"ticket_id": item.get_ticket_id(), "name": item.get_name(), "unit_price": item.get_unit_price(),
+                   "quantity": item.get_quantity()} for item in booking.get_items()],
+    }
+
+def payment_to_dict(payment):
+    """Converts a Payment into a JSON-serializable dictionary."""
+    return {
+        "payment_id": payment.get_payment_id(),
+        "booking_id": payment.get_booking_id(),
+        "amount": payment.get_amount(),
+        "payment_date": payment.get_payment_date(),
+        "method": payment.get_method(),
+    }
+
+
+class TicketService:
+    """Business operations of the ticket system, usable from any front end or server process."""
+    MEMORY_CACHE_SECONDS = 60.0 # How long a memory usage estimate is reused, as measuring scans every store
+
+    def __init__(self, data_manager, admin_emails=()):
+        """Initializes the TicketService.
+        Args:
+            data_manager (DataManager): An instance of the DataManager class for data access.
+            admin_emails (iterable, optional): Email addresses of the users allowed to read the sales report and
+                memory usage. Defaults to (), allowing no one.
+        """
+        self.data_manager = data_manager
+        self.account_manager = data_manager.get_account_manager()
+        self.admin = Admin(1, "AdminUser") # Simple admin user instance, as in the GUI
+        self.admin_emails = {self.account_manager.normalize_email(email) for email in admin_emails}
+        self.sessions = {} # Dictionary mapping session tokens to logged-in user IDs
+        self.memory_lock = threading.Lock() # Lets one request measure memory usage while the others wait for it
+        self.memory_report = None # The last memory usage estimate and the time it was measured
+
+    def login(self, email, password):
+        """Logs a user in and opens a session.
+        Args:
+            email (str): The user's email address.
+            password (str): The user's password.
+        Raises:
+            AuthenticationError: If the email or password is invalid.
+        Returns:
+            dict: The session token, user ID and name.
+        """
+        user = self.account_manager.authenticate(email, password)
+        if not user:
+            raise AuthenticationError("Invalid email or password.")
+        token = secrets.token_urlsafe(32)
+        self.sessions[token] = user.get_user_id()
+        return {"token": token, "user_id": user.get_user_id(), "name": user.get_name()}
+
+    def get_session_user(self, token):
+        """Returns the ID of the user logged in with a session token.
+        Raises:
+            AuthenticationError: If the token doesn't belong to an open session.
+        """
+        user_id = self.sessions.get(token)
+        if user_id is None:
+            raise AuthenticationError("Not logged in.")
+        return user_id
+
+    def get_admin_session(self, token):
+        """Returns the ID of the admin logged in with a session token.
+        Raises:
+            AuthenticationError: If the token doesn't belong to an open session.
+            PermissionDeniedError: If the user logged in isn't an admin.
+        """
+        user_id = self.get_session_user(token)
+        user = self.account_manager.get_user(user_id)
+        if not user or self.account_manager.normalize_email(user.get_email()) not in self.admin_emails:
+            raise PermissionDeniedError("Admin access required.")
+        return user_id
+
+    def list_events(self):
+        """Returns every race event with its tickets and remaining availability."""
+        self.data_manager.wait_until_loaded() # Availability counts every booking
+        return [event_to_dict(event) for event in self.data_manager.get_events()]
+
+    def _get_event(self, event_id):
+        """Returns an event, raising NotFoundError if it doesn't exist."""
+        if not isinstance(event_id, int) or isinstance(event_id, bool):
+            raise ServiceError("Event ID must be an integer.")
+        event = self.data_manager.get_event(event_id)
+        if not event:
+            raise NotFoundError(f"Event ID {event_id} does not exist.")
+        return event
+
+    def _validate_tickets(self, event, tickets):
+        """Checks that a cart names existing ticket types with non-negative whole quantities, at least one of them positive
+        and none below the minimum of its ticket type."""
+        if not isinstance(tickets, dict) or not tickets:
+            raise ServiceError("Select at least one ticket.")
+        for ticket_name, quantity in tickets.items():
+            ticket = event.get_ticket(ticket_name)
+            if not ticket:
+                raise ServiceError(f"Ticket type '{ticket_name}' does not exist for {event.get_name()}.")
+            if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 0:
+                raise ServiceError(f"Invalid quantity for '{ticket_name}'.")
+            if quantity:
+                try:
+                    ticket.check_quantity(quantity)
+                except ValueError as e:
+                    raise ServiceError(str(e)) from e
+        if not sum(tickets.values()):
+            raise ServiceError("Select at least one ticket.")
+
+    def quote(self, event_id, tickets):
+        """Prices a cart of tickets without booking it.
+        Args:
+            event_id (int): The ID of the event.
+            tickets (dict): A dictionary of ticket names and their quantities.
+        Returns:
+            dict: The priced lines, after discounts, and the total.
+        """
+        event = self._get_event(event_id)
+        self._validate_tickets(event, tickets)
+        prices = self.data_manager.get_unit_prices(event_id, tickets)
+        lines = [{"name": ticket_name, "unit_price": prices[ticket_name], "list_price": event.get_ticket(ticket_name).get_price(),
+                  "quantity": quantity} for ticket_name, quantity in tickets.items() if quantity > 0]
+        return {"event_id": event_id, "lines": lines, "total": sum(line["unit_price"] * line["quantity"] for line in lines)}
+
+    def quote_batch(self, carts):
+        """Prices many carts of tickets at once without booking them, such as every option shown on a page.
+        Args:
+            carts (list): Dictionaries with the "event_id" and "tickets" of each cart, as for quote().
+        Raises:
+            ServiceError: If a cart is malformed, naming the first one.
+        Returns:
+            dict: The total of each cart, in order.
+        """
+        if not isinstance(carts, list):
+            raise ServiceError("Carts must be a list.")
+        requests = []
+        for index, cart in enumerate(carts):
+            try:
+                if not isinstance(cart, dict):
+                    raise ServiceError("Each cart must be an object.")
+                self._validate_tickets(self._get_event(cart.get("event_id")), cart.get("tickets"))
+            except ServiceError as e:
+                raise type(e)(f"Cart {index}: {e}") from e
+            requests.append((cart["event_id"], cart["tickets"]))
+        return {"totals": self.data_manager.quote_batch(requests)}
+
+    def checkout(self, user_id, event_id, tickets, payment_method):
+        """Books a cart of tickets and pays for it, following the same steps as the GUI checkout.
+        Args:
+            user_id (int): The ID of the user buying the tickets.
+            event_id (int): The ID of the event.
+            tickets (dict): A dictionary of ticket names and their quantities.
+            payment_method (str): The payment method used.
+        Raises:
+            SoldOutError: If there aren't enough seats left.
+            PaymentError: If the payment could not be processed.
+        Returns:
+            dict: The booking and payment created.
+        """
+        event = self._get_event(event_id)
+        self._validate_tickets(event, tickets)
+        if not payment_method:
+            raise ServiceError("A payment method is required.")
+        try:
+            booking = self.data_manager.create_booking(user_id, event_id, tickets)
+        except ValueError as e:
+            raise SoldOutError(str(e)) from e
+        if not booking:
+            raise ServiceError("Could not create booking.")
+        try:
+            payment = self.data_manager.create_payment(booking.get_booking_id(), booking.calculate_total(), payment_method)
+            paid = payment.process_payment()
+        except Exception:
+            self.data_manager.cancel_booking(booking.get_booking_id()) # An unpaid booking mustn't keep its seats
+            raise
+        if not paid:
+            self.data_manager.cancel_booking(booking.get_booking_id())
+            raise PaymentError("There was an issue processing your payment. The booking was cancelled.")
+        self.data_manager.flush() # Durability barrier: the booking is on disk before it is confirmed
+        return {"booking": booking_to_dict(booking), "payment": payment_to_dict(payment)}
+
+    def booking_history(self, user_id):
+        """Returns every booking made by a user."""
+        return [booking_to_dict(booking) for booking in self.data_manager.get_bookings_for_user(user_id)]
+
+    def sales_report(self):
+        """Returns the units sold, revenue and discount-eligible units per event and ticket type."""
+        return self.data_manager.get_sales_totals()
+
+    def memory_usage(self):
+        """Returns the memory usage estimate of the data manager, measured at most once per MEMORY_CACHE_SECONDS."""
+        with self.memory_lock:
+            if self.memory_report is None or time.monotonic() - self.memory_report[1] >= self.MEMORY_CACHE_SECONDS:
+                self.memory_report = (self.data_manager.memory_usage(), time.monotonic())
+            return self.memory_report[0]
+
+
+class ApiServer:
+    """Minimal asyncio HTTP/1.1 server exposing a TicketService as a JSON API.
+    Connections are handled on the event loop; service calls run on a thread pool so slow disk writes don't stall other buyers.
+    """
+    MAX_BODY = 1024 * 1024 # Largest request body accepted, in bytes
+    REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 402: "Payment Required", 403: "Forbidden",
+               404: "Not Found", 405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+    def __init__(self, service, host="127.0.0.1", port=8080, workers=32):
+        """Initializes the ApiServer.
+        Args:
+            service (TicketService): The service to expose.
+            host (str, optional): The address to listen on. Defaults to "127.0.0.1".
+            port (int, optional): The port to listen on. Defaults to 8080.
+            workers (int, optional): Number of threads running service calls. Defaults to 32.
+        """
+        self.service = service
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        self.routes = {
+            ("POST", "/login"): self.handle_login,
+            ("GET", "/events"): lambda body, token: self.service.list_events(),
+            ("POST", "/quote"): lambda body, token: self.service.quote(body.get("event_id"), body.get("tickets")),
+            ("POST", "/quotes"): lambda body, token: self.service.quote_batch(body.get("carts")),
+            ("POST", "/checkout"): self.handle_checkout,
+            ("GET", "/bookings"): lambda body, token: self.service.booking_history(self.service.get_session_user(token)),
+            ("GET", "/report"): self.handle_report,
+            ("GET", "/metrics"): lambda body, token: metrics.registry.prometheus_text(),
+            ("GET", "/memory"): self.handle_memory,
+        }
+
+    def handle_login(self, body, token):
+        """Handles POST /login."""
+        return self.service.login(body.get("email", ""), body.get("password", ""))
+
+    def handle_checkout(self, body, token):
+        """Handles POST /checkout."""
+        user_id = self.service.get_session_user(token)
+        return self.service.checkout(user_id, body.get("event_id"), body.get("tickets"), body.get("payment_method"))
+
+    def handle_report(self, body, token):
+        """Handles GET /report."""
+        self.service.get_admin_session(token)
+        return self.service.sales_report()
+
+    def handle_memory(self, body, token):
+        """Handles GET /memory."""
+        self.service.get_admin_session(token)
+        return self.service.memory_usage()
+
+    async def dispatch(self, method, path, headers, raw_body):
+        """Routes a request to its handler.
+        Returns:
+            tuple: The HTTP status and the JSON-serializable response payload.
+        """
+        path = path.split("?", 1)[0]
+        handler = self.routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in self.routes):
+                return 405, {"error": f"Method {method} not allowed."}
+            return 404, {"error": f"No such endpoint: {path}"}
+        try:
+            body = json.loads(raw_body) if raw_body else {}
+        except ValueError:
+            return 400, {"error": "Request body is not valid JSON."}
+        if not isinstance(body, dict):
+            return 400, {"error": "Request body must be a JSON object."}
+        authorization = headers.get("authorization", "")
+        token = authorization[7:] if authorization.startswith("Bearer ") else None
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, handler, body, token)
+        except ServiceError as e:
+            return e.status, {"error": str(e)}
+        except StorageError as e:
+            return 500, {"error": str(e)}
+        except Exception:
+            traceback.print_exc() # A bug, not a bad request: answer the client and keep serving
+            return 500, {"error": "Internal server error."}
+        return 200, result
+
+    async def handle_connection(self, reader, writer):
+        """Serves the requests of one client connection, keeping it open between requests."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    await self.respond(writer, 400, {"error": "Malformed request line."}, keep_alive=False)
+                    break
+                method, path, version = parts
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0) or 0)
+                if length > self.MAX_BODY:
+                    await self.respond(writer, 413, {"error": "Request body too large."}, keep_alive=False)
+                    break
+                raw_body = await reader.readexactly(length) if length else b""
+                status, payload = await self.dispatch(method, path, headers, raw_body)
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass # Client went away or sent a malformed request
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        """Writes a JSON response, or a plain text one if the payload is a string."""
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        head = (f"HTTP/1.1 {status} {self.REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self):
+        """Listens for connections until cancelled."""
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port, backlog=1024)
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        """Runs the server until interrupted."""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.executor.shutdown()
+
+
+def main():
+    """Starts the HTTP API from the command line."""
+    parser = argparse.ArgumentParser(description="Serve the Race Event Ticket System as an HTTP/JSON API.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+    parser.add_argument("--workers", type=int, default=32, help="threads running service calls")
+    parser.add_argument("--sqlite", metavar="FILE", help="use the SQLite storage backend with this database file")
+    parser.add_argument("--shards", metavar="DIR", help="partition bookings and payments into one file per event under this directory")
+    parser.add_argument("--snapshots", action="store_true", help="keep the data in binary snapshot files (users.snap, ...) instead of pickle files; convert existing files with convert_snapshots.py")
+    parser.add_argument("--journal", action="store_true", help="append new bookings and payments to journals instead of rewriting the pickle files")
+    parser.add_argument("--shared", action="store_true", help="lock and version the pickle files so several processes can serve the same data")
+    parser.add_argument("--lazy", action="store_true", help="start serving while bookings and payments load in the background")
+    parser.add_argument("--write-behind", type=float, metavar="SECONDS", help="queue writes and flush them in the background after this many seconds")
+    parser.add_argument("--metrics", action="store_true", help="record operation latencies and bytes written, served at /metrics")
+    parser.add_argument("--metrics-log", metavar="FILE", help="append a JSON snapshot of the metrics to this file periodically (implies --metrics)")
+    parser.add_argument("--metrics-interval", type=float, default=60.0, help="seconds between --metrics-log snapshots")
+    parser.add_argument("--early-bird", nargs=2, type=float, metavar=("DAYS", "PERCENT"), help="take PERCENT off bookings made at least DAYS days before the event")
+    parser.add_argument("--admin", action="append", default=[], metavar="EMAIL", help="let the user with this email read /report and /memory (repeatable)")
+    parser.add_argument("--columnar", action="store_true", help="keep bookings and payments in compact struct-of-arrays stores")
+    args = parser.parse_args()
+    if args.metrics or args.metrics_log:
+        metrics.enable()
+    if args.metrics_log:
+        metrics.registry.start_log(args.metrics_log, args.metrics_interval)
+    storage = None
+    if args.sqlite:
+        storage = SqliteStorage(args.sqlite)
+    elif args.shards:
+        storage = ShardedStorage(shard_dir=args.shards, journal=args.journal, shared=args.shared, write_behind=args.write_behind)
+    elif args.snapshots:
+        storage = SnapshotStorage(journal=args.journal, shared=args.shared, write_behind=args.write_behind)
+    rules = DEFAULT_DISCOUNT_RULES
+    if args.early_bird:
+        days, percent = args.early_bird
+        rules += (DiscountRule("Early bird", percent, days_before=int(days)),)
+    data_manager = DataManager(journal=args.journal, storage=storage, columnar=args.columnar, lazy=args.lazy, shared=args.shared,
+                               write_behind=args.write_behind, pricing=PricingEngine(rules))
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        ApiServer(TicketService(data_manager, args.admin), args.host, args.port, args.workers).run()
+    finally:
+        data_manager.close()
+        metrics.registry.stop_log()
+
+
+if __name__ == "__main__":
+    main()
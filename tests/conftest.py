@@ -0,0 +1,56 @@
+"""Shared fixtures and helpers: data managers over temporary files, seeded with one user and one event."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import DataManager, PickleStorage, RaceEvent, Ticket
+
+from benchmarks.suite import make_storage
+
+
+def make_event(event_id=1, capacity=10, date="2099-06-10"):
+    """Returns an event selling two ticket types, both flagged for discounts."""
+    event = RaceEvent(event_id, f"Race Day {event_id}", date, "Aintree Racecourse", capacity)
+    event.add_ticket(Ticket(event_id * 100 + 1, "Single Race", 50.0))
+    event.add_ticket(Ticket(event_id * 100 + 2, "Grandstand", 80.0))
+    return event
+
+def seed(storage):
+    """Returns a DataManager on a storage, after adding one user (ID 1) and one event (ID 1, 10 seats)."""
+    data_manager = DataManager(storage=storage)
+    data_manager.get_account_manager().create_account("Alice Smith", "alice@example.com", "secret")
+    data_manager.add_event(make_event())
+    return data_manager
+
+def open_manager(kind, directory, **kwargs):
+    """Opens a DataManager on a storage of one of the benchmark kinds (benchmarks.suite.STORAGES)."""
+    return DataManager(storage=make_storage(kind, str(directory), **kwargs))
+
+def contents(data_manager):
+    """Returns the bookings, payments, sold seats and next IDs a DataManager holds, in a comparable form."""
+    bookings = {booking_id: (booking.get_user_id(), booking.get_event_id(), booking.get_status(),
+                             [(item.get_name(), item.get_unit_price(), item.get_quantity()) for item in booking.get_items()])
+                for booking_id, booking in data_manager.bookings.items()}
+    payments = {payment_id: (payment.get_booking_id(), payment.get_amount(), payment.get_method())
+                for payment_id, payment in data_manager.payments.items()}
+    seats = {event.get_event_id(): event.get_seats_sold() for event in data_manager.get_events()}
+    return bookings, payments, seats, data_manager.next_booking_id, data_manager.next_payment_id
+
+
+@pytest.fixture
+def pickle_storage(tmp_path):
+    """Returns a factory of PickleStorage objects over the same temporary files."""
+    def make(**kwargs):
+        return PickleStorage(*(str(tmp_path / name) for name in ("users.pkl", "events.pkl", "bookings.pkl", "payments.pkl")), **kwargs)
+    return make
+
+
+@pytest.fixture
+def manager(pickle_storage):
+    """Returns a seeded DataManager (see seed), closed after the test."""
+    data_manager = seed(pickle_storage())
+    yield data_manager
+    data_manager.close()
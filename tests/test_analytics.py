@@ -0,0 +1,47 @@
+"""Columnar sales analytics."""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from analytics import SalesAnalytics
+
+from conftest import make_event
+
+
+def test_refresh_projects_only_new_bookings(manager):
+    analytics = SalesAnalytics(manager)
+    manager.create_booking(1, 1, {"Single Race": 2})
+    assert analytics.sales_by_ticket() == {1: {"Single Race": 2}}
+    manager.create_booking(1, 1, {"Grandstand": 1})
+    assert analytics.sales_by_ticket() == {1: {"Single Race": 2, "Grandstand": 1}}
+    assert len(analytics.lines) == 2
+
+
+def test_cancelling_or_reloading_rebuilds_the_projection(manager):
+    analytics = SalesAnalytics(manager)
+    booking = manager.create_booking(1, 1, {"Single Race": 2})
+    manager.create_booking(1, 1, {"Grandstand": 1})
+    analytics.refresh()
+    manager.cancel_booking(booking.get_booking_id())
+    assert analytics.sales_by_ticket() == {1: {"Grandstand": 1}}
+    manager.bookings = manager.load_bookings()
+    assert analytics.sales_by_ticket() == {1: {"Grandstand": 1}}
+    assert analytics.sales_by_ticket() == manager.get_sales_report()
+
+
+def test_concurrent_reports_count_each_booking_once(manager):
+    manager.add_event(make_event(2, capacity=1000))
+    manager.create_bookings_bulk([(1, 2, {"Single Race": 1})] * 400)
+    analytics = SalesAnalytics(manager)
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6) # Switch threads often, so unguarded refreshes would interleave
+    try:
+        with ThreadPoolExecutor(max_workers=8) as workers:
+            reports = list(workers.map(lambda _: analytics.summary(), range(8)))
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert all(report["units"] == {2: {"Single Race": 400}} for report in reports)
+    assert len(analytics.lines) == 400
@@ -0,0 +1,88 @@
+"""Event search index."""
+from app import EventCatalog, RaceEvent
+
+
+def event(event_id, name, date, location="Aintree Racecourse"):
+    """Returns an event with 100 seats and no tickets."""
+    return RaceEvent(event_id, name, date, location, 100)
+
+
+def catalog():
+    """Returns a catalog of four events, two of them named alike and two held at Ascot."""
+    return EventCatalog([event(1, "Grand National", "2025-04-05"),
+                         event(2, "Royal Ascot", "2025-06-17", "Ascot Racecourse"),
+                         event(3, "Grand National", "2026-04-04"),
+                         event(4, "Ascot Gold Cup", "2025-06-19", "  ascot   RACECOURSE ")])
+
+
+def test_prefix_search_matches_the_start_of_any_word():
+    events = catalog()
+    assert events.search("gra") == [1, 3]
+    assert events.search("nat") == [1, 3]
+    assert events.search("GOLD c") == [4]
+    assert events.search("cup") == [4]
+    assert events.search("ational") == []
+    assert events.search("") == [1, 2, 4, 3]
+
+
+def test_find_by_name_returns_the_earliest_event():
+    events = catalog()
+    assert events.find_by_name("  grand   NATIONAL") == 1
+    assert events.find_by_name("Grand") is None
+    events.remove(1)
+    assert events.find_by_name("Grand National") == 3
+
+
+def test_date_filters_include_both_ends():
+    events = catalog()
+    assert events.search(start_date="2025-06-17") == [2, 4, 3]
+    assert events.search(end_date="2025-06-17") == [1, 2]
+    assert events.search(start_date="2025-06-17", end_date="2025-06-19") == [2, 4]
+    assert events.search(start_date="2025-06-18", end_date="2025-06-18") == []
+    assert events.search(start_date="2027-01-01") == []
+    assert events.search("grand", start_date="2025-04-05", end_date="2026-04-04") == [1, 3]
+    assert events.search("grand", start_date="2025-04-06") == [3]
+
+
+def test_location_filter_intersects_the_name_search():
+    events = catalog()
+    assert events.search(location="ASCOT racecourse") == [2, 4]
+    assert events.search("royal", location="Ascot Racecourse") == [2]
+    assert events.search("grand", location="Ascot Racecourse") == []
+    assert events.search(location="Epsom Downs") == []
+    assert events.get_locations() == ["Aintree Racecourse", "Ascot Racecourse"]
+
+
+def test_limit_keeps_the_earliest_matches():
+    events = catalog()
+    assert events.search(limit=2) == [1, 2]
+    assert events.search(location="Ascot Racecourse", limit=1) == [2]
+    assert events.search("grand", limit=0) == []
+
+
+def test_removing_one_of_two_events_sharing_a_name_or_location():
+    events = catalog()
+    events.remove(1)
+    assert events.search("grand") == [3]
+    assert events.search(location="Aintree Racecourse") == [3]
+    events.remove(4)
+    assert events.search(location="Ascot Racecourse") == [2]
+    assert events.search("cup") == []
+    events.remove(4) # Already removed
+    assert events.search() == [2, 3]
+    events.remove(3)
+    assert events.get_locations() == ["Ascot Racecourse"]
+    assert events.words == sorted(events.words) and len(events.words) == 2 and len(events.dates) == 1
+
+
+def test_re_adding_an_event_after_a_rename_or_move():
+    events = catalog()
+    events.add(event(2, "Royal Meeting", "2025-06-18", "York Racecourse"))
+    assert events.search("ascot") == [4]
+    assert events.search("meet") == [2]
+    assert events.find_by_name("Royal Ascot") is None
+    assert events.search(location="Ascot Racecourse") == [4]
+    assert events.search(location="york racecourse") == [2]
+    assert events.search(start_date="2025-06-18", end_date="2025-06-18") == [2]
+    assert events.search() == [1, 2, 4, 3]
+    assert len(events.words) == sum(len(events.word_keys(name)) for name, _, _ in events.entries.values())
@@ -0,0 +1,23 @@
+"""Synthetic benchmark data."""
+from app import DataManager
+
+from benchmarks.datagen import write_dataset
+from benchmarks.suite import make_storage
+
+
+def test_generated_history_respects_capacity(pickle_storage):
+    counts = write_dataset(pickle_storage(), users=20, events=2, bookings=100, capacity=30)
+    assert counts["bookings"] < 100
+    data_manager = DataManager(storage=pickle_storage())
+    try:
+        assert [event.get_seats_sold() for event in data_manager.get_events()] == [30, 30]
+        assert data_manager.next_booking_id == counts["bookings"] + 1
+    finally:
+        data_manager.close()
+
+
+def test_same_seed_generates_the_same_data(tmp_path):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        write_dataset(make_storage("pickle", str(tmp_path / name)), users=10, events=3, bookings=50, seed=7)
+    assert (tmp_path / "a" / "bookings.pkl").read_bytes() == (tmp_path / "b" / "bookings.pkl").read_bytes()
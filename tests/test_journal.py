@@ -0,0 +1,63 @@
+"""Saving and reloading through every backend, and the append-only booking and payment journals."""
+import os
+
+import pytest
+
+from app import DataManager
+
+from benchmarks.datagen import write_dataset
+from benchmarks.suite import STORAGES, make_storage
+from conftest import contents, open_manager, seed
+
+
+@pytest.mark.parametrize("kind", STORAGES)
+def test_round_trip(tmp_path, kind):
+    write_dataset(make_storage(kind, str(tmp_path)), users=20, events=3, bookings=50, seed=1)
+    data_manager = open_manager(kind, tmp_path)
+    booking = data_manager.create_booking(1, 1, {data_manager.get_event(1).get_available_tickets()[0].get_name(): 2})
+    data_manager.create_payment(booking.get_booking_id(), booking.calculate_total(), "PayPal")
+    expected = contents(data_manager)
+    data_manager.close()
+    reloaded = open_manager(kind, tmp_path)
+    try:
+        assert contents(reloaded) == expected
+        assert expected[3] == 52 and expected[4] == 52
+        assert reloaded.get_account_manager().authenticate("user1@example.com", "password1")
+    finally:
+        reloaded.close()
+
+
+def test_journal_appends_and_compacts(pickle_storage, tmp_path):
+    data_manager = seed(pickle_storage(journal=True))
+    for _ in range(3):
+        data_manager.create_booking(1, 1, {"Single Race": 1})
+    assert not (tmp_path / "bookings.pkl").exists() # Only the journal is written
+    assert os.path.getsize(tmp_path / "bookings.pkl.log") > 0
+    data_manager.close()
+    reloaded = DataManager(storage=pickle_storage(journal=True))
+    assert list(reloaded.bookings) == [1, 2, 3]
+    assert reloaded.compact()
+    assert os.path.getsize(tmp_path / "bookings.pkl.log") == 0
+    reloaded.close()
+    compacted = DataManager(storage=pickle_storage(journal=True))
+    assert list(compacted.bookings) == [1, 2, 3] and compacted.get_event(1).get_seats_sold() == 3
+    compacted.close()
+
+
+def test_journal_drops_a_torn_tail(pickle_storage, tmp_path):
+    data_manager = seed(pickle_storage(journal=True))
+    data_manager.create_booking(1, 1, {"Single Race": 1})
+    data_manager.create_booking(1, 1, {"Single Race": 2})
+    data_manager.close()
+    log = tmp_path / "bookings.pkl.log"
+    good_size = os.path.getsize(log)
+    with open(log, "ab") as f:
+        f.write(b"\x80\x04\x95partial") # A record cut short by a crash mid-write
+    reloaded = DataManager(storage=pickle_storage(journal=True))
+    assert list(reloaded.bookings) == [1, 2]
+    assert os.path.getsize(log) == good_size
+    reloaded.create_booking(1, 1, {"Single Race": 1}) # Appended on a clean record boundary
+    reloaded.close()
+    again = DataManager(storage=pickle_storage(journal=True))
+    assert list(again.bookings) == [1, 2, 3]
+    again.close()
@@ -0,0 +1,55 @@
+"""Loading the booking history in the background, and the persisted ID counters."""
+import threading
+
+import pytest
+
+from app import AccountManager, DataManager
+
+from conftest import contents, make_event, seed
+
+
+def history(data_manager):
+    """Returns what a DataManager derives from the booking history: contents, indexes and sales totals."""
+    return (contents(data_manager), dict(data_manager.bookings_by_user), dict(data_manager.bookings_by_event),
+            dict(data_manager.payments_by_booking), data_manager.get_sales_totals())
+
+
+@pytest.mark.parametrize("journal", [False, True])
+def test_lazy_history_matches_eager_history(pickle_storage, monkeypatch, journal):
+    data_manager = seed(pickle_storage(journal=journal))
+    data_manager.get_account_manager().create_account("Bob Jones", "bob@example.com", "secret")
+    data_manager.add_event(make_event(2))
+    for user_id, event_id, tickets in [(1, 1, {"Single Race": 2}), (2, 2, {"Grandstand": 3}), (2, 1, {"Single Race": 5})]:
+        booking = data_manager.create_booking(user_id, event_id, tickets)
+        data_manager.create_payment(booking.get_booking_id(), booking.calculate_total(), "Credit Card")
+    data_manager.cancel_booking(1)
+    data_manager.close()
+
+    eager = DataManager(storage=pickle_storage(journal=journal))
+    release = threading.Event()
+    load_bookings = DataManager.load_bookings
+    monkeypatch.setattr(DataManager, "load_bookings", lambda self: release.wait(5) and load_bookings(self))
+    lazy = DataManager(storage=pickle_storage(journal=journal), lazy=True)
+    try:
+        # Users and events are usable while the history is still loading
+        assert not lazy.history_loaded.is_set()
+        assert lazy.get_account_manager().find_by_email("bob@example.com").get_user_id() == 2
+        assert lazy.get_event(2).get_name() == "Race Day 2"
+        assert not lazy.wait_until_loaded(timeout=0.01)
+        release.set()
+        assert history(lazy) == history(eager)
+        assert lazy.get_event(1).get_seats_sold() == 5 and lazy.get_event(2).get_seats_sold() == 3
+        assert lazy.create_booking(1, 2, {"Grandstand": 1}).get_booking_id() == 4
+    finally:
+        release.set()
+        lazy.close()
+        eager.close()
+
+
+def test_user_ids_are_not_reused(pickle_storage):
+    seed(pickle_storage()).close()
+    account_manager = AccountManager(storage=pickle_storage())
+    assert account_manager.create_account("Bob Jones", "bob@example.com", "secret")
+    assert account_manager.delete_user(2)
+    reloaded = AccountManager(storage=pickle_storage())
+    assert reloaded.next_user_id == 3
@@ -0,0 +1,75 @@
+"""Loading the data files written by earlier versions of the app."""
+import os
+import pickle
+import pickletools
+import shutil
+
+import pytest
+
+from app import Booking, DataManager, PickleStorage, Ticket
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def pickled_classes(filename):
+    """Returns the names of the classes a pickle file refers to, without loading it."""
+    with open(filename, "rb") as f:
+        return {arg for opcode, arg, _ in pickletools.genops(f) if opcode.name in ("GLOBAL", "STACK_GLOBAL", "SHORT_BINUNICODE", "BINUNICODE")}
+
+
+@pytest.fixture
+def legacy_storage(tmp_path):
+    """Returns a PickleStorage over copies of the data files shipped in the repository."""
+    for name in ("users.pkl", "events.pkl", "bookings.pkl", "payments.pkl"):
+        shutil.copy(os.path.join(REPO, name), tmp_path / name)
+    return PickleStorage(*(str(tmp_path / name) for name in ("users.pkl", "events.pkl", "bookings.pkl", "payments.pkl")))
+
+
+def test_legacy_bookings_are_converted_to_line_items(legacy_storage):
+    bookings, next_booking_id = legacy_storage.load_bookings()
+    assert sorted(bookings) == [1, 2] and next_booking_id == 3
+    for booking in bookings.values():
+        assert booking.get_event_id() == 2 and booking.get_status() == "Pending"
+        assert [(item.get_ticket_id(), item.get_name(), item.get_unit_price(), item.get_quantity()) for item in booking.get_items()] == \
+            [(201, "Queen Anne Enclosure", 80.0, 1), (202, "Village Enclosure", 60.0, 2)]
+        assert booking.get_ticket_count() == 3
+        assert booking.calculate_total() == 200.0
+
+
+def test_legacy_booking_state_with_one_ticket_per_seat():
+    single = Ticket(101, "Single Race", 50.0)
+    vip = Ticket(102, "Weekend Package", 120.0, discount_available=False)
+    state = {"booking_id": 7, "user_id": 3, "event_id": 1, "booking_date": "2025-05-10 08:28:55", "status": "Confirmed",
+             "tickets": [single, vip, single, single], "total_amount": 270.0}
+    booking = Booking.__new__(Booking)
+    booking.__setstate__(state)
+    assert [(item.get_name(), item.get_quantity(), item.is_discount_available()) for item in booking.get_items()] == \
+        [("Single Race", 3, True), ("Weekend Package", 1, False)]
+    assert booking.calculate_total() == 270.0
+    assert booking.get_status() == "Confirmed" and booking.get_booking_date() == "2025-05-10 08:28:55"
+    restored = pickle.loads(pickle.dumps(booking))
+    assert "tickets" not in restored.__getstate__()
+    assert [(item.get_name(), item.get_quantity()) for item in restored.get_items()] == [("Single Race", 3), ("Weekend Package", 1)]
+
+
+def test_legacy_users_drop_their_stored_bookings(legacy_storage, tmp_path):
+    assert "Booking" in pickled_classes(tmp_path / "users.pkl") # Earlier versions stored each user's bookings
+    users, next_user_id = legacy_storage.load_users()
+    assert next_user_id == 3
+    assert [user.__getstate__() for user in users.values()] == [
+        {"user_id": 1, "name": "jack", "email": "j@gmail.com", "password": "123", "balance": 0.0},
+        {"user_id": 2, "name": "john", "email": "john@gmail.com", "password": "123456", "balance": 0.0}]
+
+
+def test_saved_users_hold_no_bookings(legacy_storage, tmp_path):
+    data_manager = DataManager(storage=legacy_storage)
+    try:
+        account_manager = data_manager.get_account_manager()
+        assert account_manager.authenticate("john@gmail.com", "123456").get_user_id() == 2
+        assert [booking.get_booking_id() for booking in data_manager.get_bookings_for_user(2)] == [2]
+        assert account_manager.update_user(2, name="John Smith")
+    finally:
+        data_manager.close()
+    assert not {"Booking", "Ticket", "bookings"} & pickled_classes(tmp_path / "users.pkl")
+    users, _ = PickleStorage(str(tmp_path / "users.pkl")).load_users()
+    assert users[2].get_name() == "John Smith"
@@ -0,0 +1,23 @@
+"""Concurrent checkout load simulator."""
+import pytest
+
+from app import Payment
+
+from benchmarks.loadtest import format_report, run_load
+
+
+@pytest.mark.parametrize("storage", ["pickle", "journal"])
+def test_load_run_passes_its_checks(tmp_path, storage):
+    report = run_load(buyers=4, checkouts=10, storage=storage, users=20, events=2, capacity=40, directory=str(tmp_path))
+    assert report["attempts"] == 40
+    assert report["outcomes"].get("ok", 0) > 0 and report["outcomes"].get("sold_out", 0) > 0
+    assert report["checks"]["passed"], report["checks"]
+    assert format_report(report)[-1] == "checks passed"
+
+
+def test_failed_payments_give_their_seats_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(Payment, "process_payment", lambda payment: payment.get_payment_id() % 2 == 0)
+    report = run_load(buyers=4, checkouts=10, users=20, events=2, bookings=10, directory=str(tmp_path))
+    assert report["outcomes"]["payment_failed"] > 0 and report["outcomes"]["ok"] > 0
+    assert report["checks"]["uncancelled_unpaid_bookings"] == 0
+    assert report["checks"]["passed"], report["checks"]
@@ -0,0 +1,57 @@
+"""Memory usage estimates and allocation tracking."""
+import json
+import sys
+
+from app import deep_sizeof
+
+from conftest import make_event
+
+
+def test_store_counts(manager):
+    manager.add_event(make_event(2, capacity=100))
+    for event_id, tickets in [(1, {"Single Race": 2}), (2, {"Grandstand": 1}), (2, {"Single Race": 3})]:
+        booking = manager.create_booking(1, event_id, tickets)
+        manager.create_payment(booking.get_booking_id(), booking.calculate_total(), "Credit Card")
+    report = manager.memory_usage()
+    assert {store: report[store]["count"] for store in ("users", "events", "bookings", "payments")} == \
+        {"users": 1, "events": 2, "bookings": 3, "payments": 3}
+    assert report["indexes"]["count"] == 1 + 2 + 3 + 2 + 1 # Users, events, bookings with payments, events sold, emails
+    assert report["bookings"]["type"] == "dict" and not report["bookings"]["sampled"]
+    assert report["bookings"]["bytes_per_record"] == report["bookings"]["bytes"] / 3
+    assert report["total_bytes"] == sum(report[store]["bytes"] for store in ("users", "events", "bookings", "payments", "indexes"))
+
+
+def test_large_stores_are_sampled(manager):
+    manager.add_event(make_event(2, capacity=1000))
+    manager.create_bookings_bulk([(1, 2, {"Single Race": 1})] * 200)
+    exact = manager.memory_usage(sample_size=1000)
+    sampled = manager.memory_usage(sample_size=20)
+    assert not exact["bookings"]["sampled"] and sampled["bookings"]["sampled"]
+    assert not sampled["users"]["sampled"]
+    assert sampled["bookings"]["count"] == 200
+    assert abs(sampled["bookings"]["bytes"] - exact["bookings"]["bytes"]) < exact["bookings"]["bytes"] * 0.1
+
+
+def test_deep_sizeof_scales_the_sample_up():
+    items = [f"item {index:04d}" for index in range(1000)]
+    exact = sys.getsizeof(items) + sum(sys.getsizeof(item) for item in items)
+    assert deep_sizeof(items, sample_size=1000) == (exact, False)
+    assert deep_sizeof(items, sample_size=100) == (exact, True) # Every entry has the same size
+    shared = {"a": items, "b": items}
+    size, _ = deep_sizeof(shared)
+    assert size == sys.getsizeof(shared) + 2 * sys.getsizeof("a") + exact # The list is only counted once
+
+
+def test_dump_memory_report_with_allocation_tracking(manager, tmp_path):
+    manager.start_allocation_tracking()
+    try:
+        manager.create_booking(1, 1, {"Single Race": 1})
+        filename = tmp_path / "memory.json"
+        report = manager.dump_memory_report(str(filename))
+    finally:
+        manager.stop_allocation_tracking()
+    assert json.loads(filename.read_text()) == report
+    assert report["stores"]["bookings"]["count"] == 1
+    assert report["allocations"]["methods"]["create_booking"]["calls"] == 1
+    assert report["allocations"]["traced_bytes"] > 0 and report["allocations"]["top_sites"]
+    assert manager.allocation_report()["top_sites"] == [] # Tracking stopped
@@ -0,0 +1,95 @@
+"""Operation metrics and their export."""
+import json
+
+import pytest
+
+import metrics
+from metrics import BUCKETS, Histogram, MetricsRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Returns a fresh, enabled registry standing in for the module one, so tests don't see each other's metrics."""
+    fresh = MetricsRegistry()
+    fresh.enabled = True
+    monkeypatch.setattr(metrics, "registry", fresh)
+    return fresh
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram()
+    assert histogram.quantile(0.5) is None
+    for seconds in (0.0001, 0.0002, 0.0002, 0.3, 20.0):
+        histogram.observe(seconds)
+    histogram.observe(0.003, failed=True)
+    assert histogram.count == 6 and histogram.errors == 1
+    assert histogram.total == pytest.approx(20.3035)
+    cumulative = dict(histogram.cumulative())
+    assert len(cumulative) == len(BUCKETS) + 1
+    assert (cumulative[0.0001], cumulative[0.00025], cumulative[0.005], cumulative[0.5], cumulative[10.0], cumulative["+Inf"]) == (1, 3, 4, 5, 5, 6)
+    assert histogram.quantile(0.5) == 0.00025
+    assert histogram.quantile(0.8) == 0.5
+    assert histogram.quantile(0.99) == float("inf")
+
+
+def test_prometheus_text(registry):
+    registry.observe("DataManager.quote", 0.002)
+    registry.observe("DataManager.quote", 0.2, failed=True)
+    registry.observe_storage("save", "booking", 0.01, size=512)
+    registry.observe_storage("append", "booking", 0.001, size=64)
+    lines = registry.prometheus_text().splitlines()
+    assert lines[:2] == ["# HELP tickets_operation_seconds Latency of data layer operations.",
+                         "# TYPE tickets_operation_seconds histogram"]
+    assert 'tickets_operation_seconds_bucket{operation="DataManager.quote",le="0.001"} 0' in lines
+    assert 'tickets_operation_seconds_bucket{operation="DataManager.quote",le="0.0025"} 1' in lines
+    assert 'tickets_operation_seconds_bucket{operation="DataManager.quote",le="+Inf"} 2' in lines
+    assert 'tickets_operation_seconds_count{operation="DataManager.quote"} 2' in lines
+    assert 'tickets_operation_seconds_sum{operation="DataManager.quote"} 0.202' in lines
+    assert 'tickets_operation_errors_total{operation="DataManager.quote"} 1' in lines
+    assert 'tickets_storage_seconds_count{action="save",store="booking"} 1' in lines
+    assert 'tickets_storage_bytes_written_total{store="booking"} 576' in lines
+    assert "# TYPE tickets_storage_bytes_written_total counter" in lines
+    assert all(line.startswith("# ") or line.startswith("tickets_") for line in lines)
+
+
+def test_snapshot_and_log(registry, tmp_path):
+    registry.observe("AccountManager.authenticate", 0.004)
+    registry.observe_storage("load", "user", 0.02)
+    snapshot = registry.snapshot()
+    assert snapshot["operations"] == {"AccountManager.authenticate": {"count": 1, "errors": 0, "seconds": 0.004, "mean": 0.004,
+                                                                      "p50": 0.005, "p95": 0.005, "p99": 0.005}}
+    assert snapshot["storage"]["load:user"]["p99"] == 0.025
+    assert snapshot["bytes_written"] == {}
+    log = tmp_path / "metrics.jsonl"
+    registry.write_log(str(log))
+    registry.observe("AccountManager.authenticate", 0.004)
+    registry.write_log(str(log))
+    entries = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [entry["operations"]["AccountManager.authenticate"]["count"] for entry in entries] == [1, 2]
+    registry.reset()
+    assert registry.snapshot()["operations"] == {}
+
+
+def test_timed_records_calls_and_failures(registry):
+    @metrics.timed("custom")
+    def work(fail=False):
+        if fail:
+            raise ValueError("failed")
+        return 42
+    assert work() == 42
+    with pytest.raises(ValueError):
+        work(fail=True)
+    assert (registry.operations["custom"].count, registry.operations["custom"].errors) == (2, 1)
+    assert work.__name__ == "work"
+
+
+def test_nothing_is_recorded_while_disabled(registry, manager):
+    registry.enabled = False
+    registry.reset() # Drop what seeding the data manager recorded
+    manager.create_booking(1, 1, {"Single Race": 1})
+    manager.quote(1, {"Single Race": 1})
+    assert registry.snapshot()["operations"] == {} and registry.storage == {} and registry.bytes_written == {}
+    registry.enabled = True
+    manager.create_booking(1, 1, {"Single Race": 1})
+    assert registry.operations["DataManager.create_booking"].count == 1
+    assert registry.bytes_written["booking"] > 0
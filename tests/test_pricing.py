@@ -0,0 +1,117 @@
+"""Discount rules and the compiled pricing engine."""
+import pytest
+
+from app import DEFAULT_DISCOUNT_RULES, Admin, DataManager, DiscountRule, EventPricing, PricingEngine, Ticket
+
+from conftest import make_event, seed
+
+EVENT_DAY = EventPricing.day_number("2099-06-10")
+
+
+def day(days_before):
+    """Returns the day number of a booking made some days before the test event."""
+    return EVENT_DAY - days_before
+
+
+def add_group_ticket(event):
+    """Adds a ticket type priced for groups of 5 or more, which the group discount doesn't apply to."""
+    event.add_ticket(Ticket(event.get_event_id() * 100 + 3, "Group Discount", 45.0, discount_available=False, min_quantity=5))
+    return event
+
+
+def test_default_rules():
+    pricing = PricingEngine().for_event(make_event())
+    assert pricing.unit_prices({"Single Race": 4}, day(10)) == {"Single Race": 50.0}
+    assert pricing.unit_prices({"Single Race": 3, "Grandstand": 2}, day(10)) == {"Single Race": 45.0, "Grandstand": 72.0}
+    assert pricing.total({"Single Race": 1}, day(365)) == 50.0 # No early-bird discount unless one is configured
+
+
+def test_early_bird_rule():
+    pricing = PricingEngine(DEFAULT_DISCOUNT_RULES + (DiscountRule("Early bird", 10, days_before=60),)).for_event(make_event())
+    assert pricing.total({"Single Race": 1}, day(60)) == 45.0
+    assert pricing.total({"Single Race": 1}, day(59)) == 50.0
+
+
+def test_the_best_discount_wins_without_stacking():
+    rules = [DiscountRule("Group", 10, min_quantity=5), DiscountRule("Big group", 25, min_quantity=20),
+             DiscountRule("Early bird", 15, days_before=30)]
+    pricing = PricingEngine(rules).for_event(make_event())
+    assert pricing.unit_prices({"Single Race": 5}, day(0)) == {"Single Race": 45.0}
+    assert pricing.unit_prices({"Single Race": 5}, day(30)) == {"Single Race": 42.5}
+    assert pricing.unit_prices({"Single Race": 25}, day(30)) == {"Single Race": 37.5}
+
+
+def test_rules_only_apply_to_eligible_tickets():
+    event = make_event()
+    event.get_ticket("Grandstand").set_discount_availability(False)
+    pricing = PricingEngine([DiscountRule("Single races", 20, min_quantity=1, ticket_names=["Single Race"]),
+                             DiscountRule("Group", 10, min_quantity=5)]).for_event(event)
+    assert pricing.unit_prices({"Single Race": 1, "Grandstand": 4}, day(0)) == {"Single Race": 40.0, "Grandstand": 80.0}
+
+
+def test_unknown_tickets_and_empty_quantities_are_ignored():
+    pricing = PricingEngine().for_event(make_event())
+    assert pricing.unit_prices({"Single Race": 0, "Paddock": 9, "Grandstand": 1}, day(0)) == {"Grandstand": 80.0}
+
+
+@pytest.mark.parametrize("arguments", [dict(percent=0, min_quantity=5), dict(percent=101, min_quantity=5),
+                                       dict(percent=10), dict(percent=10, min_quantity=5, days_before=30)])
+def test_invalid_rules_are_refused(arguments):
+    with pytest.raises(ValueError):
+        DiscountRule("Invalid", **arguments)
+
+
+def test_quotes_match_bookings(manager):
+    cart = {"Single Race": 4, "Grandstand": 1}
+    quote = manager.quote(1, cart)
+    assert quote == 4 * 45.0 + 72.0
+    booking = manager.create_booking(1, 1, cart)
+    assert booking.calculate_total() == quote
+    assert manager.get_sales_totals()[1]["Single Race"]["revenue"] == 180.0
+
+
+def test_batch_quotes_match_single_quotes(manager):
+    manager.add_event(make_event(2, date="2000-01-01"))
+    carts = [(1, {"Single Race": 1}), (1, {"Single Race": 5}), (2, {"Grandstand": 6}), (3, {"Single Race": 1}),
+             (1, {"Grandstand": 2, "Single Race": 3})]
+    assert manager.quote_batch(carts, "2099-01-01") == [manager.quote(*cart, booking_date="2099-01-01") for cart in carts]
+    assert manager.quote_batch(carts, "2099-01-01")[3] == 0
+
+
+def test_discount_changes_apply_once_saved(pickle_storage):
+    data_manager = seed(pickle_storage())
+    try:
+        assert data_manager.quote(1, {"Single Race": 5}) == 225.0
+        Admin(1, "Admin").modify_discount_availability(data_manager.get_event(1), "Single Race", False)
+        data_manager.save_events()
+        assert data_manager.quote(1, {"Single Race": 5}) == 250.0
+    finally:
+        data_manager.close()
+    reloaded = DataManager(storage=pickle_storage())
+    try:
+        assert reloaded.quote(1, {"Single Race": 5}) == 250.0
+    finally:
+        reloaded.close()
+
+
+def test_group_tickets_need_their_minimum_quantity(manager):
+    add_group_ticket(manager.get_event(1))
+    manager.save_events()
+    for cart in ({"Group Discount": 4}, {"Group Discount": 4, "Single Race": 3}):
+        with pytest.raises(ValueError, match="groups of at least 5"):
+            manager.quote(1, cart)
+        with pytest.raises(ValueError, match="groups of at least 5"):
+            manager.quote_batch([(1, cart)])
+        with pytest.raises(ValueError, match="groups of at least 5"):
+            manager.create_booking(1, 1, cart)
+    results, failures = manager.create_bookings_bulk([(1, 1, {"Group Discount": 4})])
+    assert results == [None] and "groups of at least 5" in failures[0][1]
+    assert not manager.bookings and manager.get_event(1).get_availability() == 10
+
+
+def test_group_tickets_dont_stack_the_group_discount(manager):
+    add_group_ticket(manager.get_event(1))
+    manager.save_events()
+    assert manager.get_unit_prices(1, {"Group Discount": 5, "Single Race": 1}) == {"Group Discount": 45.0, "Single Race": 45.0}
+    booking = manager.create_booking(1, 1, {"Group Discount": 6})
+    assert booking.calculate_total() == 6 * 45.0
@@ -0,0 +1,119 @@
+"""Seat reservation and booking creation, including rollback when the booking can't be saved."""
+import threading
+
+import pytest
+
+from app import DataManager, StorageError
+
+
+def fail(*args, **kwargs):
+    raise StorageError("disk full")
+
+
+def test_booking_reserves_seats(manager):
+    booking = manager.create_booking(1, 1, {"Single Race": 4})
+    assert booking.get_ticket_count() == 4
+    assert manager.get_event(1).get_availability() == 6
+
+
+def test_overbooking_is_refused(manager):
+    manager.create_booking(1, 1, {"Single Race": 8})
+    with pytest.raises(ValueError):
+        manager.create_booking(1, 1, {"Grandstand": 3})
+    assert manager.get_event(1).get_availability() == 2
+
+
+@pytest.mark.parametrize("tickets", [{}, {"Single Race": 0}, {"Paddock": 2}, {"Paddock": 2, "Grandstand": 0}])
+def test_carts_without_valid_tickets_are_refused(manager, tickets):
+    with pytest.raises(ValueError, match="No valid tickets selected."):
+        manager.create_booking(1, 1, tickets)
+    assert manager.create_bookings_bulk([(1, 1, tickets)]) == ([None], [(0, "No valid tickets selected.")])
+    assert not manager.bookings and manager.next_booking_id == 1
+
+
+def test_concurrent_checkouts_never_oversell(manager):
+    outcomes = []
+    def buy():
+        try:
+            outcomes.append(manager.create_booking(1, 1, {"Single Race": 1}))
+        except ValueError:
+            outcomes.append(None)
+    threads = [threading.Thread(target=buy) for _ in range(30)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(1 for booking in outcomes if booking) == 10
+    assert manager.get_event(1).get_seats_sold() == 10
+
+
+def test_failed_save_rolls_the_booking_back(manager, pickle_storage, monkeypatch):
+    monkeypatch.setattr(manager.storage, "add_booking", fail)
+    with pytest.raises(StorageError):
+        manager.create_booking(1, 1, {"Single Race": 4})
+    assert manager.get_event(1).get_availability() == 10
+    assert len(manager.bookings) == 0
+    assert manager.get_bookings_for_user(1) == []
+    assert manager.get_sales_totals() == {}
+    assert manager.next_booking_id == 1
+    monkeypatch.undo()
+    booking = manager.create_booking(1, 1, {"Single Race": 2})
+    assert booking.get_booking_id() == 1
+    manager.close()
+    reloaded = DataManager(storage=pickle_storage())
+    assert list(reloaded.bookings) == [1]
+    assert reloaded.get_event(1).get_seats_sold() == 2
+    reloaded.close()
+
+
+def test_failed_bulk_save_rolls_the_whole_batch_back(manager, monkeypatch):
+    manager.create_booking(1, 1, {"Single Race": 1})
+    monkeypatch.setattr(manager.storage, "add_bookings", fail)
+    with pytest.raises(StorageError):
+        manager.create_bookings_bulk([(1, 1, {"Single Race": 2}), (1, 1, {"Grandstand": 3})])
+    assert manager.get_event(1).get_availability() == 9
+    assert list(manager.bookings) == [1]
+    assert manager.count_bookings_for_event(1) == 1
+    assert manager.get_sales_report() == {1: {"Single Race": 1}}
+    assert manager.next_booking_id == 2
+
+
+def test_failed_payment_saves_are_rolled_back(manager, monkeypatch):
+    booking = manager.create_booking(1, 1, {"Single Race": 1})
+    monkeypatch.setattr(manager.storage, "add_payment", fail)
+    monkeypatch.setattr(manager.storage, "add_payments", fail)
+    with pytest.raises(StorageError):
+        manager.create_payment(booking.get_booking_id(), 50.0, "Credit Card")
+    with pytest.raises(StorageError):
+        manager.create_payments_bulk([(booking.get_booking_id(), 50.0, "Credit Card")] * 3)
+    assert len(manager.payments) == 0
+    assert manager.next_payment_id == 1
+
+
+def test_cancelling_returns_the_seats(manager, pickle_storage):
+    booking = manager.create_booking(1, 1, {"Single Race": 3, "Grandstand": 1})
+    assert manager.cancel_booking(booking.get_booking_id())
+    assert not manager.cancel_booking(booking.get_booking_id())
+    assert manager.get_event(1).get_availability() == 10
+    assert manager.get_sales_report() == {}
+    manager.close()
+    reloaded = DataManager(storage=pickle_storage())
+    assert reloaded.bookings[1].get_status() == "Cancelled"
+    assert reloaded.get_event(1).get_availability() == 10
+    reloaded.close()
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_payments_are_found_by_booking(pickle_storage, manager, columnar):
+    first = manager.create_booking(1, 1, {"Single Race": 1})
+    second = manager.create_booking(1, 1, {"Grandstand": 1})
+    manager.create_payment(first.get_booking_id(), 25.0, "Credit Card")
+    manager.create_payments_bulk([(second.get_booking_id(), 80.0, "PayPal"), (first.get_booking_id(), 25.0, "PayPal")])
+    manager.close()
+    reloaded = DataManager(storage=pickle_storage(), columnar=columnar)
+    try:
+        assert [payment.get_payment_id() for payment in reloaded.get_payments_for_booking(first.get_booking_id())] == [1, 3]
+        assert [payment.get_amount() for payment in reloaded.get_payments_for_booking(second.get_booking_id())] == [80.0]
+        assert reloaded.get_payments_for_booking(99) == []
+    finally:
+        reloaded.close()
@@ -0,0 +1,64 @@
+"""Headless service layer and HTTP API."""
+import asyncio
+import json
+
+import pytest
+
+from app import Payment
+from service import ApiServer, PaymentError, ServiceError, TicketService
+
+
+def test_declined_payment_cancels_the_booking(manager, monkeypatch):
+    monkeypatch.setattr(Payment, "process_payment", lambda payment: False)
+    with pytest.raises(PaymentError):
+        TicketService(manager).checkout(1, 1, {"Single Race": 4}, "Credit Card")
+    assert manager.bookings[1].get_status() == "Cancelled"
+    assert manager.get_event(1).get_availability() == 10
+
+
+@pytest.mark.parametrize("tickets", [{}, {"Single Race": 0}, {"Single Race": 0, "Grandstand": 0}])
+def test_empty_carts_are_refused(manager, tickets):
+    service = TicketService(manager)
+    with pytest.raises(ServiceError, match="Select at least one ticket."):
+        service.checkout(1, 1, tickets, "Credit Card")
+    with pytest.raises(ServiceError, match="Select at least one ticket."):
+        service.quote(1, tickets)
+    assert not manager.bookings and not manager.payments
+
+
+def request(server, method, path, body=None, token=None):
+    """Dispatches one request to an ApiServer and returns its status and payload."""
+    headers = {"authorization": f"Bearer {token}"} if token else {}
+    raw_body = json.dumps(body).encode("utf-8") if body is not None else b""
+    return asyncio.run(server.dispatch(method, path, headers, raw_body))
+
+
+def test_malformed_requests_get_an_error_response(manager, monkeypatch):
+    server = ApiServer(TicketService(manager))
+    try:
+        status, payload = request(server, "POST", "/quote", {"event_id": [1], "tickets": {"Single Race": 1}})
+        assert (status, payload) == (400, {"error": "Event ID must be an integer."})
+        monkeypatch.setattr(TicketService, "list_events", lambda service: 1 / 0)
+        assert request(server, "GET", "/events") == (500, {"error": "Internal server error."})
+    finally:
+        server.executor.shutdown()
+
+
+def test_report_and_memory_need_an_admin_session(manager, monkeypatch):
+    manager.get_account_manager().create_account("Bob Admin", "bob@example.com", "secret")
+    service = TicketService(manager, admin_emails=["Bob@Example.com"])
+    server = ApiServer(service)
+    try:
+        user = service.login("alice@example.com", "secret")["token"]
+        admin = service.login("bob@example.com", "secret")["token"]
+        for path in ("/report", "/memory"):
+            assert request(server, "GET", path)[0] == 401
+            assert request(server, "GET", path, token=user)[0] == 403
+            assert request(server, "GET", path, token=admin)[0] == 200
+        scans = []
+        monkeypatch.setattr(manager, "memory_usage", lambda: scans.append(1) or {"total_bytes": len(scans)})
+        service.memory_report = None
+        assert [request(server, "GET", "/memory", token=admin)[1] for _ in range(3)] == [{"total_bytes": 1}] * 3
+        assert len(scans) == 1
+    finally:
+        server.executor.shutdown()
@@ -0,0 +1,43 @@
+"""Event-sharded booking and payment files."""
+import os
+
+from app import Admin
+
+from benchmarks.suite import make_storage
+from conftest import make_event, open_manager, seed
+
+
+def test_shards_split_bookings_by_event(tmp_path):
+    storage = make_storage("sharded", str(tmp_path))
+    data_manager = seed(storage)
+    data_manager.add_event(make_event(2))
+    data_manager.create_booking(1, 1, {"Single Race": 1})
+    data_manager.create_booking(1, 2, {"Grandstand": 2})
+    data_manager.close()
+    assert sorted(os.listdir(tmp_path / "shards" / "bookings")) == ["event_1.pkl.log", "event_2.pkl.log"]
+    reloaded = open_manager("sharded", tmp_path)
+    try:
+        assert [booking.get_event_id() for booking in reloaded.get_bookings_for_user(1)] == [1, 2]
+        assert reloaded.get_event(2).get_seats_sold() == 2
+    finally:
+        reloaded.close()
+
+
+def test_reports_leave_out_cancelled_bookings(tmp_path):
+    data_manager = seed(make_storage("sharded", str(tmp_path)))
+    data_manager.add_event(make_event(2))
+    data_manager.add_event(make_event(3))
+    data_manager.create_booking(1, 1, {"Single Race": 1, "Grandstand": 2})
+    cancelled = data_manager.create_booking(1, 1, {"Single Race": 4})
+    only = data_manager.create_booking(1, 2, {"Grandstand": 2})
+    data_manager.create_booking(1, 3, {"Single Race": 3})
+    data_manager.cancel_booking(cancelled.get_booking_id())
+    data_manager.cancel_booking(only.get_booking_id())
+    expected = {1: {"Single Race": 1, "Grandstand": 2}, 3: {"Single Race": 3}}
+    try:
+        admin = Admin(1, "Admin")
+        assert data_manager.get_sales_report() == expected
+        assert admin.view_report(data_manager.bookings.values()) == expected
+        assert admin.view_sharded_report(data_manager.storage) == expected
+    finally:
+        data_manager.close()
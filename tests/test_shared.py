@@ -0,0 +1,35 @@
+"""Several processes sharing the data files."""
+import pytest
+
+from app import ConflictError, DataManager
+
+from conftest import seed
+
+
+def test_shared_saves_detect_conflicts(pickle_storage):
+    seed(pickle_storage()).close()
+    first, second = pickle_storage(shared=True), pickle_storage(shared=True)
+    first_events, second_events = first.load_events(), second.load_events()
+    first.save_events(first_events)
+    with pytest.raises(ConflictError):
+        second.save_events(second_events) # Read before the first storage saved
+    second.load_events()
+    second.save_events(second_events)
+
+
+def test_shared_managers_merge_each_others_bookings(pickle_storage):
+    seed(pickle_storage()).close()
+    first = DataManager(storage=pickle_storage(journal=True, shared=True))
+    second = DataManager(storage=pickle_storage(journal=True, shared=True))
+    try:
+        ids = [first.create_booking(1, 1, {"Single Race": 2}).get_booking_id(),
+               second.create_booking(1, 1, {"Single Race": 3}).get_booking_id(),
+               first.create_booking(1, 1, {"Grandstand": 1}).get_booking_id()]
+        assert ids == [1, 2, 3]
+        with pytest.raises(ValueError):
+            second.create_booking(1, 1, {"Single Race": 5}) # Only 4 of the 10 seats are left across both
+        first.sync()
+        assert first.get_event(1).get_seats_sold() == second.get_event(1).get_seats_sold() == 6
+    finally:
+        first.close()
+        second.close()
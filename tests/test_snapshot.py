@@ -0,0 +1,84 @@
+"""Binary snapshot files."""
+import os
+import struct
+
+import pytest
+
+from app import SnapshotFile, StorageError, convert_storage
+
+from benchmarks.datagen import write_dataset
+from benchmarks.suite import make_storage
+from conftest import contents, open_manager
+
+
+def test_snapshot_conversion_matches_the_pickles(tmp_path):
+    write_dataset(make_storage("journal", str(tmp_path)), users=20, events=3, bookings=200, seed=2)
+    source = open_manager("journal", tmp_path)
+    expected = contents(source)
+    source.close()
+    counts = convert_storage(make_storage("journal", str(tmp_path)), make_storage("snapshot", str(tmp_path)))
+    assert counts["bookings"] == 200
+    converted = open_manager("snapshot", tmp_path)
+    try:
+        assert contents(converted) == expected
+        converted.create_booking(1, 1, {converted.get_event(1).get_available_tickets()[0].get_name(): 1})
+        expected = contents(converted)
+    finally:
+        converted.close()
+    reloaded = open_manager("snapshot", tmp_path)
+    try:
+        assert contents(reloaded) == expected
+    finally:
+        reloaded.close()
+
+
+def test_snapshot_refuses_other_files(tmp_path):
+    write_dataset(make_storage("snapshot", str(tmp_path)), users=2, events=1, bookings=0)
+    os.replace(tmp_path / "events.snap", tmp_path / "users.snap")
+    with pytest.raises(StorageError, match="doesn't hold users"):
+        open_manager("snapshot", tmp_path)
+    (tmp_path / "users.snap").write_bytes(b"not a snapshot at all, just some bytes")
+    with pytest.raises(StorageError, match="not a binary snapshot file"):
+        open_manager("snapshot", tmp_path)
+
+
+@pytest.mark.parametrize("keep", [0, 10, 60, 0.5, -3])
+def test_snapshot_refuses_truncated_files(tmp_path, keep):
+    write_dataset(make_storage("snapshot", str(tmp_path)), users=5, events=2, bookings=20)
+    data = (tmp_path / "bookings.snap").read_bytes()
+    (tmp_path / "bookings.snap").write_bytes(data[:int(len(data) * keep) if isinstance(keep, float) else keep])
+    with pytest.raises(StorageError, match="not a binary snapshot file|truncated"):
+        open_manager("snapshot", tmp_path)
+
+
+def corrupt_string_table(filename, section, patch):
+    """Rewrites a string table of a snapshot file in place. patch gets the table's count, offsets and text, and
+    returns them changed."""
+    with open(filename, "rb") as f:
+        snapshot = SnapshotFile(f, "bookings")
+        _, offset, length = snapshot.sections[section]
+        snapshot.close()
+    data = bytearray(open(filename, "rb").read())
+    table = bytes(data[offset:offset + length])
+    count = struct.unpack_from("<q", table)[0]
+    offsets = list(struct.unpack_from(f"<{count + 1}q", table, 8))
+    text = table[8 * (count + 2):]
+    count, offsets, text = patch(count, offsets, text)
+    table = (struct.pack("<q", count) + struct.pack(f"<{len(offsets)}q", *offsets) + text)[:length].ljust(length, b"\0")
+    data[offset:offset + length] = table
+    open(filename, "wb").write(data)
+
+
+@pytest.mark.parametrize("patch, message", [
+    (lambda count, offsets, text: (10 ** 6, offsets, text), "truncated"),
+    (lambda count, offsets, text: (-1, offsets, text), "truncated"),
+    (lambda count, offsets, text: (count, offsets[:-1] + [offsets[-1] + 1000], text), "truncated"),
+    (lambda count, offsets, text: (count, [5] + offsets[1:], text), "truncated"),
+    (lambda count, offsets, text: (count, offsets[:1] + [offsets[2], offsets[1]] + offsets[3:], text), "corrupt"),
+    (lambda count, offsets, text: (count, offsets, b"\xff" + text[1:]), "corrupt"),
+])
+def test_snapshot_refuses_corrupt_string_tables(tmp_path, patch, message):
+    write_dataset(make_storage("snapshot", str(tmp_path)), users=5, events=2, bookings=20)
+    corrupt_string_table(tmp_path / "bookings.snap", "item_names", patch)
+    with pytest.raises(StorageError, match=f"Could not load booking data: the file is {message}"):
+        open_manager("snapshot", tmp_path)
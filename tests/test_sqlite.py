@@ -0,0 +1,18 @@
+"""SQLite storage and its indexes."""
+from app import SqliteStorage
+
+from conftest import seed
+
+
+def test_sqlite_indexes_page_and_count(tmp_path):
+    data_manager = seed(SqliteStorage(str(tmp_path / "tickets.db")))
+    try:
+        booking_ids = [data_manager.create_booking(1, 1, {"Single Race": 1}).get_booking_id() for _ in range(5)]
+        data_manager.create_payment(booking_ids[2], 50.0, "PayPal")
+        assert data_manager.count_bookings_for_user(1) == 5
+        assert [booking.get_booking_id() for booking in data_manager.get_bookings_for_user(1, offset=1, limit=2)] == booking_ids[1:3]
+        assert data_manager.count_bookings_for_event(1) == 5
+        assert [payment.get_booking_id() for payment in data_manager.get_payments_for_booking(booking_ids[2])] == [booking_ids[2]]
+        assert data_manager.get_account_manager().find_by_email("ALICE@example.com")
+    finally:
+        data_manager.close()
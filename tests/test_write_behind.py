@@ -0,0 +1,19 @@
+"""Write-behind flushing."""
+from app import DataManager
+
+from conftest import seed
+
+
+def test_write_behind_writes_on_flush(pickle_storage):
+    seed(pickle_storage()).close()
+    data_manager = DataManager(storage=pickle_storage(journal=True, write_behind=60))
+    try:
+        data_manager.create_booking(1, 1, {"Single Race": 1})
+        data_manager.compact() # Queues the snapshot and emptying the journal
+        data_manager.create_booking(1, 1, {"Single Race": 2}) # Queued after the compaction
+        assert len(pickle_storage(journal=True).load_bookings()[0]) == 0 # Nothing written yet
+        data_manager.flush()
+        bookings, next_id = pickle_storage(journal=True).load_bookings()
+        assert sorted(bookings) == [1, 2] and next_id == 3
+    finally:
+        data_manager.close()